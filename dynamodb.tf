@@ -0,0 +1,15 @@
+resource "aws_dynamodb_table" "svep-jobs" {
+  name = "svepJobs"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key = "jobId"
+
+  attribute {
+    name = "jobId"
+    type = "S"
+  }
+
+  ttl {
+    attribute_name = "expiresAt"
+    enabled = true
+  }
+}
@@ -23,10 +23,28 @@ data "aws_iam_policy_document" "lambda-initQuery" {
       "SNS:Publish",
     ]
     resources = [
-      aws_sns_topic.concatStarter.arn,
+      aws_sns_topic.concat.arn,
       aws_sns_topic.queryVCF.arn,
     ]
   }
+  statement {
+    actions = [
+      "sqs:SendMessage",
+    ]
+    resources = [
+      aws_sqs_queue.concatStarter.arn,
+    ]
+  }
+  statement {
+    actions = [
+      "dynamodb:GetItem",
+      "dynamodb:PutItem",
+      "dynamodb:UpdateItem",
+    ]
+    resources = [
+      aws_dynamodb_table.svep-jobs.arn,
+    ]
+  }
   statement {
     actions = [
       "s3:PutObject",
@@ -52,15 +70,24 @@ data "aws_iam_policy_document" "lambda-queryVCF" {
       "SNS:Publish",
     ]
     resources = [
+      aws_sns_topic.concat.arn,
       aws_sns_topic.queryGTF.arn,
       aws_sns_topic.queryVCF.arn,
-      aws_sns_topic.queryVCFsubmit.arn,
+    ]
+  }
+  statement {
+    actions = [
+      "dynamodb:GetItem",
+      "dynamodb:PutItem",
+      "dynamodb:UpdateItem",
+    ]
+    resources = [
+      aws_dynamodb_table.svep-jobs.arn,
     ]
   }
   statement {
     actions = [
       "s3:PutObject",
-      "s3:DeleteObject",
     ]
     resources = [
       "${aws_s3_bucket.svep-temp.arn}/*",
@@ -76,41 +103,37 @@ data "aws_iam_policy_document" "lambda-queryVCF" {
 }
 
 #
-# queryVCFsubmit Lambda Function
+# queryGTF Lambda Function
 #
-data "aws_iam_policy_document" "lambda-queryVCFsubmit" {
+data "aws_iam_policy_document" "lambda-queryGTF" {
   statement {
     actions = [
       "SNS:Publish",
     ]
     resources = [
+      aws_sns_topic.concat.arn,
+      aws_sns_topic.pluginConsequence.arn,
+      aws_sns_topic.pluginUpdownstream.arn,
       aws_sns_topic.queryGTF.arn,
     ]
   }
   statement {
     actions = [
-      "s3:PutObject",
-      "s3:DeleteObject",
+      "dynamodb:GetItem",
+      "dynamodb:PutItem",
+      "dynamodb:UpdateItem",
     ]
     resources = [
-      "${aws_s3_bucket.svep-temp.arn}/*",
+      aws_dynamodb_table.svep-jobs.arn,
     ]
   }
-}
-
-
-#
-# queryGTF Lambda Function
-#
-data "aws_iam_policy_document" "lambda-queryGTF" {
   statement {
     actions = [
-      "SNS:Publish",
+      "s3:PutObject",
     ]
     resources = [
-      aws_sns_topic.pluginConsequence.arn,
-      aws_sns_topic.pluginUpdownstream.arn,
-      aws_sns_topic.queryGTF.arn,
+      "${aws_s3_bucket.svep-regions.arn}/*",
+      "${aws_s3_bucket.svep-temp.arn}/*",
     ]
   }
   statement {
@@ -119,7 +142,7 @@ data "aws_iam_policy_document" "lambda-queryGTF" {
       "s3:DeleteObject",
     ]
     resources = [
-      "${aws_s3_bucket.svep-temp.arn}/*",
+      "${aws_s3_bucket.svep-annotation-cache.arn}/*",
     ]
   }
   statement {
@@ -146,7 +169,25 @@ data "aws_iam_policy_document" "lambda-pluginConsequence" {
     ]
     resources = ["*"]
   }
+  statement {
+    actions = [
+      "dynamodb:GetItem",
+      "dynamodb:PutItem",
+      "dynamodb:UpdateItem",
+    ]
+    resources = [
+      aws_dynamodb_table.svep-jobs.arn,
+    ]
+  }
 
+  statement {
+    actions = [
+      "SNS:Publish",
+    ]
+    resources = [
+      aws_sns_topic.concat.arn,
+    ]
+  }
 }
 
 #
@@ -163,6 +204,24 @@ data "aws_iam_policy_document" "lambda-pluginUpdownstream" {
     ]
     resources = ["*"]
   }
+  statement {
+    actions = [
+      "dynamodb:GetItem",
+      "dynamodb:PutItem",
+      "dynamodb:UpdateItem",
+    ]
+    resources = [
+      aws_dynamodb_table.svep-jobs.arn,
+    ]
+  }
+  statement {
+    actions = [
+      "SNS:Publish",
+    ]
+    resources = [
+      aws_sns_topic.concat.arn,
+    ]
+  }
 }
 
 #
@@ -182,9 +241,18 @@ data "aws_iam_policy_document" "lambda-concat" {
       "SNS:Publish",
     ]
     resources = [
+      aws_sns_topic.concatPages.arn,
       aws_sns_topic.createPages.arn,
     ]
   }
+  statement {
+    actions = [
+      "s3:PutObject",
+    ]
+    resources = [
+      "${aws_s3_bucket.svep-temp.arn}/*",
+    ]
+  }
 }
 
 #
@@ -193,11 +261,22 @@ data "aws_iam_policy_document" "lambda-concat" {
 data "aws_iam_policy_document" "lambda-concatStarter" {
   statement {
     actions = [
-      "s3:ListBucket",
+      "dynamodb:GetItem",
+      "dynamodb:UpdateItem",
     ]
     resources = [
-      aws_s3_bucket.svep-regions.arn,
-      aws_s3_bucket.svep-temp.arn,
+      aws_dynamodb_table.svep-jobs.arn,
+    ]
+  }
+  statement {
+    actions = [
+      "sqs:SendMessage",
+      "sqs:ReceiveMessage",
+      "sqs:DeleteMessage",
+      "sqs:GetQueueAttributes",
+    ]
+    resources = [
+      aws_sqs_queue.concatStarter.arn,
     ]
   }
   statement {
@@ -206,7 +285,6 @@ data "aws_iam_policy_document" "lambda-concatStarter" {
     ]
     resources = [
       aws_sns_topic.concat.arn,
-      aws_sns_topic.concatStarter.arn,
     ]
   }
 }
@@ -215,12 +293,23 @@ data "aws_iam_policy_document" "lambda-concatStarter" {
 # createPages Lambda Function
 #
 data "aws_iam_policy_document" "lambda-createPages" {
+  statement {
+    actions = [
+      "dynamodb:GetItem",
+      "dynamodb:PutItem",
+      "dynamodb:UpdateItem",
+    ]
+    resources = [
+      aws_dynamodb_table.svep-jobs.arn,
+    ]
+  }
   statement {
     actions = [
       "s3:GetObject",
       "s3:ListBucket",
       "s3:PutObject",
       "s3:DeleteObject",
+      "s3:AbortMultipartUpload",
     ]
     resources = ["*"]
   }
@@ -244,18 +333,10 @@ data "aws_iam_policy_document" "lambda-concatPages" {
       "s3:GetObject",
       "s3:ListBucket",
       "s3:PutObject",
-      "s3:DeleteObject",
+      "s3:AbortMultipartUpload",
     ]
     resources = ["*"]
   }
-  statement {
-    actions = [
-      "SNS:Publish",
-    ]
-    resources = [
-      aws_sns_topic.concatPages.arn,
-    ]
-  }
 }
 
 #
@@ -268,4 +349,12 @@ data "aws_iam_policy_document" "lambda-getResultsURL" {
     ]
     resources = ["*"]
   }
+  statement {
+    actions = [
+      "s3:ListBucket",
+    ]
+    resources = [
+      aws_s3_bucket.svep-results.arn,
+    ]
+  }
 }
@@ -39,17 +39,6 @@ resource "aws_lambda_function_recursion_config" "SNSLambdaqueryVCF" {
   recursive_loop = "Allow"
 }
 
-#
-# queryVCFsubmit Lambda Function
-#
-resource "aws_lambda_permission" "SNSLambdaqueryVCFsubmit" {
-  statement_id = "SNSLambdaqueryVCFsubmit"
-  action = "lambda:InvokeFunction"
-  function_name = module.lambda-queryVCFsubmit.function_name
-  principal = "sns.amazonaws.com"
-  source_arn = aws_sns_topic.queryVCFsubmit.arn
-}
-
 #
 # queryGTF Lambda Function
 #
@@ -70,16 +59,18 @@ resource "aws_lambda_function_recursion_config" "SNSLambdaqueryGTF" {
 # pluginConsequence Lambda Function
 #
 resource "aws_lambda_permission" "SNSLambdapluginConsequence" {
+  for_each = local.consequence_chromosome_groups
   statement_id = "SNSLambdapluginConsequence"
   action = "lambda:InvokeFunction"
   # TODO: Update to reference function_name once terraform-aws-lambda is updated
-  function_name = module.lambda-pluginConsequence.lambda_function_name
+  function_name = module.lambda-pluginConsequence[each.key].lambda_function_name
   principal = "sns.amazonaws.com"
   source_arn = aws_sns_topic.pluginConsequence.arn
 }
 resource "aws_lambda_function_recursion_config" "SNSLambdapluginConsequence" {
+  for_each = local.consequence_chromosome_groups
   # TODO: Update to reference function_name once terraform-aws-lambda is updated
-  function_name = module.lambda-pluginConsequence.lambda_function_name
+  function_name = module.lambda-pluginConsequence[each.key].lambda_function_name
   recursive_loop = "Allow"
 }
 
@@ -109,14 +100,12 @@ resource "aws_lambda_permission" "SNSLambdaconcat" {
 #
 # concatStarter Lambda Function
 #
-resource "aws_lambda_permission" "SNSLambdaconcatStarter" {
-  statement_id = "SNSLambdaconcatStarter"
-  action = "lambda:InvokeFunction"
+resource "aws_lambda_event_source_mapping" "SQSLambdaconcatStarter" {
+  event_source_arn = aws_sqs_queue.concatStarter.arn
   function_name = module.lambda-concatStarter.function_name
-  principal = "sns.amazonaws.com"
-  source_arn = aws_sns_topic.concatStarter.arn
+  batch_size = 1
 }
-resource "aws_lambda_function_recursion_config" "SNSLambdaconcatStarter" {
+resource "aws_lambda_function_recursion_config" "SQSLambdaconcatStarter" {
   function_name = module.lambda-concatStarter.function_name
   recursive_loop = "Allow"
 }
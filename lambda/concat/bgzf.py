@@ -0,0 +1 @@
+../../shared_resources/bgzf.py
\ No newline at end of file
@@ -2,48 +2,64 @@ import os
 
 import boto3
 
-from lambda_utils import get_sns_event, sns_publish
+from lambda_utils import BatchPublisher, get_sns_event, sns_publish
+from merge_plan import MergePlan
+from sorted_results import group_shards, RESULT_FORMAT
 
 
 # AWS clients and resources
 s3 = boto3.client('s3')
 
 # Environment variables
+CONCATPAGES_SNS_TOPIC_ARN = os.environ['CONCATPAGES_SNS_TOPIC_ARN']
 CREATEPAGES_SNS_TOPIC_ARN = os.environ['CREATEPAGES_SNS_TOPIC_ARN']
+MERGE_FAN_IN = int(os.environ.get('MERGE_FAN_IN', 1000))
 SVEP_REGIONS = os.environ['SVEP_REGIONS']
 
+# Shards read into memory by each k-way merge, where overlaps allow
+MAX_GROUP_BYTES = 256 * 1024 ** 2
 
-def concat(api_id):
-    page_num = 0
+
+def get_shards(api_id):
     paginator = s3.get_paginator('list_objects_v2')
-    # Change later on
-    operation_parameters = {
-        'Bucket': SVEP_REGIONS,
-        'Prefix': api_id,
-        'PaginationConfig': {
-            'PageSize': 600
-        }
-    }
-    page_iterator = paginator.paginate(**operation_parameters)
-    message = {
-        'APIid': api_id,
-        'prefix': f'{api_id}_page',
-    }
-    for page in page_iterator:
-        page_contents = page['Contents']
-        page_keys = [d['Key'] for d in page_contents]
-        page_num += 1
-        message.update({
-            'pageKeys': page_keys,
-            'pageNum': page_num,
+    page_iterator = paginator.paginate(Bucket=SVEP_REGIONS,
+                                       Prefix=f'{api_id}/')
+    return [
+        (d['Key'], d['Size'])
+        for page in page_iterator
+        for d in page.get('Contents', [])
+    ]
+
+
+def concat(api_id):
+    shards = get_shards(api_id)
+    if not shards:
+        print(f"No results to concatenate for {api_id}")
+        return
+    groups = group_shards(shards, MERGE_FAN_IN, MAX_GROUP_BYTES)
+    # Parquet files can't be joined, so each group becomes a file of the
+    # result and concatPages collects them all.
+    fan_in = len(groups) if RESULT_FORMAT == 'parquet' else MERGE_FAN_IN
+    plan = MergePlan.from_group_count(api_id, len(shards), len(groups),
+                                      fan_in)
+    if plan.top_level == 0:
+        print(f"Merging {len(shards)} shards directly, starting concatPages")
+        sns_publish(CONCATPAGES_SNS_TOPIC_ARN, {
+            'APIid': api_id,
+            'allKeys': groups[0],
+            'overlapping': True,
         })
-        if 'NextContinuationToken' in page:
-            message['lastPage'] = 0
-        else:
-            print("last page")
-            print(page_num)
-            message['lastPage'] = 1
-        sns_publish(CREATEPAGES_SNS_TOPIC_ARN, message)
+        return
+    print(f"Merging {len(shards)} shards in levels of {plan.level_sizes}")
+    with BatchPublisher() as publisher:
+        for index, group in enumerate(groups):
+            message = plan.to_message()
+            message.update({
+                'level': 1,
+                'index': index,
+                'childKeys': group,
+            })
+            publisher.publish(CREATEPAGES_SNS_TOPIC_ARN, message)
     print("Finished sending to createPages")
 
 
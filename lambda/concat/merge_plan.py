@@ -0,0 +1 @@
+../../shared_resources/merge_plan.py
\ No newline at end of file
@@ -0,0 +1 @@
+../../shared_resources/compose.py
\ No newline at end of file
@@ -1,21 +0,0 @@
-
-# This file was generated by 'versioneer.py' (0.18) from
-# revision-control system data, or from the parent directory name of an
-# unpacked source archive. Distribution tarballs contain a pre-generated copy
-# of this file.
-
-import json
-
-version_json = '''
-{
- "date": "2019-11-13T10:59:17-0600",
- "dirty": false,
- "error": null,
- "full-revisionid": "85b863170f76063b270671442448b15e821f92b6",
- "version": "0.4.0"
-}
-'''  # END VERSION_JSON
-
-
-def get_versions():
-    return json.loads(version_json)
@@ -0,0 +1 @@
+../../shared_resources/parquet_results.py
\ No newline at end of file
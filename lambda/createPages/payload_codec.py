@@ -0,0 +1 @@
+../../shared_resources/payload_codec.py
\ No newline at end of file
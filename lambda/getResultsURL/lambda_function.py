@@ -4,12 +4,14 @@ from api_response import bad_request, bundle_response
 from lambda_utils import (
     print_event,
     generate_presigned_get_url,
+    s3,
 )
 
 
 # Environment variables
 RESULT_BUCKET = os.environ["SVEP_RESULTS"]
 RESULT_DURATION = int(os.environ["RESULT_DURATION"])
+RESULT_FORMAT = os.environ.get("RESULT_FORMAT", "tsv")
 RESULT_SUFFIX = os.environ["RESULT_SUFFIX"]
 
 
@@ -17,15 +19,31 @@ def lambda_handler(event, _):
     print_event(event, max_length=None)
     try:
         request_id = event["queryStringParameters"]["request_id"]
-        result_url = generate_presigned_get_url(
-            RESULT_BUCKET, f"{request_id}{RESULT_SUFFIX}", RESULT_DURATION
-        )
+        result_key = f"{request_id}{RESULT_SUFFIX}"
+        if RESULT_FORMAT == "parquet":
+            # A directory of files, one for each merged group of results
+            response = {
+                "ResultUrls": [
+                    generate_presigned_get_url(
+                        RESULT_BUCKET, obj.key, RESULT_DURATION
+                    )
+                    for obj in s3.Bucket(RESULT_BUCKET).objects.filter(
+                        Prefix=f"{result_key}/"
+                    )
+                ],
+            }
+        else:
+            response = {
+                "ResultUrl": generate_presigned_get_url(
+                    RESULT_BUCKET, result_key, RESULT_DURATION
+                ),
+            }
+        if RESULT_FORMAT == "bgzip":
+            # Supports ranged reads of a region, e.g. with tabix
+            response["IndexUrl"] = generate_presigned_get_url(
+                RESULT_BUCKET, f"{result_key}.tbi", RESULT_DURATION
+            )
     except ValueError:
         return bad_request("Error parsing request body, Expected JSON.")
 
-    return bundle_response(
-        200,
-        {
-            "ResultUrl": result_url,
-        },
-    )
+    return bundle_response(200, response)
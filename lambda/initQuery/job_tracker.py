@@ -0,0 +1 @@
+../../shared_resources/job_tracker.py
\ No newline at end of file
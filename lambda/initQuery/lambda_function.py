@@ -1,34 +1,48 @@
 import json
 import os
+from urllib.parse import urlparse
 
 from api_response import bad_request, bundle_response
 import chrom_matching
-from lambda_utils import print_event, sns_publish, start_function
+from job_tracker import tracker
+from lambda_utils import (BatchPublisher, print_event, sqs_send,
+                          start_function, trigger_concat)
+import tabix_index
 
 
 # Environment variables
-CONCAT_STARTER_SNS_TOPIC_ARN = os.environ['CONCAT_STARTER_SNS_TOPIC_ARN']
+CONCAT_STARTER_QUEUE_URL = os.environ['CONCAT_STARTER_QUEUE_URL']
 QUERY_VCF_SNS_TOPIC_ARN = os.environ['QUERY_VCF_SNS_TOPIC_ARN']
+RECORDS_PER_REGION = int(os.environ['RECORDS_PER_REGION'])
 RESULT_BUCKET = os.environ['SVEP_RESULTS']
 RESULT_DURATION = int(os.environ['RESULT_DURATION'])
 RESULT_SUFFIX = os.environ['RESULT_SUFFIX']
 SLICE_SIZE_MBP = int(os.environ['SLICE_SIZE_MBP'])
-os.environ['PATH'] += f':{os.environ["LAMBDA_TASK_ROOT"]}'
+
+# Delay before concatStarter first checks whether a job has finished
+CONCAT_CHECK_DELAY = 60
+# Schemes of VCF locations whose index can be read with ranged reads,
+# with local paths for running locally
+SUPPORTED_SCHEMES = ('', 's3', 'http', 'https')
 
 REGIONS = chrom_matching.get_regions(SLICE_SIZE_MBP)
 
 
 def get_translated_regions(location):
-    vcf_chromosomes = chrom_matching.get_vcf_chromosomes(location)
+    vcf_index = tabix_index.read_index(location)
     vcf_regions = []
     for target_chromosome, region_list in REGIONS.items():
-        chromosome = chrom_matching.get_matching_chromosome(vcf_chromosomes,
+        chromosome = chrom_matching.get_matching_chromosome(vcf_index.names,
                                                             target_chromosome)
         if not chromosome:
             continue
+        balanced_regions = chrom_matching.get_balanced_regions(
+            vcf_index.get(chromosome), RECORDS_PER_REGION)
+        if balanced_regions is not None:
+            region_list = balanced_regions
         vcf_regions += [
-            f'{chromosome}:{region}'
-            for region in region_list
+            (chromosome, start, end)
+            for start, end in region_list
         ]
     return vcf_regions
 
@@ -42,19 +56,43 @@ def lambda_handler(event, _):
         body_dict = json.loads(event_body)
         request_id = event['requestContext']['requestId']
         location = body_dict['location']
-        vcf_regions = get_translated_regions(location)
     except ValueError:
         return bad_request("Error parsing request body, Expected JSON.")
+    scheme = urlparse(location).scheme
+    if scheme not in SUPPORTED_SCHEMES:
+        return bad_request(f"Unsupported location {location}, VCFs must be"
+                           " in S3 or served over HTTP(S).")
+    try:
+        vcf_regions = get_translated_regions(location)
+    except (OSError, ValueError) as e:
+        return bad_request(f"Could not read the index of {location}: {e}")
 
     print(vcf_regions)
-    start_function(QUERY_VCF_SNS_TOPIC_ARN, request_id, {
-        'regions': vcf_regions,
-        'location': location,
-    })
-    sns_publish(CONCAT_STARTER_SNS_TOPIC_ARN, {
+    # Hold the job open until every region has been counted, so that
+    # regions finishing early can't trigger concat before the rest have
+    # started.
+    tracker.add(request_id, 1)
+    with BatchPublisher() as publisher:
+        for chromosome, start, end in vcf_regions:
+            start_function(
+                topic_arn=QUERY_VCF_SNS_TOPIC_ARN,
+                base_filename=f'{request_id}_{chromosome}_{start}',
+                message={
+                    'location': location,
+                    'chrom': chromosome,
+                    'nextPos': start,
+                    'end': end,
+                },
+                publisher=publisher,
+            )
+    if tracker.add(request_id, -1) == 0:
+        # Every region has already finished
+        trigger_concat(request_id)
+    sqs_send(CONCAT_STARTER_QUEUE_URL, {
         # TODO: Change all these APIid strings to requestID
         'APIid': request_id,
-    })
+        'delay': CONCAT_CHECK_DELAY,
+    }, delay_seconds=CONCAT_CHECK_DELAY)
 
     return bundle_response(200, {
         "Response": "Process started",
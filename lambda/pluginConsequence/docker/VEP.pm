@@ -58,15 +58,20 @@ use warnings;
 use Getopt::Long;
 use FileHandle;
 use File::Path qw(mkpath);
+use File::Find qw(find);
 use Storable qw(nstore_fd fd_retrieve freeze thaw);
 use Scalar::Util qw(weaken looks_like_number);
+use List::Util qw(min max);
+use HTTP::Tiny;
 use Digest::MD5 qw(md5_hex);
 use IO::Socket;
 use IO::Select;
 use Exporter;
 use Data::Dumper;
 use JSON;
-use File::Basename qw(dirname);
+use Compress::Zlib qw(uncompress);
+use MIME::Base64 qw(decode_base64);
+use File::Basename qw(basename dirname);
 use Cwd  qw(abs_path);
 use lib dirname(dirname abs_path $0) . 'var/task/';
 use consequence::VariationFeature;
@@ -78,14 +83,521 @@ my $config = {};
 my $fastaLocation =  $ENV{'REFERENCE_LOCATION'};
 my $spliceFile =  $ENV{'SPLICE_REFERENCE'};
 my $mirnaFile =  $ENV{'MIRNA_REFERENCE'};
+# 'fasta' or '2bit', see sequence_references
+my $referenceSequenceFormat = $ENV{'REFERENCE_SEQUENCE_FORMAT'} || 'fasta';
 my $outputLocation =  $ENV{'SVEP_REGIONS'};
-my $tempLocation =  $ENV{'SVEP_TEMP'};
+my $jobTrackerTable = $ENV{'JOB_TRACKER_TABLE'};
+my $concatTopicArn = $ENV{'CONCAT_SNS_TOPIC_ARN'};
+# Layout shared with annotation_cache.AnnotationCache
+my $annotationCache = $ENV{'ANNOTATION_CACHE'};
+my $annotationCacheReference = $ENV{'ANNOTATION_CACHE_REFERENCE'} || '';
+my $annotationCacheBinSize = 1000000;
+
+# References are kept in /tmp across warm invocations, using the same
+# layout and .meta files as lambda_utils.ReferenceCache.
+my $cacheDir = '/tmp/reference_cache';
+my $cacheBudget = ($ENV{'REFERENCE_CACHE_MB'} || 400) * 1024 * 1024;
+my $revalidateSeconds = 300;
+my ($referenceBucket, $referencePrefix) = $fastaLocation =~ m{^s3://([^/]+)/?(.*)$};
+# Local paths of the references fetched for the current batch, which
+# fetching the others can't evict.
+my %pinnedReferences;
+
+sub read_cache_meta {
+    my ($path) = @_;
+    open(my $fh, '<', "$path.meta") or return;
+    my $meta = eval { decode_json(do { local $/; <$fh> }) };
+    close $fh;
+    return $meta;
+}
+
+sub write_cache_meta {
+    my ($path, $meta) = @_;
+    open(my $fh, '>', "$path.meta") or die "Could not write '$path.meta' $!";
+    print $fh encode_json($meta);
+    close $fh;
+}
+
+sub head_reference {
+    my ($key) = @_;
+    my $output = `/usr/bin/aws s3api head-object --bucket $referenceBucket --key $key`;
+    return if $? != 0;
+    return decode_json($output);
+}
+
+sub evict_references {
+    my ($incomingSize, $incomingPath) = @_;
+    my @entries;
+    my $totalSize = 0;
+    return unless -d $cacheDir;
+    find(sub {
+      return unless /\.meta$/;
+      my $path = $File::Find::name;
+      $path =~ s/\.meta$//;
+      return if $path eq $incomingPath || !-e $path;
+      my $meta = read_cache_meta($path) or return;
+      $totalSize += $meta->{'size'};
+      push @entries, [$meta->{'lastUsed'}, $meta->{'size'}, $path] unless $pinnedReferences{$path};
+    }, $cacheDir);
+    foreach my $entry (sort { $a->[0] <=> $b->[0] } @entries) {
+      last if $totalSize + $incomingSize <= $cacheBudget;
+      print("Evicting $entry->[2] from the reference cache\n");
+      close_2bit($entry->[2]);
+      unlink $entry->[2], "$entry->[2].meta";
+      $totalSize -= $entry->[1];
+    }
+}
+
+# Return the local path of a reference file, downloading it unless an
+# unchanged copy is already cached. Each file is only checked once per
+# batch.
+sub fetch_reference {
+    my ($name) = @_;
+    my $key = $referencePrefix.$name;
+    my $path = "$cacheDir/$referenceBucket/$key";
+    return $path if $pinnedReferences{$path};
+    my $meta = read_cache_meta($path);
+    my $now = time();
+    my $head;
+    my $cached = $meta && -e $path && -s $path == $meta->{'size'};
+    if ($cached && $now - $meta->{'validated'} > $revalidateSeconds) {
+      $head = head_reference($key);
+      $cached = $head && $head->{'ETag'} eq $meta->{'etag'};
+      $meta->{'validated'} = $now;
+    }
+    if ($cached) {
+      $meta->{'lastUsed'} = $now;
+      write_cache_meta($path, $meta);
+      $pinnedReferences{$path} = 1;
+      return $path;
+    }
+    $head ||= head_reference($key) or die "Could not find s3://$referenceBucket/$key\n";
+    evict_references($head->{'ContentLength'}, $path);
+    mkpath(dirname($path));
+    my $partPath = "$path.part";
+    print("Downloading s3://$referenceBucket/$key\n");
+    system("/usr/bin/aws s3 cp s3://$referenceBucket/$key $partPath --quiet") == 0
+      or die "Could not download s3://$referenceBucket/$key\n";
+    my $etag = $head->{'ETag'};
+    $etag =~ s/"//g;
+    if (-s $partPath != $head->{'ContentLength'}) {
+      unlink $partPath;
+      die "Downloaded size of $key does not match\n";
+    }
+    if ($etag !~ /-/) {
+      # Multipart ETags aren't a plain MD5 of the content
+      open(my $fh, '<:raw', $partPath) or die "Could not open '$partPath' $!";
+      my $md5 = Digest::MD5->new->addfile($fh)->hexdigest;
+      close $fh;
+      if ($md5 ne $etag) {
+        unlink $partPath;
+        die "Checksum of $key does not match its ETag\n";
+      }
+    }
+    close_2bit($path);
+    rename($partPath, $path) or die "Could not move '$partPath' $!";
+    write_cache_meta($path, {
+      etag => $head->{'ETag'},
+      size => $head->{'ContentLength'} + 0,
+      validated => $now,
+      lastUsed => $now,
+    });
+    $pinnedReferences{$path} = 1;
+    return $path;
+}
+
+# Chromosome sequences are read from .2bit files built with
+# reference_sequence.build_2bit when REFERENCE_SEQUENCE_FORMAT is 2bit,
+# falling back to samtools faidx on the gzipped FASTA of chromosomes
+# without one.
+my $twoBitSignature = 0x1A412743;
+my @twoBitByteBases = map {
+    my $byte = $_;
+    join('', map { substr('TCAG', ($byte >> $_) & 3, 1) } (6, 4, 2, 0));
+} 0 .. 255;
+my %twoBitFiles;
+my %twoBitMissing;
+
+sub reference_fasta {
+    my ($chr) = @_;
+    return 'Homo_sapiens.GRCh38.dna.chromosome.'.$chr.'.fa.gz';
+}
+
+sub reference_2bit {
+    my ($chr) = @_;
+    return 'Homo_sapiens.GRCh38.dna.chromosome.'.$chr.'.2bit';
+}
+
+sub use_2bit {
+    my ($chr) = @_;
+    return 0 if $referenceSequenceFormat ne '2bit' || $twoBitMissing{$chr};
+    return 1 if eval { fetch_reference(reference_2bit($chr)); 1 };
+    print("No .2bit reference for $chr, using the FASTA\n");
+    $twoBitMissing{$chr} = 1;
+    return 0;
+}
+
+# Return the names of the files needed to read the sequence of $chr
+sub sequence_references {
+    my ($chr) = @_;
+    return (reference_2bit($chr)) if use_2bit($chr);
+    my $fasta = reference_fasta($chr);
+    return ($fasta, "$fasta.fai", "$fasta.gzi");
+}
+
+sub read_2bit_ints {
+    my ($file, $count) = @_;
+    return () unless $count;
+    read($file->{'fh'}, my $bytes, 4 * $count) == 4 * $count
+      or die "Truncated .2bit file $file->{'path'}\n";
+    return unpack("$file->{'int'}$count", $bytes);
+}
+
+# Open a .2bit file and read its sequence index, reusing the handle
+# while the file hasn't been replaced.
+sub open_2bit {
+    my ($path) = @_;
+    my $inode = (stat $path)[1];
+    my $file = $twoBitFiles{$path};
+    return $file if $file && $file->{'inode'} == $inode;
+    open(my $fh, '<:raw', $path) or die "Could not open '$path' $!";
+    $file = {path => $path, fh => $fh, inode => $inode, records => {}};
+    read($fh, my $header, 16) == 16 or die "Truncated .2bit file $path\n";
+    foreach my $int ('V', 'N') {
+      $file->{'int'} = $int if unpack($int, $header) == $twoBitSignature;
+    }
+    die "$path is not a .2bit file\n" unless $file->{'int'};
+    my (undef, $version, $count) = unpack("$file->{'int'}3", $header);
+    die "Unsupported .2bit version $version\n" if $version != 0;
+    foreach (1 .. $count) {
+      read($fh, my $nameSize, 1);
+      read($fh, my $name, unpack('C', $nameSize));
+      ($file->{'offsets'}{$name}) = read_2bit_ints($file, 1);
+    }
+    $twoBitFiles{$path} = $file;
+    return $file;
+}
+
+# Close a .2bit file that is being evicted or replaced, so that its
+# space is freed and it isn't read after it changes.
+sub close_2bit {
+    my ($path) = @_;
+    my $file = delete $twoBitFiles{$path} or return;
+    close $file->{'fh'};
+}
+
+sub read_2bit_record {
+    my ($file, $chr) = @_;
+    my $offset = $file->{'offsets'}{$chr};
+    die "$chr is not in $file->{'path'}\n" unless defined $offset;
+    seek($file->{'fh'}, $offset, 0);
+    my ($dnaSize, $nCount) = read_2bit_ints($file, 2);
+    my @nStarts = read_2bit_ints($file, $nCount);
+    my @nSizes = read_2bit_ints($file, $nCount);
+    my ($maskCount) = read_2bit_ints($file, 1);
+    my @maskStarts = read_2bit_ints($file, $maskCount);
+    my @maskSizes = read_2bit_ints($file, $maskCount);
+    # Skip the reserved word
+    return {
+      dnaSize => $dnaSize,
+      nBlocks => [\@nStarts, \@nSizes],
+      maskBlocks => [\@maskStarts, \@maskSizes],
+      dnaOffset => tell($file->{'fh'}) + 4,
+    };
+}
+
+# Apply $replace to the parts of $seq, which starts at 0-based $start,
+# covered by sorted blocks of 0-based starts and sizes.
+sub apply_2bit_blocks {
+    my ($seq, $start, $blocks, $replace) = @_;
+    my ($starts, $sizes) = @{$blocks};
+    my $end = $start + length($$seq);
+    my ($low, $high) = (0, scalar @{$starts});
+    while ($low < $high) {
+      my $mid = int(($low + $high) / 2);
+      if ($starts->[$mid] <= $start) {
+        $low = $mid + 1;
+      } else {
+        $high = $mid;
+      }
+    }
+    for (my $i = max($low - 1, 0); $i < @{$starts} && $starts->[$i] < $end; $i++) {
+      my $blockStart = max($starts->[$i], $start);
+      my $blockEnd = min($starts->[$i] + $sizes->[$i], $end);
+      next if $blockStart >= $blockEnd;
+      my $length = $blockEnd - $blockStart;
+      substr($$seq, $blockStart - $start, $length) = $replace->(substr($$seq, $blockStart - $start, $length));
+    }
+}
+
+# Return the sequence of $chr from 1-based $start to $end inclusive, as
+# reference_sequence.ReferenceSequence.fetch does.
+sub read_2bit {
+    my ($path, $chr, $start, $end) = @_;
+    my $file = open_2bit($path);
+    my $record = $file->{'records'}{$chr} ||= read_2bit_record($file, $chr);
+    $start = max($start - 1, 0);
+    $end = min($end, $record->{'dnaSize'});
+    return '' if $start >= $end;
+    my $firstByte = int($start / 4);
+    my $byteCount = int(($end + 3) / 4) - $firstByte;
+    seek($file->{'fh'}, $record->{'dnaOffset'} + $firstByte, 0);
+    read($file->{'fh'}, my $packed, $byteCount) == $byteCount
+      or die "Truncated .2bit file $path\n";
+    my $seq = substr(join('', @twoBitByteBases[unpack('C*', $packed)]),
+                     $start - 4 * $firstByte, $end - $start);
+    apply_2bit_blocks(\$seq, $start, $record->{'nBlocks'}, sub { 'N' x length($_[0]) });
+    apply_2bit_blocks(\$seq, $start, $record->{'maskBlocks'}, sub { lc $_[0] });
+    return $seq;
+}
+
+sub fetch_sequence {
+    my ($chr, $start, $end) = @_;
+    if (use_2bit($chr)) {
+      return read_2bit(fetch_reference(reference_2bit($chr)), $chr, $start, $end);
+    }
+    my $file = fetch_reference(reference_fasta($chr));
+    my @result = `./samtools faidx $file $chr:$start-$end`;
+    shift @result;
+    my $seq = join "", @result;
+    $seq =~ s/[\r\n]+//g;
+    return $seq;
+}
+
+# Decode a message encoded by lambda_utils.encode_message, fetching it
+# first if it was checked in to S3.
+sub decode_message {
+    my ($body) = @_;
+    my $message;
+    if ($body =~ s/^svep:(\d+)://) {
+      die "Unsupported message version $1\n" if $1 != 1;
+      $message = decode_json(uncompress(decode_base64($body)));
+      my $columns = $message->{'snsData'};
+      # Packed into columns, rather than a list of records
+      if (ref $columns eq 'HASH') {
+        my ($chroms, $lines) = ($columns->{'chroms'}, $columns->{'lines'});
+        $message->{'snsData'} = [map {
+          +{
+            chrom => $chroms->[$columns->{'chrom'}[$_]],
+            pos => "$columns->{'pos'}[$_]",
+            ref => $columns->{'ref'}[$_],
+            alt => $columns->{'alt'}[$_],
+            data => [map { $lines->[$_] } @{$columns->{'data'}[$_]}],
+          }
+        } 0 .. $#{$columns->{'pos'}}];
+      }
+    } else {
+      $message = decode_json($body);
+    }
+    if (my $claimCheck = $message->{'claimCheck'}) {
+      my $location = "s3://$claimCheck->{'bucket'}/$claimCheck->{'key'}";
+      print("Fetching message from $location\n");
+      my $checkedBody = `/usr/bin/aws s3 cp $location - --quiet`;
+      die "Could not fetch message from $location\n" if $? != 0;
+      return decode_message($checkedBody);
+    }
+    return $message;
+}
+
+# Decrement the outstanding task count of the job, the first time the
+# task completes, and trigger concat if no tasks are left, as
+# lambda_utils.Orchestrator.mark_completed does.
+sub complete_task {
+    my ($tempFileName) = @_;
+    my ($jobId) = split(/_/, $tempFileName, 2);
+    my $key = encode_json({jobId => {S => $jobId}});
+    my $expires = {N => '' . (time() + 7 * 24 * 60 * 60)};
+    my $transactItems = encode_json([
+      {
+        Put => {
+          TableName => $jobTrackerTable,
+          Item => {
+            jobId => {S => "$jobId#$tempFileName"},
+            expiresAt => $expires,
+          },
+          ConditionExpression => 'attribute_not_exists(jobId)',
+        },
+      },
+      {
+        Update => {
+          TableName => $jobTrackerTable,
+          Key => {jobId => {S => $jobId}},
+          UpdateExpression => 'ADD outstanding :delta SET expiresAt = :expires',
+          ExpressionAttributeValues => {
+            ':delta' => {N => '-1'},
+            ':expires' => $expires,
+          },
+        },
+      },
+    ]);
+    print("Completing task: $tempFileName\n");
+    my $error = `/usr/bin/aws dynamodb transact-write-items --transact-items '$transactItems' 2>&1`;
+    if ($? != 0) {
+      die "Could not complete task $tempFileName: $error\n"
+        if $error !~ /ConditionalCheckFailed/;
+      print("$tempFileName was already counted for $jobId\n");
+    }
+    my $output = `/usr/bin/aws dynamodb get-item --table-name $jobTrackerTable --key '$key' --consistent-read`;
+    die "Could not read the task count of $jobId\n" if $? != 0;
+    my $remaining = decode_json($output)->{'Item'}{'outstanding'}{'N'} // 0;
+    print("$remaining tasks remaining for $jobId\n");
+    return if $remaining != 0;
+    `/usr/bin/aws dynamodb update-item --table-name $jobTrackerTable --key '$key' --update-expression 'SET concatTriggered = :claimed' --condition-expression 'attribute_not_exists(concatTriggered)' --expression-attribute-values '{":claimed":{"BOOL":true}}' 2>&1`;
+    if ($? != 0) {
+      print("Concat was already triggered for $jobId\n");
+      return;
+    }
+    my $concatMessage = encode_json({APIid => $jobId});
+    system("/usr/bin/aws sns publish --topic-arn $concatTopicArn --message '$concatMessage'") == 0
+      or die "Could not trigger concat for $jobId\n";
+}
+
+# Add the rows written for each variant to the annotation cache, as
+# annotation_cache.AnnotationCache.store_rows does.
+sub store_cached_rows {
+    my ($fragmentName, @variantRows) = @_;
+    return unless $annotationCache;
+    (my $cacheLocation = $annotationCache) =~ s{/*$}{/};
+    my %fragments;
+    foreach my $variantRow (@variantRows) {
+      my ($chrom, $pos) = @{$variantRow};
+      my $bin = int($pos / $annotationCacheBinSize);
+      push @{$fragments{"$chrom/$bin"}}, $variantRow;
+    }
+    foreach my $shard (keys %fragments) {
+      my $filename = "/tmp/$fragmentName.json";
+      open(my $fh, '>', $filename) or die "Could not open file '$filename' $!";
+      print $fh encode_json($fragments{$shard});
+      close $fh;
+      my $key = "v1/$annotationCacheReference/pluginConsequence/$shard/$fragmentName.json";
+      system("/usr/bin/aws", "s3", "cp", $filename, "$cacheLocation$key", "--quiet") == 0
+        or print("Could not add rows to the annotation cache\n");
+      unlink $filename;
+    }
+}
+
+# Results are written as shards of rows in genomic order, named as
+# sorted_results.get_shard_key names them.
+my @positionChromosomes = (1..22, 'X', 'Y', 'MT');
+my %positionChromosomeIndexes = map { $positionChromosomes[$_] => $_ } 0..$#positionChromosomes;
+my %positionChromosomeAliases = ('M' => 'MT', 'x' => 'X', 'y' => 'Y');
+my %chromosomeIndexes;
+
+# As chrom_matching.get_chromosome_index
+sub chromosome_index {
+    my $name = shift;
+    unless (exists $chromosomeIndexes{$name}) {
+      my $index = scalar @positionChromosomes;
+      foreach my $i (0..length($name) - 1) {
+        my $chrom = substr($name, $i);
+        $chrom = $positionChromosomeAliases{$chrom} if exists $positionChromosomeAliases{$chrom};
+        if (exists $positionChromosomeIndexes{$chrom}) {
+          $index = $positionChromosomeIndexes{$chrom};
+          last;
+        }
+      }
+      $chromosomeIndexes{$name} = $index;
+    }
+    return $chromosomeIndexes{$name};
+}
+
+sub row_position {
+    my ($chrom, $start) = (split(/\t/, shift, 4))[2] =~ /^(.*):(\d+)/;
+    return sprintf('%02d_%010d', chromosome_index($chrom), $start);
+}
+
+sub sort_rows {
+    my @lines = grep { length } map { split(/\n/) } @_;
+    return map { $_->[1] }
+           sort { $a->[0] cmp $b->[0] }
+           map { [row_position($_), $_] } @lines;
+}
+
+sub shard_key {
+    my ($tempFileName, @lines) = @_;
+    my ($jobId) = split(/_/, $tempFileName);
+    return "$jobId/".row_position($lines[0]).'-'.row_position($lines[-1])."/$tempFileName.tsv";
+}
+
+# Splice reference lines around the variants of a batch, loaded with
+# one tabix call instead of one per variant.
+my $spliceFlank = 8;
+my %spliceWindows;
+
+sub preload_splice_windows {
+    my (@variants) = @_;
+    %spliceWindows = ();
+    my %chromPositions;
+    push @{$chromPositions{$_->[0]}}, $_->[1] for @variants;
+    my @regions;
+    foreach my $chr (sort keys %chromPositions) {
+      my @windows;
+      foreach my $pos (sort { $a <=> $b } @{$chromPositions{$chr}}) {
+        # parse_vcf moves the start of indels a base to the right
+        my ($from, $to) = ($pos - $spliceFlank, $pos + 1 + $spliceFlank);
+        if (@windows && $from <= $windows[-1]{'to'} + 1) {
+          $windows[-1]{'to'} = $to;
+        } else {
+          push @windows, {from => $from, to => $to, lines => []};
+        }
+      }
+      $spliceWindows{$chr} = \@windows;
+      push @regions, map { "$chr:".max($_->{'from'}, 1)."-$_->{'to'}" } @windows;
+    }
+    return unless @regions;
+    my $file = fetch_reference($spliceFile);
+    my %seen;
+    # Features overlapping several windows are returned for each of them
+    my @lines = grep { !$seen{$_}++ } split /\n/, `./tabix $file @regions`;
+    die "Could not query $file\n" if $? != 0;
+    foreach my $line (@lines) {
+      my ($chr, undef, undef, $start, $end) = split /\t/, $line;
+      my $windows = $spliceWindows{$chr} or next;
+      for (my $i = find_window($windows, $start); $i < @{$windows} && $windows->[$i]{'from'} <= $end; $i++) {
+        push @{$windows->[$i]{'lines'}}, $line;
+      }
+    }
+    print(scalar(@lines)." splice features in ".scalar(@regions)." windows\n");
+}
+
+# Index of the first window not ending before $pos
+sub find_window {
+    my ($windows, $pos) = @_;
+    my ($low, $high) = (0, scalar @{$windows});
+    while ($low < $high) {
+      my $mid = int(($low + $high) / 2);
+      if ($windows->[$mid]{'to'} < $pos) {
+        $low = $mid + 1;
+      } else {
+        $high = $mid;
+      }
+    }
+    return $low;
+}
+
+# Return the splice reference lines within $spliceFlank of $start, as
+# tabix would.
+sub splice_lines {
+    my ($chr, $start) = @_;
+    my ($from, $to) = ($start - $spliceFlank, $start + $spliceFlank);
+    my $windows = $spliceWindows{$chr} || [];
+    my $window = $windows->[find_window($windows, $to)];
+    if ($window && $window->{'from'} <= $from) {
+      return join('', map { "$_\n" } grep {
+        my (undef, undef, undef, $lineStart, $lineEnd) = split /\t/, $_;
+        $lineStart <= $to && $lineEnd >= $from;
+      } @{$window->{'lines'}});
+    }
+    my $file = fetch_reference($spliceFile);
+    return `./tabix $file $chr:$from-$to`;
+}
+
 sub handle {
     my ($payload) = @_;
     my $event = decode_json($payload);
     my $sns = $event->{Records}[0]{Sns};
     ##########################################update
-    my $message = decode_json($sns->{'Message'}); #might have to remove decode_json
+    my $message = decode_message($sns->{'Message'});
     my @data = $message->{'snsData'};
     my $tempFileName = $message->{'tempFileName'};
     print("tempFileName is - $tempFileName\n");
@@ -94,40 +606,44 @@ sub handle {
     #print Dumper @data;
     my $chr = $data[0][0]->{'chrom'};
     #print($chr);
-    my $fasta ='Homo_sapiens.GRCh38.dna.chromosome.'.$chr.'.fa.gz';
-    system("/usr/bin/aws s3 cp $fastaLocation /tmp/ --recursive  --exclude '*'  --include '$fasta*'");
-    system("/usr/bin/aws s3 cp $fastaLocation /tmp/ --recursive  --exclude '*'  --include '$spliceFile*'");
+    %pinnedReferences = ();
+    fetch_reference($_) for (sequence_references($chr), $spliceFile, "$spliceFile.tbi");
+    preload_splice_windows(map { [$_->{'chrom'}, $_->{'pos'}] }
+                           grep { $_->{'data'}[0] ne '' } @{$data[0]});
     my @results;
+    my @variantRows;
     while(@data){
       my $region = shift @data;
       foreach my $line (@{$region}){
+        my $variant = [$line->{'chrom'}, "$line->{'pos'}", $line->{'ref'}, $line->{'alt'}];
         if ( scalar(@{$line->{'data'}}) == 1 && @{$line->{'data'}}[0] eq ''){
+          push @variantRows, [@{$variant}, ''];
           next;
         }
         my $vep = parse_vcf($line);
-        if(length $vep){
+        if(defined $vep && length $vep){
           push @results,$vep;
         }
+        push @variantRows, [@{$variant}, $vep // ''];
       }
     }
-    if(scalar @results) {
+    my @lines = sort_rows(@results);
+    if(scalar @lines) {
       #my $filename = "/tmp/test.tsv";
       my $filename = "/tmp/".$tempFileName.".tsv";
       open(my $fh, '>', $filename) or die "Could not open file '$filename' $!";
-      print $fh join("\n", @results);
+      print $fh join("\n", @lines);
       close $fh;
 
-      my $out = 's3://'.$outputLocation.'/';
+      my $out = 's3://'.$outputLocation.'/'.shard_key($tempFileName, @lines);
       system("/usr/bin/aws s3 cp $filename $out");
-      #print("Done Copying");
-      my $tempOut = 's3://'.$tempLocation.'/'.$tempFileName;
-      system("/usr/bin/aws s3 rm $tempOut");
-      print("cleaning tmp");
-      system("rm -r /tmp/*"); #cleaning tmp after each use
+      unlink $filename;
       print("Done Copying");
     } else {
       print("Nothing to copy")
     }
+    store_cached_rows($tempFileName, @variantRows);
+    complete_task($tempFileName);
 }
 
 # parse a line of VCF input into a variation feature object
@@ -291,12 +807,7 @@ sub parse_vcf {
       }
 
       if( !$intron_result ){
-        my $file = "/tmp/".$spliceFile;
-        my $intronStart = $start - 8;
-        my $intronEnd = $start + 8;
-        my $location = $chr.":".$intronStart."-".$intronEnd;
-        $intron_result =  `./tabix $file $location`;
-        #print("\n Intron result = $intron_result")
+        $intron_result = splice_lines($chr, $start);
       }
 
       if(exists($info{'exon'})){
@@ -318,13 +829,7 @@ sub parse_vcf {
         my $intron_boundary = 0;
         my $splice_region_variant =0;
         if(exists($info{'CDS'})){
-          my $location = $chr.':'.$info{'CDS_start'}.'-'.$info{'CDS_end'};
-          my $fasta ='Homo_sapiens.GRCh38.dna.chromosome.'.$chr.'.fa.gz';
-          my $file = '/tmp/'.$fasta;
-          my @result = `./samtools faidx $file $location`;
-          shift @result;
-          $seq = join "", @result;
-          $seq =~ s/[\r\n]+//g;
+          $seq = fetch_sequence($chr, $info{'CDS_start'}, $info{'CDS_end'});
           $length = ($info{'CDS_end'}-$info{'CDS_start'},$info{'CDS_start'}-$info{'CDS_end'})[$info{'CDS_end'}-$info{'CDS_start'} < $info{'CDS_start'}-$info{'CDS_end'}];
 
           for my $tran (split /[\r\n]+/, $intron_result){
@@ -460,16 +965,12 @@ sub parse_vcf {
           });
         }
 
-        my $mirnaLocalFile = "/tmp/".$mirnaFile;
-        unless (-e $mirnaLocalFile) {
-          print "File Doesn't Exist in local directory!";
-          system("/usr/bin/aws s3 cp $fastaLocation /tmp/ --recursive  --exclude '*'  --include '$mirnaFile*'");
-        }
         if($rows[1] eq "mirbase"){
-          my $file = "sorted_filtered_mirna.gff3.gz";
+          fetch_reference("$mirnaFile.tbi");
+          my $file = fetch_reference($mirnaFile);
           #my $intron_loc = $start;
           my $location = "chr".$chr.":".$start."-".$start;
-          my $mirna_result =  `tabix $file $location`; # change this for svep
+          my $mirna_result =  `./tabix $file $location`;
           if(length $mirna_result){
             $tr->{within_mirna} = 1;
           }else{
@@ -645,4 +1146,57 @@ sub vf_to_consequences {
 
 
 
+# Handle invocations from the Lambda runtime API in a single long-lived
+# process, so modules are compiled and reference handles opened once per
+# container rather than once per event. Used by docker/bootstrap.
+sub run_worker {
+    $| = 1;
+    if (my $queueDir = $ENV{'LOCAL_QUEUE_DIR'}) {
+      run_local_queue($queueDir);
+      return;
+    }
+    my $runtimeApi = "http://$ENV{'AWS_LAMBDA_RUNTIME_API'}/2018-06-01/runtime";
+    # Waiting for the next invocation can take arbitrarily long
+    my $http = HTTP::Tiny->new(timeout => 24 * 60 * 60);
+    while (1) {
+      my $next = $http->get("$runtimeApi/invocation/next");
+      die "Could not get the next invocation: $next->{'status'} $next->{'content'}\n"
+        unless $next->{'success'};
+      my $requestId = $next->{'headers'}{'lambda-runtime-aws-request-id'};
+      my $response;
+      if (eval { $response = handle($next->{'content'}); 1 }) {
+        $http->post("$runtimeApi/invocation/$requestId/response", {
+          content => $response // '',
+        });
+      } else {
+        my $error = $@;
+        print("Error handling $requestId: $error");
+        $http->post("$runtimeApi/invocation/$requestId/error", {
+          headers => {'Content-Type' => 'application/json'},
+          content => encode_json({
+            errorMessage => "$error",
+            errorType => 'HandlerError',
+          }),
+        });
+      }
+    }
+}
+
+# Handle the events in the .json files of $queueDir in name order, moving
+# each to done/ or failed/, until none are left. For running the plugin
+# locally, e.g. LOCAL_QUEUE_DIR=/tmp/events perl -MVEP -e 'VEP::run_worker()'
+sub run_local_queue {
+    my ($queueDir) = @_;
+    mkpath(["$queueDir/done", "$queueDir/failed"]);
+    while (my ($eventPath) = sort glob("$queueDir/*.json")) {
+      open(my $fh, '<', $eventPath) or die "Could not open '$eventPath' $!";
+      my $payload = do { local $/; <$fh> };
+      close $fh;
+      my $outcome = eval { handle($payload); 1 } ? 'done' : 'failed';
+      print("Error handling $eventPath: $@") if $outcome eq 'failed';
+      rename($eventPath, "$queueDir/$outcome/".basename($eventPath))
+        or die "Could not move '$eventPath' $!";
+    }
+}
+
 1;
@@ -0,0 +1 @@
+../../shared_resources/annotation_cache.py
\ No newline at end of file
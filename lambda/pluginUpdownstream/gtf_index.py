@@ -0,0 +1 @@
+../../shared_resources/gtf_index.py
\ No newline at end of file
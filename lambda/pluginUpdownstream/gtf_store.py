@@ -0,0 +1 @@
+../../shared_resources/gtf_store.py
\ No newline at end of file
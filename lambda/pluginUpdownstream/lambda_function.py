@@ -1,22 +1,34 @@
 import os
-import re
-import shlex
-import subprocess
 
-from lambda_utils import download_vcf, Orchestrator, s3
+from annotation_cache import annotation_cache
+from gtf_index import (get_transcript_id, parse_attributes, sweep_overlaps,
+                       tabix_lines)
+from gtf_store import GtfStore
+from lambda_utils import download_vcf, Orchestrator, reference_cache, s3
+from sorted_results import get_shard_key, sort_rows
 
 
 # Environment variables
 REFERENCE_GENOME = os.environ['REFERENCE_GENOME']
+REFERENCE_STORE = os.environ.get('REFERENCE_STORE')
 SVEP_REGIONS = os.environ['SVEP_REGIONS']
 os.environ['PATH'] += f':{os.environ["LAMBDA_TASK_ROOT"]}'
 
 BUCKET_NAME = 'svep'
-TRANSCRIPT_ID_PATTERN = re.compile('transcript_id\\s\\\"(\\w+)\\\";',
-                                   re.IGNORECASE)
+PLUGIN_NAME = 'pluginUpdownstream'
+# Bases either side of a variant searched for nearby transcripts
+WINDOW_SIZE = 5000
+# Overlapping windows are merged into a single tabix query spanning at
+# most this many bases.
+MAX_MERGED_SPAN = 1000000
 
 # Download reference genome and index
-download_vcf(BUCKET_NAME, REFERENCE_GENOME)
+if REFERENCE_STORE:
+    GTF_STORE = GtfStore(reference_cache.fetch(BUCKET_NAME, REFERENCE_STORE,
+                                               keep=True))
+else:
+    GTF_STORE = None
+    LOCAL_REFERENCE = download_vcf(BUCKET_NAME, REFERENCE_GENOME, keep=True)
 
 
 def get_stream_direction(pos, metadata):
@@ -36,91 +48,103 @@ def get_stream_direction(pos, metadata):
     return 'up' if positive_strand == before else 'down'
 
 
-def query_updownstream(chrom, pos, alt, transcripts):
-    up = int(pos) - 5000
-    down = int(pos) + 5000
+def get_windows(variants):
+    """Return the GTF lines within WINDOW_SIZE of each (chrom, pos)
+    variant, with one tabix query for each run of overlapping windows."""
+    if GTF_STORE is not None:
+        return [
+            GTF_STORE.overlaps(chrom, int(pos) - WINDOW_SIZE,
+                               int(pos) + WINDOW_SIZE)
+            for chrom, pos in variants
+        ]
+    chrom_indexes = {}
+    for i, (chrom, _) in enumerate(variants):
+        chrom_indexes.setdefault(chrom, []).append(i)
+    windows = [None] * len(variants)
+    for chrom, indexes in chrom_indexes.items():
+        intervals = {
+            i: (int(variants[i][1]) - WINDOW_SIZE,
+                int(variants[i][1]) + WINDOW_SIZE)
+            for i in indexes
+        }
+        merged = []
+        for i in sorted(indexes, key=lambda i: intervals[i]):
+            start, end = intervals[i]
+            if (merged and start <= merged[-1][1] + 1
+                    and end - merged[-1][0] <= MAX_MERGED_SPAN):
+                merged[-1][1] = end
+                merged[-1][2].append(i)
+            else:
+                merged.append([start, end, [i]])
+        print(f"Querying {len(merged)} windows for {len(indexes)} variants"
+              f" on {chrom}")
+        for start, end, merged_indexes in merged:
+            lines = tabix_lines(LOCAL_REFERENCE,
+                                f'{chrom}:{max(start, 1)}-{end}')
+            merged_windows = sweep_overlaps(
+                [intervals[i] for i in merged_indexes], lines)
+            for i, window in zip(merged_indexes, merged_windows):
+                windows[i] = window
+    return windows
+
+
+def query_updownstream(chrom, pos, alt, transcripts, main_data):
     results = []
-    loc = f'{chrom}:{up}-{down}'
-    local_file = f'/tmp/{REFERENCE_GENOME}'
-    args = [
-        'tabix',
-        local_file,
-        loc,
-    ]
-    query_process = subprocess.Popen(args, stdout=subprocess.PIPE,
-                                     stderr=subprocess.PIPE, cwd='/tmp',
-                                     encoding='ascii')
-    main_data = query_process.stdout.read().rstrip('\n').split('\n')
     for data in main_data:
-        if TRANSCRIPT_ID_PATTERN.search(data).group(1) in transcripts:
-            continue
         metadata = data.split('\t')
-        info = dict(
-            strict_split(item)
-            for item in metadata[8].split("; ")
-        )
+        info = parse_attributes(metadata[8])
+        transcript_id = info.get('transcript_id', '.')
+        if transcript_id in transcripts:
+            continue
         stream_direction = get_stream_direction(pos, metadata)
-        transcript_id = info.get('transcript_id', '.').strip('"')
         if stream_direction is None:
             print(f"Couldn't classify - need to check -{transcript_id}")
             results.append('')
             continue
         support_level_set = 'transcript_support_level' in info
-        transcript_biotype = info.get('transcript_biotype', '.')
-        if not support_level_set:
-            transcript_biotype = transcript_biotype.rstrip(';')
-        transcript_version = info.get('transcript_version', '.').strip('"')
         fields = [
             '24',
             '.',
             f'{chrom}:{pos}-{pos}',
             alt,
             f'{stream_direction}stream_gene_variant',
-            info.get('gene_name', '.').strip('"'),
-            info.get('gene_id').strip('"'),
+            info.get('gene_name', '.'),
+            info['gene_id'],
             metadata[2],
-            f'{transcript_id}.{transcript_version}',
-            transcript_biotype.strip('"'),
+            f'{transcript_id}.{info.get("transcript_version", ".")}',
+            info.get('transcript_biotype', '.'),
             '-',
             '-',
             '-',
             metadata[6],
         ]
         if support_level_set:
-            fields.append(
-                info.get('transcript_support_level',
-                         '.').rstrip(';').strip('"'))
+            fields.append(info['transcript_support_level'])
         results.append('\t'.join(fields))
     return '\n'.join(results)
 
 
-def strict_split(item):
-    """Split a string into exactly two strings, or crash."""
-    split = shlex.split(item)
-    if len(split) != 2:
-        raise ValueError(f"Expected two values, got {len(split)} from {item}")
-    # Explicit tuple to appease IDE's typechecking
-    return split[0], split[1]
-
-
 def lambda_handler(event, _):
     orchestrator = Orchestrator(event)
     message = orchestrator.message
     sns_data = message['snsData']
     write_data = []
+    variant_rows = []
 
+    variant_transcripts = []
+    variant_intergenic_rows = []
     for row in sns_data:
         chrom = row['chrom']
         pos = row['pos']
         data = row['data']
         alt = row['alt']
         transcripts = []
-        results = []
+        rows = []
         for dat in data:
             if dat:
-                transcripts.append(TRANSCRIPT_ID_PATTERN.search(dat).group(1))
+                transcripts.append(get_transcript_id(dat))
             else:
-                write_data.append('\t'.join((
+                rows.append('\t'.join((
                         str(38),
                         '.',
                         f'{chrom}:{pos}-{pos}',
@@ -138,16 +162,43 @@ def lambda_handler(event, _):
                         '-',
                 )))
                 transcripts = []
-        if transcripts:
+        variant_transcripts.append(transcripts)
+        variant_intergenic_rows.append(rows)
+
+    queried = [
+        i for i, transcripts in enumerate(variant_transcripts)
+        if transcripts
+    ]
+    windows = dict(zip(queried, get_windows([
+        (sns_data[i]['chrom'], sns_data[i]['pos'])
+        for i in queried
+    ])))
+    for i, row in enumerate(sns_data):
+        chrom = row['chrom']
+        pos = row['pos']
+        alt = row['alt']
+        rows = variant_intergenic_rows[i]
+        results = []
+        if i in windows:
             results = query_updownstream(chrom, pos, alt,
-                                         list(set(transcripts)))
+                                         list(set(variant_transcripts[i])),
+                                         windows[i])
         if results:
-            write_data.append(results)
+            rows.append(results)
+        write_data += rows
+        variant_rows.append(((chrom, pos, row['ref'], alt), '\n'.join(rows)))
     base_filename = orchestrator.temp_file_name
-    filename = f'/tmp/{base_filename}.tsv'
-    with open(filename, 'w') as tsv_file:
-        tsv_file.write('\n'.join(write_data))
-    s3.Bucket(SVEP_REGIONS).upload_file(
-        filename, f'{base_filename}.tsv')
-    print("uploaded")
+    lines = sort_rows(write_data)
+    if lines:
+        filename = f'/tmp/{base_filename}.tsv'
+        with open(filename, 'w') as tsv_file:
+            tsv_file.write('\n'.join(lines))
+        s3.Bucket(SVEP_REGIONS).upload_file(
+            filename, get_shard_key(base_filename, lines))
+        os.remove(filename)
+        print("uploaded")
+    else:
+        print("Nothing to upload")
+    if annotation_cache is not None:
+        annotation_cache.store_rows(PLUGIN_NAME, base_filename, variant_rows)
     orchestrator.mark_completed()
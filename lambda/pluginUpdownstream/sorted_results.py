@@ -0,0 +1 @@
+../../shared_resources/sorted_results.py
\ No newline at end of file
@@ -0,0 +1 @@
+../../shared_resources/tabix_index.py
\ No newline at end of file
@@ -0,0 +1 @@
+../../shared_resources/annotation_pack.py
\ No newline at end of file
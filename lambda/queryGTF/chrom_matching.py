@@ -0,0 +1 @@
+../../shared_resources/chrom_matching.py
\ No newline at end of file
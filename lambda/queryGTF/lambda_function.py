@@ -1,15 +1,23 @@
-import json
 import os
-import subprocess
 
-from lambda_utils import download_vcf, Orchestrator, start_function, Timer
+from annotation_cache import annotation_cache
+from annotation_pack import AnnotationPack
+from chrom_matching import normalise_chromosome
+from gtf_index import GtfIndex, sweep_overlaps, tabix_lines
+from gtf_store import GtfStore
+from lambda_utils import (BatchPublisher, download_vcf, Orchestrator,
+                          reference_cache, s3, start_function, Timer)
+from sorted_results import get_shard_key, sort_rows
 
 
 # Environment variables
+ANNOTATION_PACK_KEY = os.environ.get('ANNOTATION_PACK')
 REFERENCE_GENOME = os.environ['REFERENCE_GENOME']
+REFERENCE_STORE = os.environ.get('REFERENCE_STORE')
 PLUGIN_CONSEQUENCE_SNS_TOPIC_ARN = os.environ['PLUGIN_CONSEQUENCE_SNS_TOPIC_ARN']
 PLUGIN_UPDOWNSTREAM_SNS_TOPIC_ARN = os.environ['PLUGIN_UPDOWNSTREAM_SNS_TOPIC_ARN']
 QUERY_GTF_SNS_TOPIC_ARN = os.environ['QUERY_GTF_SNS_TOPIC_ARN']
+SVEP_REGIONS = os.environ['SVEP_REGIONS']
 os.environ['PATH'] += f':{os.environ["LAMBDA_TASK_ROOT"]}'
 TOPICS = [
     PLUGIN_CONSEQUENCE_SNS_TOPIC_ARN,
@@ -18,61 +26,125 @@ TOPICS = [
 
 BUCKET_NAME = 'svep'
 MILLISECONDS_BEFORE_SPLIT = 4000
-PAYLOAD_SIZE = 260000
+# Variants sent to each plugin invocation
+PLUGIN_BATCH_SIZE = 2500
+# Batches spanning at most this many bases are joined against a single
+# tabix query of their span instead of loading the whole chromosome.
+SWEEP_MAX_SPAN = 1000000
 
 # Download reference genome and index
-download_vcf(BUCKET_NAME, REFERENCE_GENOME)
+if REFERENCE_STORE:
+    # There's no GTF to sweep with tabix, get_overlaps always uses the
+    # store
+    LOCAL_REFERENCE = None
+    GTF_INDEX = GtfStore(reference_cache.fetch(BUCKET_NAME, REFERENCE_STORE,
+                                               keep=True))
+else:
+    LOCAL_REFERENCE = download_vcf(BUCKET_NAME, REFERENCE_GENOME, keep=True)
+    GTF_INDEX = GtfIndex(LOCAL_REFERENCE)
+if ANNOTATION_PACK_KEY:
+    ANNOTATION_PACK = AnnotationPack(download_vcf(BUCKET_NAME,
+                                                  ANNOTATION_PACK_KEY,
+                                                  keep=True))
+else:
+    ANNOTATION_PACK = None
 
 
-def overlap_feature(all_coords, base_id, timer):
+def get_overlaps(all_coords):
+    chrom_indexes = {}
+    for idx, coord in enumerate(all_coords):
+        chrom = coord.split('\t', 1)[0]
+        chrom_indexes.setdefault(chrom, []).append(idx)
+    overlaps = [None] * len(all_coords)
+    for chrom, indexes in chrom_indexes.items():
+        positions = [int(all_coords[idx].split('\t', 2)[1])
+                     for idx in indexes]
+        start = min(positions)
+        end = max(positions)
+        if (LOCAL_REFERENCE is None or GTF_INDEX.is_loaded(chrom)
+                or end - start > SWEEP_MAX_SPAN):
+            chrom_overlaps = [
+                GTF_INDEX.overlaps(chrom, pos, pos)
+                for pos in positions
+            ]
+        else:
+            lines = tabix_lines(LOCAL_REFERENCE, f'{chrom}:{start}-{end}')
+            chrom_overlaps = sweep_overlaps(
+                [(pos, pos) for pos in positions], lines)
+        for idx, features in zip(indexes, chrom_overlaps):
+            overlaps[idx] = features
+    return overlaps
+
+
+def write_cached_results(coords, base_id):
+    """Write the results of variants found in the annotation pack or
+    cache, and return the coords of those that weren't."""
+    results = []
+    for name, source in (('annotation pack', ANNOTATION_PACK),
+                         ('annotation cache', annotation_cache)):
+        if source is None or not coords:
+            continue
+        cached_rows = source.lookup([coord.split('\t') for coord in coords])
+        uncached_coords = [
+            coord
+            for coord, rows in zip(coords, cached_rows)
+            if rows is None
+        ]
+        print(f"Found {len(coords) - len(uncached_coords)} of {len(coords)}"
+              f" variants in the {name}")
+        results += [rows for rows in cached_rows if rows]
+        coords = uncached_coords
+    lines = sort_rows(results)
+    if lines:
+        s3.Object(SVEP_REGIONS, get_shard_key(f'{base_id}_cached', lines)).put(
+            Body='\n'.join(lines).encode())
+    return coords
+
+
+def overlap_feature(all_coords, base_id, timer, publisher):
     results = []
-    tot_size = 0
     counter = 0
+    all_overlaps = get_overlaps(all_coords)
     for idx, coord in enumerate(all_coords):
+        if timer.out_of_time():
+            # should only be executed in very few cases.
+            if results:
+                counter += 1
+                send_data_to_plugins(base_id, counter, results, publisher)
+            send_data_to_self(base_id, all_coords[idx:], publisher)
+            return
         chrom, pos, ref, alt = coord.split('\t')
-        loc = f'{chrom}:{pos}-{pos}'
-        local_file = f'/tmp/{REFERENCE_GENOME}'
-        args = [
-            'tabix',
-            local_file,
-            loc
-        ]
-        query_process = subprocess.Popen(args, stdout=subprocess.PIPE,
-                                         stderr=subprocess.PIPE,
-                                         cwd='/tmp', encoding='ascii')
-        main_data = query_process.stdout.read().rstrip('\n').split('\n')
-        data = {
+        # Each batch is kept to one chromosome, see send_data_to_plugins
+        if results and results[-1]['chrom'] != chrom:
+            counter += 1
+            send_data_to_plugins(base_id, counter, results, publisher)
+            results = []
+        # An empty string marks a variant with no overlapping features
+        main_data = all_overlaps[idx] or ['']
+        results.append({
             'chrom': chrom,
             'pos': pos,
             'ref': ref,
             'alt': alt,
             'data': main_data,
-        }
-        cur_size = len(json.dumps(data, separators=(',', ':'))) + 1
-        tot_size += cur_size
-        if tot_size < PAYLOAD_SIZE:
-            results.append(data)
-            if timer.out_of_time():
-                # should only be executed in very few cases.
-                counter += 1
-
-                send_data_to_plugins(base_id, counter, results)
-                send_data_to_self(base_id, all_coords[idx:])
-                return
-        else:
+        })
+        if len(results) == PLUGIN_BATCH_SIZE:
             counter += 1
-            send_data_to_plugins(base_id, counter, results)
-            if timer.out_of_time():
-                send_data_to_self(base_id, all_coords[idx:])
-                return
-            else:
-                results = [data]
-                tot_size = cur_size
-    counter += 1
-    send_data_to_plugins(base_id, counter, results)
-
-
-def send_data_to_plugins(base_id, counter, results):
+            send_data_to_plugins(base_id, counter, results, publisher)
+            results = []
+    if results:
+        counter += 1
+        send_data_to_plugins(base_id, counter, results, publisher)
+
+
+def send_data_to_plugins(base_id, counter, results, publisher):
+    """Start the plugins on a batch of variants from one chromosome.
+
+    The batch is tagged with the chromosome, which the pluginConsequence
+    subscriptions filter on so that each chromosome goes to the same
+    functions and their cached reference sequence is reused.
+    """
+    chrom = results[0]['chrom']
     for topic in TOPICS:
         start_function(
             topic_arn=topic,
@@ -80,10 +152,14 @@ def send_data_to_plugins(base_id, counter, results):
             message={
                 'snsData': results,
             },
+            publisher=publisher,
+            attributes={
+                'chrom': normalise_chromosome(chrom) or chrom,
+            },
         )
 
 
-def send_data_to_self(base_id, remaining_coords):
+def send_data_to_self(base_id, remaining_coords, publisher):
     print("Less Time remaining - call itself.")
     start_function(
         topic_arn=QUERY_GTF_SNS_TOPIC_ARN,
@@ -92,6 +168,7 @@ def send_data_to_self(base_id, remaining_coords):
             'coords': remaining_coords,
         },
         resend=True,
+        publisher=publisher,
     )
 
 
@@ -101,5 +178,7 @@ def lambda_handler(event, context):
     timer = Timer(context, MILLISECONDS_BEFORE_SPLIT)
     coords = message['coords']
     base_id = orchestrator.temp_file_name
-    overlap_feature(coords, base_id, timer)
+    coords = write_cached_results(coords, base_id)
+    with BatchPublisher() as publisher:
+        overlap_feature(coords, base_id, timer, publisher)
     orchestrator.mark_completed()
@@ -1,98 +1,119 @@
 import os
 import subprocess
+import tempfile
 
-from lambda_utils import Orchestrator, start_function, Timer
+from lambda_utils import (BatchPublisher, Orchestrator, start_function, Timer,
+                          truncated_print)
 
 
 # Environment variables
 QUERY_GTF_SNS_TOPIC_ARN = os.environ['QUERY_GTF_SNS_TOPIC_ARN']
 QUERY_VCF_SNS_TOPIC_ARN = os.environ['QUERY_VCF_SNS_TOPIC_ARN']
-QUERY_VCF_SUBMIT_SNS_TOPIC_ARN = os.environ['QUERY_VCF_SUBMIT_SNS_TOPIC_ARN']
-SLICE_SIZE_MBP = int(os.environ['SLICE_SIZE_MBP'])
 os.environ['PATH'] += f':{os.environ["LAMBDA_TASK_ROOT"]}'
 
 MILLISECONDS_BEFORE_SPLIT = 15000
-MILLISECONDS_BEFORE_SECOND_SPLIT = 6000
-RECORDS_PER_SAMPLE = 700
-BATCH_CHUNK_SIZE = 10
-PAYLOAD_SIZE = 260000
+RECORDS_PER_SAMPLE = 5000
 
 
-def get_query_process(location, chrom, start, end):
+def get_query_process(location, region, stderr_file):
+    """stderr goes to a file rather than a pipe, as only stdout is read
+    while bcftools runs."""
     args = [
         'bcftools', 'query',
-        '--regions', f'{chrom}:{start}-{end}',
+        '--regions', region,
         '--format', '%CHROM\t%POS\t%REF\t%ALT\n',
         location
     ]
     return subprocess.Popen(args, stdout=subprocess.PIPE,
-                            stderr=subprocess.PIPE, cwd='/tmp',
+                            stderr=stderr_file, cwd='/tmp',
                             encoding='ascii')
 
 
-def submit_query_gtf(query_process, base_id, timer):
-    regions_list = query_process.stdout.read().splitlines()
-    total_coords = [
-        regions_list[x:x+RECORDS_PER_SAMPLE]
-        for x in range(0, len(regions_list), RECORDS_PER_SAMPLE)
-    ]
+def submit_query_gtf(coords, base_id, publisher):
+    start_function(
+        topic_arn=QUERY_GTF_SNS_TOPIC_ARN,
+        base_filename=base_id,
+        message={
+            'coords': coords,
+        },
+        publisher=publisher,
+    )
+
+
+def stream_region(location, chrom, start, end, base_id, timer, publisher):
+    """Send records from a region to queryGTF in batches as they are read.
 
-    for idx in range(len(total_coords)):
-        idx_base_id = f'{base_id}_{idx}'
-        if timer.out_of_time():
-            # Call self with remaining data
-            remaining_coords = total_coords[idx:]
-            print(f"remaining coords length {len(remaining_coords)}")
-            # Since coords are generally similar size because it's
-            # made of chr, loc, ref, alt - we know 10 batches of 700
-            # records can be handled by SNS
-            for i in range(0, len(remaining_coords), BATCH_CHUNK_SIZE):
-                start_function(
-                    topic_arn=QUERY_VCF_SUBMIT_SNS_TOPIC_ARN,
-                    base_filename=f'{idx_base_id}_{i}',
-                    message={
-                        'coords': remaining_coords[i:i+BATCH_CHUNK_SIZE],
-                    },
-                )
+    end is None for the rest of the chromosome. Returns the position to
+    resume from if time runs out, otherwise None.
+    """
+    with tempfile.TemporaryFile('w+', dir='/tmp') as stderr_file:
+        query_process = get_query_process(location,
+                                          f'{chrom}:{start}-{end or ""}',
+                                          stderr_file)
+        next_pos = read_records(query_process, start, base_id, timer,
+                                publisher)
+        if next_pos is None and query_process.returncode:
+            stderr_file.seek(0)
+            truncated_print(f"bcftools exited with"
+                            f" {query_process.returncode}:"
+                            f" {stderr_file.read()}")
+    return next_pos
+
+
+def read_records(query_process, start, base_id, timer, publisher):
+    coords = []
+    batch_num = 0
+    stop_pos = None
+    next_pos = None
+    for line in query_process.stdout:
+        pos = int(line.split('\t', 2)[1])
+        if pos < start:
+            # Overlaps the region but starts in, and belongs to, the
+            # previous one.
+            continue
+        if stop_pos is not None and pos != stop_pos:
+            # Only stop between positions, so resuming from a position
+            # neither skips nor repeats records.
+            next_pos = pos
             break
-        else:
-            start_function(
-                topic_arn=QUERY_GTF_SNS_TOPIC_ARN,
-                base_filename=idx_base_id,
-                message={
-                    'coords': total_coords[idx],
-                },
-            )
+        coords.append(line.rstrip('\n'))
+        if len(coords) == RECORDS_PER_SAMPLE:
+            submit_query_gtf(coords, f'{base_id}_{batch_num}', publisher)
+            coords = []
+            batch_num += 1
+        if stop_pos is None and timer.out_of_time():
+            stop_pos = pos
+    if next_pos is not None:
+        query_process.kill()
+    query_process.wait()
+    if coords:
+        submit_query_gtf(coords, f'{base_id}_{batch_num}', publisher)
+    return next_pos
 
 
 def lambda_handler(event, context):
     orchestrator = Orchestrator(event)
     message = orchestrator.message
-    first_timer = Timer(context, MILLISECONDS_BEFORE_SPLIT)
-    second_timer = Timer(context, MILLISECONDS_BEFORE_SECOND_SPLIT)
-    vcf_regions = message['regions']
+    timer = Timer(context, MILLISECONDS_BEFORE_SPLIT)
     location = message['location']
+    chrom = message['chrom']
+    end = message['end']
     base_id = orchestrator.temp_file_name
-    for index, region in enumerate(vcf_regions):
-        if first_timer.out_of_time():
-            new_regions = vcf_regions[index:]
-            print(f"New Regions {new_regions}")
-            # Publish SNS for itself!
-            start_function(
-                topic_arn=QUERY_VCF_SNS_TOPIC_ARN,
-                base_filename=base_id,
-                message={
-                    'regions': new_regions,
-                    'location': location,
-                },
-                resend=True,
-            )
-            break
-        else:
-            chrom, start_str = region.split(':')
-            region_base_id = f'{base_id}_{chrom}_{start_str}'
-            start = round(1000000*float(start_str) + 1)
-            end = start + round(1000000*SLICE_SIZE_MBP - 1)
-            query_process = get_query_process(location, chrom, start, end)
-            submit_query_gtf(query_process, region_base_id, second_timer)
+    with BatchPublisher() as publisher:
+        next_pos = stream_region(location, chrom, message['nextPos'], end,
+                                 base_id, timer, publisher)
+    if next_pos is not None:
+        print(f"Resuming from {chrom}:{next_pos}")
+        # Publish SNS for itself!
+        start_function(
+            topic_arn=QUERY_VCF_SNS_TOPIC_ARN,
+            base_filename=base_id,
+            message={
+                'location': location,
+                'chrom': chrom,
+                'nextPos': next_pos,
+                'end': end,
+            },
+            resend=True,
+        )
     orchestrator.mark_completed()
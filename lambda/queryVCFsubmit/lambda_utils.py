@@ -1 +0,0 @@
-../../shared_resources/lambda_utils.py
\ No newline at end of file
@@ -1,9 +1,51 @@
 data "aws_caller_identity" "this" {}
 
 locals {
+  annotation_cache = "s3://${aws_s3_bucket.svep-annotation-cache.bucket}/"
+  # Key in the reference bucket of a pack built with
+  # scripts/build_annotation_pack.py, empty to not use one
+  annotation_pack = ""
   api_version = "v1.0.0"
+  reference_genome = "sorted_filtered_Homo_sapiens.GRCh38.109.chr.gtf.gz"
+  # Keys in the reference bucket of stores built from reference_genome
+  # and the transcripts GTF with scripts/build_gtf_store.py, empty to
+  # read the GTFs with tabix instead
+  reference_store = ""
+  # "2bit" once .2bit files built with scripts/build_2bit.py are next to
+  # the reference FASTAs, otherwise "fasta"
+  reference_sequence_format = "fasta"
+  # pluginConsequence is deployed once per group of chromosomes, so that
+  # warm functions keep getting the chromosomes whose reference sequence
+  # they have cached. Groups follow the reference order and are split
+  # where their total length passes each sixth of the genome, using
+  # chrom_matching.CHROMOSOME_LENGTHS_MBP, which
+  # tests/test_chromosome_groups.py checks them against. The default
+  # group also gets any contig normalise_chromosome can't match, such as
+  # unplaced scaffolds, under its name in the VCF.
+  consequence_chromosome_groups = {
+    "1-2" = ["1", "2"]
+    "3-5" = ["3", "4", "5"]
+    "6-8" = ["6", "7", "8"]
+    "9-12" = ["9", "10", "11", "12"]
+    "13-17" = ["13", "14", "15", "16", "17"]
+    "18-MT" = ["18", "19", "20", "21", "22", "X", "Y", "MT"]
+  }
+  consequence_default_group = "18-MT"
+  transcripts_store = ""
   slice_size_mbp = 5
-  result_suffix = "_results.tsv"
+  records_per_region = 10000
+  # "tsv", "bgzip" for BGZF compressed results with a tabix index, or
+  # "parquet" for a directory of Parquet files
+  result_format = "tsv"
+  result_suffix = {
+    tsv = "_results.tsv"
+    bgzip = "_results.tsv.gz"
+    parquet = "_results.parquet"
+  }[local.result_format]
+  # Layer providing pyarrow for the "parquet" result_format, e.g. the
+  # AWS SDK for pandas layer for Python 3.9 of the deployment region
+  parquet_layer_arn = ""
+  merge_layers = local.result_format == "parquet" ? [local.parquet_layer_arn] : []
   result_duration = 86400
 }
 
@@ -27,8 +69,11 @@ module "lambda-initQuery" {
 
   environment ={
     variables = {
-      CONCAT_STARTER_SNS_TOPIC_ARN = aws_sns_topic.concatStarter.arn
+      CONCAT_SNS_TOPIC_ARN = aws_sns_topic.concat.arn
+      CONCAT_STARTER_QUEUE_URL = aws_sqs_queue.concatStarter.url
+      JOB_TRACKER_TABLE = aws_dynamodb_table.svep-jobs.name
       QUERY_VCF_SNS_TOPIC_ARN = aws_sns_topic.queryVCF.arn
+      RECORDS_PER_REGION = local.records_per_region
       RESULT_DURATION = local.result_duration
       RESULT_SUFFIX = local.result_suffix
       SLICE_SIZE_MBP = local.slice_size_mbp
@@ -58,38 +103,11 @@ module "lambda-queryVCF" {
 
   environment ={
     variables = {
-      SVEP_TEMP = aws_s3_bucket.svep-temp.bucket
+      CONCAT_SNS_TOPIC_ARN = aws_sns_topic.concat.arn
+      JOB_TRACKER_TABLE = aws_dynamodb_table.svep-jobs.name
       QUERY_GTF_SNS_TOPIC_ARN = aws_sns_topic.queryGTF.arn
       QUERY_VCF_SNS_TOPIC_ARN = aws_sns_topic.queryVCF.arn
-      QUERY_VCF_SUBMIT_SNS_TOPIC_ARN = aws_sns_topic.queryVCFsubmit.arn
-      SLICE_SIZE_MBP = local.slice_size_mbp
-    }
-  }
-}
-
-#
-# queryVCFsubmit Lambda Function
-#
-module "lambda-queryVCFsubmit" {
-  source = "github.com/bhosking/terraform-aws-lambda"
-
-  function_name = "queryVCFsubmit"
-  description = "This lambda will be called if there are too many batchids to be processed within"
-  handler = "lambda_function.lambda_handler"
-  runtime = "python3.9"
-  memory_size = 2048
-  timeout = 28
-  policy = {
-    json = data.aws_iam_policy_document.lambda-queryVCFsubmit.json
-  }
-  source_path = "${path.module}/lambda/queryVCFsubmit"
-  #tags = var.common-tags
-
-  environment ={
-    variables = {
       SVEP_TEMP = aws_s3_bucket.svep-temp.bucket
-      QUERY_GTF_SNS_TOPIC_ARN = aws_sns_topic.queryGTF.arn
-      QUERY_VCF_SUBMIT_SNS_TOPIC_ARN = aws_sns_topic.queryVCFsubmit.arn
     }
   }
 }
@@ -104,7 +122,9 @@ module "lambda-queryGTF" {
   handler = "lambda_function.lambda_handler"
   runtime = "python3.9"
   memory_size = 2048
-  timeout = 24
+  # Room for a whole batch of records to be looked up in the caches and
+  # joined to the GTF before the time left is first checked
+  timeout = 120
   policy = {
     json = data.aws_iam_policy_document.lambda-queryGTF.json
   }
@@ -112,11 +132,18 @@ module "lambda-queryGTF" {
   #tags = var.common-tags
   environment ={
     variables = {
-      SVEP_TEMP = aws_s3_bucket.svep-temp.bucket
-      REFERENCE_GENOME = "sorted_filtered_Homo_sapiens.GRCh38.109.chr.gtf.gz"
+      ANNOTATION_CACHE = local.annotation_cache
+      ANNOTATION_CACHE_REFERENCE = local.reference_genome
+      ANNOTATION_PACK = local.annotation_pack
+      CONCAT_SNS_TOPIC_ARN = aws_sns_topic.concat.arn
+      JOB_TRACKER_TABLE = aws_dynamodb_table.svep-jobs.name
+      REFERENCE_GENOME = local.reference_genome
+      REFERENCE_STORE = local.reference_store
       PLUGIN_CONSEQUENCE_SNS_TOPIC_ARN = aws_sns_topic.pluginConsequence.arn
       PLUGIN_UPDOWNSTREAM_SNS_TOPIC_ARN = aws_sns_topic.pluginUpdownstream.arn
       QUERY_GTF_SNS_TOPIC_ARN = aws_sns_topic.queryGTF.arn
+      SVEP_REGIONS = aws_s3_bucket.svep-regions.bucket
+      SVEP_TEMP = aws_s3_bucket.svep-temp.bucket
     }
   }
 }
@@ -127,14 +154,15 @@ module "lambda-queryGTF" {
 # TODO: update source to github.com/bhosking/terraform-aws-lambda once docker support is added
 module "lambda-pluginConsequence" {
   source = "terraform-aws-modules/lambda/aws"
+  for_each = local.consequence_chromosome_groups
 
-  function_name      = "pluginConsequence"
+  function_name      = "pluginConsequence-${each.key}"
   description = "Queries VCF for a specified variant."
   create_package = false
   image_uri = module.docker_image_pluginConsequence_lambda.image_uri
   package_type = "Image"
   memory_size = 2048
-  timeout = 60
+  timeout = 120
   attach_policy_jsons = true
   policy_jsons = [
     data.aws_iam_policy_document.lambda-pluginConsequence.json
@@ -143,9 +171,13 @@ module "lambda-pluginConsequence" {
   source_path = "${path.module}/lambda/pluginConsequence"
   #tags = var.common-tags
   environment_variables = {
-      SVEP_TEMP = aws_s3_bucket.svep-temp.bucket
+      ANNOTATION_CACHE = local.annotation_cache
+      ANNOTATION_CACHE_REFERENCE = local.reference_genome
+      CONCAT_SNS_TOPIC_ARN = aws_sns_topic.concat.arn
+      JOB_TRACKER_TABLE = aws_dynamodb_table.svep-jobs.name
       SVEP_REGIONS = aws_s3_bucket.svep-regions.bucket
       REFERENCE_LOCATION = "s3://svep/"
+      REFERENCE_SEQUENCE_FORMAT = local.reference_sequence_format
       SPLICE_REFERENCE = "sorted_splice_GRCh38.109.gtf.gz"
       MIRNA_REFERENCE = "sorted_filtered_mirna.gff3.gz" 
   }
@@ -161,7 +193,7 @@ module "lambda-pluginUpdownstream" {
   handler = "lambda_function.lambda_handler"
   runtime = "python3.9"
   memory_size = 2048
-  timeout = 24
+  timeout = 120
   policy = {
     json = data.aws_iam_policy_document.lambda-pluginUpdownstream.json
   }
@@ -169,8 +201,12 @@ module "lambda-pluginUpdownstream" {
   #tags = var.common-tags
   environment ={
     variables = {
-      SVEP_TEMP = aws_s3_bucket.svep-temp.bucket
+      ANNOTATION_CACHE = local.annotation_cache
+      ANNOTATION_CACHE_REFERENCE = local.reference_genome
+      CONCAT_SNS_TOPIC_ARN = aws_sns_topic.concat.arn
+      JOB_TRACKER_TABLE = aws_dynamodb_table.svep-jobs.name
       REFERENCE_GENOME = "transcripts_Homo_sapiens.GRCh38.109.chr.gtf.gz"
+      REFERENCE_STORE = local.transcripts_store
       SVEP_REGIONS = aws_s3_bucket.svep-regions.bucket
     }
   }
@@ -197,7 +233,11 @@ module "lambda-concat" {
   environment ={
     variables = {
       SVEP_REGIONS = aws_s3_bucket.svep-regions.bucket
+      CONCATPAGES_SNS_TOPIC_ARN = aws_sns_topic.concatPages.arn
       CREATEPAGES_SNS_TOPIC_ARN = aws_sns_topic.createPages.arn
+      MERGE_FAN_IN = "1000"
+      RESULT_FORMAT = local.result_format
+      SVEP_TEMP = aws_s3_bucket.svep-temp.bucket
     }
   }
 }
@@ -222,10 +262,9 @@ module "lambda-concatStarter" {
 
   environment ={
     variables = {
-      SVEP_TEMP = aws_s3_bucket.svep-temp.bucket
-      SVEP_REGIONS = aws_s3_bucket.svep-regions.bucket
       CONCAT_SNS_TOPIC_ARN = aws_sns_topic.concat.arn
-      CONCAT_STARTER_SNS_TOPIC_ARN = aws_sns_topic.concatStarter.arn
+      CONCAT_STARTER_QUEUE_URL = aws_sqs_queue.concatStarter.url
+      JOB_TRACKER_TABLE = aws_dynamodb_table.svep-jobs.name
     }
   }
 }
@@ -237,11 +276,12 @@ module "lambda-createPages" {
   source = "github.com/bhosking/terraform-aws-lambda"
 
   function_name = "createPages"
-  description = "concatenates individual page with 700 entries, received from concat lambda"
+  description = "Merges one node of the concat merge tree planned by the concat lambda."
   handler = "lambda_function.lambda_handler"
   runtime = "python3.9"
   memory_size = 2048
-  timeout = 28
+  timeout = 300
+  layers = local.merge_layers
   policy = {
     json = data.aws_iam_policy_document.lambda-createPages.json
   }
@@ -251,9 +291,11 @@ module "lambda-createPages" {
   environment ={
     variables = {
       SVEP_REGIONS = aws_s3_bucket.svep-regions.bucket
-      SVEP_RESULTS = aws_s3_bucket.svep-results.bucket
       CONCATPAGES_SNS_TOPIC_ARN = aws_sns_topic.concatPages.arn
       CREATEPAGES_SNS_TOPIC_ARN = aws_sns_topic.createPages.arn
+      JOB_TRACKER_TABLE = aws_dynamodb_table.svep-jobs.name
+      RESULT_FORMAT = local.result_format
+      SVEP_TEMP = aws_s3_bucket.svep-temp.bucket
     }
   }
 }
@@ -265,11 +307,12 @@ module "lambda-concatPages" {
   source = "github.com/bhosking/terraform-aws-lambda"
 
   function_name = "concatPages"
-  description = "concatenates all the page files created by createPages lambda."
+  description = "Composes the result parts or pages into the final result with a multipart upload."
   handler = "lambda_function.lambda_handler"
   runtime = "python3.9"
   memory_size = 2048
-  timeout = 28
+  timeout = 300
+  layers = local.merge_layers
   policy = {
     json = data.aws_iam_policy_document.lambda-concatPages.json
   }
@@ -278,10 +321,10 @@ module "lambda-concatPages" {
 
   environment ={
     variables = {
+      RESULT_FORMAT = local.result_format
       RESULT_SUFFIX = local.result_suffix
       SVEP_REGIONS = aws_s3_bucket.svep-regions.bucket
       SVEP_RESULTS = aws_s3_bucket.svep-results.bucket
-      CONCATPAGES_SNS_TOPIC_ARN = aws_sns_topic.concatPages.arn
     }
   }
 }
@@ -307,6 +350,7 @@ module "lambda-getResultsURL" {
   environment ={
     variables = {
       RESULT_DURATION = local.result_duration
+      RESULT_FORMAT = local.result_format
       RESULT_SUFFIX = local.result_suffix
       SVEP_RESULTS = aws_s3_bucket.svep-results.bucket
     }
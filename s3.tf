@@ -7,6 +7,26 @@ resource "aws_s3_bucket" "svep-temp" {
   force_destroy = true
 }
 
+resource "aws_s3_bucket_lifecycle_configuration" "svep-temp-messages" {
+  bucket = aws_s3_bucket.svep-temp.id
+
+  rule {
+    id = "expire-messages"
+    status = "Enabled"
+    filter {
+      prefix = "messages/"
+    }
+    expiration {
+      days = 1
+    }
+  }
+}
+
+resource "aws_s3_bucket" "svep-annotation-cache" {
+  bucket_prefix = "svep-annotation-cache"
+  force_destroy = true
+}
+
 resource "aws_s3_bucket" "svep-results" {
   bucket_prefix = "svep-results"
   force_destroy = true
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Compare GTF attribute parsing against the previous shlex approach.
+
+Takes a GTF, e.g. one chromosome of the reference extracted with
+`tabix sorted_filtered_Homo_sapiens.GRCh38.109.chr.gtf.gz 1 > chr1.gtf`,
+checks that both parsers agree on every line and reports the time each
+takes.
+"""
+import argparse
+import os
+import shlex
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'shared_resources'))
+from gtf_index import (_parse_attributes_slow,  # noqa: E402
+                       parse_attributes)
+
+
+def parse_attributes_shlex(field):
+    """pluginUpdownstream's parsing before parse_attributes, with the
+    quotes and trailing semicolons it left for callers removed."""
+    attributes = {}
+    for item in field.split('; '):
+        key, value = shlex.split(item)
+        attributes[key] = value.rstrip(';')
+    return attributes
+
+
+def time_parser(parser, fields, repeats):
+    best = None
+    for _ in range(repeats):
+        time_started = time.perf_counter()
+        for field in fields:
+            parser(field)
+        duration = time.perf_counter() - time_started
+        best = duration if best is None else min(best, duration)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('gtf', help="Uncompressed GTF to parse")
+    parser.add_argument('--repeats', type=int, default=3,
+                        help="Times to parse the file, the best is reported")
+    args = parser.parse_args()
+    with open(args.gtf) as gtf_file:
+        fields = [
+            line.rstrip('\n').split('\t')[8]
+            for line in gtf_file
+            if not line.startswith('#')
+        ]
+    for field in fields:
+        expected = parse_attributes_shlex(field)
+        if parse_attributes(field) != expected:
+            raise ValueError(f"parse_attributes disagrees on {field}")
+        if _parse_attributes_slow(field) != expected:
+            raise ValueError(f"_parse_attributes_slow disagrees on {field}")
+    print(f"{len(fields)} lines parsed identically")
+    durations = [
+        (name, time_parser(function, fields, args.repeats))
+        for name, function in (
+            ('shlex', parse_attributes_shlex),
+            ('parse_attributes', parse_attributes),
+            ('_parse_attributes_slow', _parse_attributes_slow),
+        )
+    ]
+    baseline = durations[0][1]
+    for name, duration in durations:
+        print(f"{name}: {duration:.3f} s,"
+              f" {len(fields) / duration:.0f} lines/s,"
+              f" {baseline / duration:.1f}x shlex")
+
+
+if __name__ == '__main__':
+    main()
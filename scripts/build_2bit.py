@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""Convert per-chromosome reference FASTAs into .2bit files for
+pluginConsequence.
+
+For each Homo_sapiens.GRCh38.dna.chromosome.<chrom>.fa.gz given, writes
+Homo_sapiens.GRCh38.dna.chromosome.<chrom>.2bit to the output directory.
+Upload these next to the FASTAs and set reference_sequence_format in
+main.tf to "2bit".
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'shared_resources'))
+from reference_sequence import build_2bit  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('fasta', nargs='+',
+                        help="FASTAs to convert, optionally gzipped")
+    parser.add_argument('--output-dir', default='.',
+                        help="Directory to write the .2bit files to")
+    args = parser.parse_args()
+    for fasta in args.fasta:
+        name = os.path.basename(fasta)
+        for extension in ('.gz', '.fa', '.fasta'):
+            if name.endswith(extension):
+                name = name[:-len(extension)]
+        output = os.path.join(args.output_dir, f'{name}.2bit')
+        build_2bit(fasta, output)
+        print(f"Wrote {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Build an annotation pack of precomputed results for common variants.
+
+The sites-only VCF is submitted to a deployed sVEP, so that both plugins
+annotate every variant once and store their rows in the annotation
+cache. Once the results are ready, the rows are exported from the cache
+into a bgzipped, tabixed pack that queryGTF uses through ANNOTATION_PACK.
+
+Requires bcftools, bgzip and tabix on the PATH, and AWS credentials that
+can read the annotation cache.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'shared_resources'))
+from annotation_cache import get_annotation_cache  # noqa: E402
+
+
+LOOKUP_BATCH_SIZE = 10000
+POLL_INTERVAL = 30
+
+
+def submit(api_url, location):
+    request = Request(f'{api_url.rstrip("/")}/submit', method='PATCH',
+                      data=json.dumps({'location': location}).encode(),
+                      headers={'Content-Type': 'application/json'})
+    with urlopen(request) as response:
+        request_id = json.load(response)['RequestId']
+    print(f"Submitted {location} as {request_id}")
+    return request_id
+
+
+def wait_for_results(api_url, request_id, max_wait):
+    request = Request(f'{api_url.rstrip("/")}/results_url'
+                      f'?request_id={request_id}')
+    with urlopen(request) as response:
+        result_url = json.load(response)['ResultUrl']
+    time_started = time.time()
+    while time.time() - time_started < max_wait:
+        try:
+            with urlopen(Request(result_url,
+                                 headers={'Range': 'bytes=0-0'})):
+                print(f"Results of {request_id} are ready")
+                return
+        except HTTPError as e:
+            if e.code == 416:
+                # The results are there, but empty
+                print(f"Results of {request_id} are ready")
+                return
+            if e.code not in (403, 404):
+                raise
+        time.sleep(POLL_INTERVAL)
+    raise TimeoutError(f"Results of {request_id} weren't ready after"
+                       f" {max_wait} seconds")
+
+
+def get_variants(vcf):
+    args = [
+        'bcftools', 'query',
+        '--format', '%CHROM\t%POS\t%REF\t%ALT\n',
+        vcf,
+    ]
+    query_process = subprocess.Popen(args, stdout=subprocess.PIPE,
+                                     encoding='ascii')
+    for line in query_process.stdout:
+        yield line.rstrip('\n').split('\t')
+    if query_process.wait():
+        raise RuntimeError(f"bcftools exited with {query_process.returncode}")
+
+
+def write_pack(variants, cache, output):
+    """Write the cached rows of each variant, in VCF order."""
+    tsv_path = output[:-len('.gz')] if output.endswith('.gz') else output
+    packed = 0
+    missing = 0
+    batch = []
+    with open(tsv_path, 'w') as tsv_file:
+        def write_batch():
+            nonlocal packed, missing
+            for variant, rows in zip(batch, cache.lookup(batch)):
+                if rows is None:
+                    missing += 1
+                    continue
+                tsv_file.write('\t'.join(variant + [json.dumps(rows)]) + '\n')
+                packed += 1
+            batch.clear()
+
+        for variant in variants:
+            batch.append(variant)
+            if len(batch) == LOOKUP_BATCH_SIZE:
+                write_batch()
+        write_batch()
+    print(f"Packed {packed} variants, {missing} weren't in the cache")
+    subprocess.run(['bgzip', '--force', tsv_path], check=True)
+    subprocess.run(['tabix', '--force', '--sequence', '1', '--begin', '2',
+                    '--end', '2', f'{tsv_path}.gz'], check=True)
+    print(f"Wrote {tsv_path}.gz and its index")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('vcf', help="Sites-only VCF of common variants, as"
+                                    " a location sVEP can read.")
+    parser.add_argument('output', help="Path of the pack, ending in .gz")
+    parser.add_argument('--api-url', help="sVEP API to annotate the VCF"
+                                          " with. Skip to only export rows"
+                                          " that are already cached.")
+    parser.add_argument('--cache', required=True,
+                        help="ANNOTATION_CACHE of the deployment")
+    parser.add_argument('--reference', required=True,
+                        help="ANNOTATION_CACHE_REFERENCE of the deployment")
+    parser.add_argument('--local-vcf', help="Local copy of the VCF to read"
+                                            " variants from")
+    parser.add_argument('--max-wait', type=int, default=6 * 60 * 60,
+                        help="Seconds to wait for the annotation to finish")
+    args = parser.parse_args()
+    if args.api_url:
+        request_id = submit(args.api_url, args.vcf)
+        wait_for_results(args.api_url, request_id, args.max_wait)
+    cache = get_annotation_cache(args.cache, args.reference)
+    write_pack(get_variants(args.local_vcf or args.vcf), cache, args.output)
+
+
+if __name__ == '__main__':
+    main()
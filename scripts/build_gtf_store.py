@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""Convert a GTF into the binary store read by queryGTF and
+pluginUpdownstream.
+
+Upload the output to the reference bucket and set reference_store or
+transcripts_store in main.tf to its key.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'shared_resources'))
+from gtf_store import build_store  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('gtf', help="GTF to convert, optionally gzipped")
+    parser.add_argument('output', help="Path to write the store to")
+    args = parser.parse_args()
+    build_store(args.gtf, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,305 @@
+from collections import OrderedDict
+import json
+import os
+from urllib.parse import urlparse
+
+from lambda_utils import s3
+
+
+# Optional environment variables
+# s3://bucket/prefix/ or a local directory, the cache is off if unset
+ANNOTATION_CACHE = os.environ.get('ANNOTATION_CACHE')
+ANNOTATION_CACHE_REFERENCE = os.environ.get('ANNOTATION_CACHE_REFERENCE', '')
+
+# Bases of a chromosome covered by each shard
+BIN_SIZE = 1000000
+# Fragments a shard can have before a lookup folds them into its merged
+# object
+COMPACT_FRAGMENTS = 8
+FORMAT_VERSION = 1
+# Merged objects are named this in their shard, followed by their
+# generation. Fragments are named after tasks, which never start so.
+MERGED_PREFIX = '_merged-'
+# Shards kept in memory by a warm container
+MAX_CACHED_SHARDS = 16
+# Most keys S3 deletes in one request
+DELETE_BATCH_SIZE = 1000
+# Errors S3 returns when a write only made if the key doesn't exist loses
+# to another
+CREATE_CONFLICT_CODES = (
+    'ConditionalRequestConflict',
+    'PreconditionFailed',
+)
+# Plugins that must all have annotated a variant for it to be a hit
+PLUGINS = (
+    'pluginConsequence',
+    'pluginUpdownstream',
+)
+
+
+class LocalStore:
+    def __init__(self, directory):
+        self.directory = directory
+
+    def list_keys(self, prefix):
+        """Return the version of each key, which changes if the key is
+        written again."""
+        shard_dir = os.path.join(self.directory, prefix)
+        if not os.path.isdir(shard_dir):
+            return {}
+        versions = {}
+        for file_name in sorted(os.listdir(shard_dir)):
+            try:
+                stat = os.stat(os.path.join(shard_dir, file_name))
+            except FileNotFoundError:
+                continue
+            versions[f'{prefix}{file_name}'] = (
+                f'{stat.st_mtime_ns}-{stat.st_size}')
+        return versions
+
+    def create(self, key, body):
+        """Write a key only if it doesn't exist. Returns whether it was
+        written."""
+        path = os.path.join(self.directory, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            with open(path, 'x') as fragment_file:
+                fragment_file.write(body)
+        except FileExistsError:
+            return False
+        return True
+
+    def delete(self, keys):
+        for key in keys:
+            try:
+                os.remove(os.path.join(self.directory, key))
+            except FileNotFoundError:
+                pass
+
+    def read(self, key):
+        try:
+            with open(os.path.join(self.directory, key)) as fragment_file:
+                return fragment_file.read()
+        except FileNotFoundError:
+            return None
+
+    def write(self, key, body):
+        path = os.path.join(self.directory, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as fragment_file:
+            fragment_file.write(body)
+
+
+class S3Store:
+    def __init__(self, bucket, prefix):
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def list_keys(self, prefix):
+        paginator = s3.meta.client.get_paginator('list_objects_v2')
+        pages = paginator.paginate(Bucket=self.bucket,
+                                   Prefix=f'{self.prefix}{prefix}')
+        return {
+            obj['Key'][len(self.prefix):]: obj['ETag']
+            for page in pages
+            for obj in page.get('Contents', [])
+        }
+
+    def create(self, key, body):
+        try:
+            s3.meta.client.put_object(Bucket=self.bucket,
+                                      Key=f'{self.prefix}{key}',
+                                      Body=body.encode(), IfNoneMatch='*')
+        except s3.meta.client.exceptions.ClientError as e:
+            if e.response['Error']['Code'] not in CREATE_CONFLICT_CODES:
+                raise
+            return False
+        return True
+
+    def delete(self, keys):
+        keys = list(keys)
+        for i in range(0, len(keys), DELETE_BATCH_SIZE):
+            s3.meta.client.delete_objects(Bucket=self.bucket, Delete={
+                'Objects': [
+                    {
+                        'Key': f'{self.prefix}{key}',
+                    }
+                    for key in keys[i:i + DELETE_BATCH_SIZE]
+                ],
+                'Quiet': True,
+            })
+
+    def read(self, key):
+        obj = s3.Object(self.bucket, f'{self.prefix}{key}')
+        try:
+            return obj.get()['Body'].read().decode()
+        except s3.meta.client.exceptions.NoSuchKey:
+            return None
+
+    def write(self, key, body):
+        s3.Object(self.bucket, f'{self.prefix}{key}').put(Body=body.encode())
+
+
+class AnnotationCache:
+    """Result rows of each plugin for variants it has already annotated,
+    shared between requests.
+
+    Entries are appended as fragment objects, named after the task that
+    wrote them, under a shard for each reference, plugin, chromosome and
+    BIN_SIZE bases. Each fragment is written by one task, so concurrent
+    writers don't conflict and a warm container only reads fragments it
+    hasn't seen before.
+
+    Once a lookup finds COMPACT_FRAGMENTS fragments in a shard, it
+    writes their entries and those of the shard's merged object to the
+    next generation of the merged object, which lists the fragments it
+    folded in, then deletes them and the older generation. Lookups so
+    read a bounded number of objects however many jobs have run. A
+    generation is only written if it doesn't exist yet, so of
+    compactions racing each other only one deletes anything. Folded
+    fragments are listed with their version, so one written again by a
+    task that runs again is read rather than taken as folded.
+    """
+    def __init__(self, store, reference=ANNOTATION_CACHE_REFERENCE):
+        self.store = store
+        self.reference = reference
+        self.shards = OrderedDict()
+
+    def _get_shard_prefix(self, plugin, chrom, pos):
+        return (f'v{FORMAT_VERSION}/{self.reference}/{plugin}/{chrom}/'
+                f'{int(pos) // BIN_SIZE}/')
+
+    def _compact_shard(self, prefix, merged_keys, fragments, stale_keys,
+                       entries):
+        """Write entries to the next generation of a shard's merged
+        object, then delete the fragments folded into it, stale ones and
+        the older generations. Returns the key of the new generation, or
+        None if another compaction wrote it first."""
+        generation = max((
+            int(key[len(prefix) + len(MERGED_PREFIX):-len('.json')]) + 1
+            for key in merged_keys
+        ), default=0)
+        merged_key = f'{prefix}{MERGED_PREFIX}{generation:010d}.json'
+        if not self.store.create(merged_key, json.dumps({
+            'fragments': fragments,
+            'entries': [
+                [*variant, rows]
+                for variant, rows in entries.items()
+            ],
+        }, separators=(',', ':'))):
+            print(f"{merged_key} was written by another compaction")
+            return None
+        print(f"Compacted {len(fragments)} fragments into {merged_key}")
+        self.store.delete(list(fragments) + stale_keys + merged_keys)
+        return merged_key
+
+    def _load_shard(self, plugin, chrom, pos):
+        prefix = self._get_shard_prefix(plugin, chrom, pos)
+        # Fragments folded into the merged object are kept apart from
+        # those loaded since, which a compaction would fold in. Both map
+        # keys to the version that was read, as a task that runs again
+        # writes its fragment again.
+        merged_key, folded, loaded, entries = self.shards.pop(
+            prefix, (None, {}, {}, {}))
+        merged_keys = []
+        fragments = {}
+        for key, version in self.store.list_keys(prefix).items():
+            if key[len(prefix):].startswith(MERGED_PREFIX):
+                merged_keys.append(key)
+            else:
+                fragments[key] = version
+        latest_merged_key = max(merged_keys, default=None)
+        if latest_merged_key not in (None, merged_key):
+            merged = self.store.read(latest_merged_key)
+            if merged is not None:
+                merged = json.loads(merged)
+                merged_key = latest_merged_key
+                folded = merged['fragments']
+                loaded = {}
+                entries = {
+                    (merged_chrom, merged_pos, ref, alt): rows
+                    for merged_chrom, merged_pos, ref, alt, rows
+                    in merged['entries']
+                }
+        for key, version in fragments.items():
+            if version in (folded.get(key), loaded.get(key)):
+                continue
+            fragment = self.store.read(key)
+            if fragment is None:
+                # Folded by a compaction since it was listed
+                continue
+            for fragment_chrom, fragment_pos, ref, alt, rows in json.loads(
+                    fragment):
+                entries[(fragment_chrom, fragment_pos, ref, alt)] = rows
+            loaded[key] = version
+        if len(loaded) >= COMPACT_FRAGMENTS:
+            # Left by a compaction that stopped before deleting them, or
+            # that is still running
+            stale_keys = [
+                key
+                for key, version in fragments.items()
+                if folded.get(key) == version
+            ]
+            compacted_key = self._compact_shard(prefix, merged_keys, loaded,
+                                                stale_keys, entries)
+            if compacted_key is not None:
+                merged_key = compacted_key
+                folded = loaded
+                loaded = {}
+        while len(self.shards) >= MAX_CACHED_SHARDS:
+            self.shards.popitem(last=False)
+        self.shards[prefix] = (merged_key, folded, loaded, entries)
+        return entries
+
+    def lookup(self, variants):
+        """Return the rows of each (chrom, pos, ref, alt) variant from all
+        plugins joined together, or None for variants that aren't
+        cached for every plugin."""
+        results = [[] for _ in variants]
+        for plugin in PLUGINS:
+            shard_entries = {}
+            for i, (chrom, pos, ref, alt) in enumerate(variants):
+                if results[i] is None:
+                    continue
+                shard_key = (chrom, int(pos) // BIN_SIZE)
+                if shard_key not in shard_entries:
+                    shard_entries[shard_key] = self._load_shard(plugin, chrom,
+                                                                pos)
+                entries = shard_entries[shard_key]
+                rows = entries.get((chrom, str(pos), ref, alt))
+                if rows is None:
+                    results[i] = None
+                elif rows:
+                    results[i].append(rows)
+        return [
+            None if plugin_rows is None else '\n'.join(plugin_rows)
+            for plugin_rows in results
+        ]
+
+    def store_rows(self, plugin, fragment_name, variant_rows):
+        """Add the rows a plugin wrote for each (chrom, pos, ref, alt)
+        variant, with an empty string for variants without rows."""
+        fragments = {}
+        for (chrom, pos, ref, alt), rows in variant_rows:
+            prefix = self._get_shard_prefix(plugin, chrom, pos)
+            fragments.setdefault(prefix, []).append(
+                [chrom, str(pos), ref, alt, rows])
+        for prefix, entries in fragments.items():
+            self.store.write(f'{prefix}{fragment_name}.json',
+                             json.dumps(entries, separators=(',', ':')))
+
+
+def get_annotation_cache(location=ANNOTATION_CACHE,
+                         reference=ANNOTATION_CACHE_REFERENCE):
+    if not location:
+        return None
+    url = urlparse(location)
+    if url.scheme == 's3':
+        prefix = url.path.strip('/')
+        store = S3Store(url.netloc, f'{prefix}/' if prefix else '')
+    else:
+        store = LocalStore(location)
+    return AnnotationCache(store, reference)
+
+
+annotation_cache = get_annotation_cache()
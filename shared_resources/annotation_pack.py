@@ -0,0 +1,32 @@
+import json
+
+from gtf_index import tabix_lines
+
+
+class AnnotationPack:
+    """Precomputed rows of common variants from all plugins.
+
+    The pack is a bgzipped, tabixed file of chrom, pos, ref, alt and the
+    variant's rows as a JSON string, built by
+    scripts/build_annotation_pack.py.
+    """
+    def __init__(self, file_path):
+        self.file_path = file_path
+
+    def lookup(self, variants):
+        """Return the rows of each (chrom, pos, ref, alt) variant, or None
+        for variants that aren't in the pack, with one tabix query per
+        chromosome."""
+        chrom_positions = {}
+        for chrom, pos, _, _ in variants:
+            chrom_positions.setdefault(chrom, []).append(int(pos))
+        entries = {}
+        for chrom, positions in chrom_positions.items():
+            region = f'{chrom}:{min(positions)}-{max(positions)}'
+            for line in tabix_lines(self.file_path, region):
+                pack_chrom, pos, ref, alt, rows = line.split('\t')
+                entries[(pack_chrom, pos, ref, alt)] = json.loads(rows)
+        return [
+            entries.get((chrom, str(pos), ref, alt))
+            for chrom, pos, ref, alt in variants
+        ]
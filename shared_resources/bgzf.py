@@ -0,0 +1,156 @@
+from collections import OrderedDict
+import struct
+import zlib
+
+from tabix_index import TBI_DEPTH, TBI_MAGIC, TBI_MIN_SHIFT
+
+
+COMPRESSION_LEVEL = 6
+EOF_BLOCK = bytes.fromhex(
+    '1f8b08040000000000ff0600424302001b0003000000000000000000')
+# Most uncompressed bytes in a block, as in htslib, so that even
+# incompressible data fits the 16 bit block size.
+MAX_BLOCK_DATA = 0xff00
+# Columns of the lines given to tabix, 1-based
+TABIX_COLUMNS = (1, 2, 3)
+TABIX_META_CHAR = '#'
+
+
+def compress_block(data):
+    compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, -15)
+    deflated = compressor.compress(data) + compressor.flush()
+    header = struct.pack('<4BI2BH2BHH', 31, 139, 8, 4, 0, 0, 255, 6, 66, 67,
+                         2, len(deflated) + 25)
+    return header + deflated + struct.pack('<2I', zlib.crc32(data),
+                                           len(data))
+
+
+def compress(data):
+    """Compress data into BGZF blocks, without the end of file block."""
+    return b''.join(
+        compress_block(data[i:i + MAX_BLOCK_DATA])
+        for i in range(0, len(data), MAX_BLOCK_DATA)
+    )
+
+
+def compress_lines(lines, index):
+    """Yield the BGZF blocks of (chrom, start, end, line) lines, with
+    1-based inclusive coordinates, and add each line to index at its
+    virtual offset from the first block. No end of file block is added,
+    so the output of separate calls can be joined."""
+    block = bytearray()
+    block_offset = 0
+    for chrom, start, end, line in lines:
+        line_start = (block_offset << 16) | len(block)
+        data = line.encode()
+        while len(block) + len(data) >= MAX_BLOCK_DATA:
+            split = MAX_BLOCK_DATA - len(block)
+            block += data[:split]
+            data = data[split:]
+            compressed = compress_block(bytes(block))
+            yield compressed
+            block_offset += len(compressed)
+            block = bytearray()
+        block += data
+        index.add(chrom, start, end, line_start,
+                  (block_offset << 16) | len(block))
+    if block:
+        yield compress_block(bytes(block))
+
+
+def _get_bin(beg, end):
+    # As hts_reg2bin, with 0-based half-open coordinates
+    end -= 1
+    shift = TBI_MIN_SHIFT
+    level_offset = ((1 << (3 * TBI_DEPTH)) - 1) // 7
+    for level in range(TBI_DEPTH, 0, -1):
+        if beg >> shift == end >> shift:
+            return level_offset + (beg >> shift)
+        shift += 3
+        level_offset -= 1 << (3 * (level - 1))
+    return 0
+
+
+class IndexBuilder:
+    """Tabix index of BGZF compressed lines, built as they're written.
+
+    Indexes of consecutive parts of a file can be built separately,
+    saved with to_json, and joined in order with extend.
+    """
+    def __init__(self, references=None):
+        # name: (bins {bin: [[start offset, end offset]]},
+        #        intervals {window: offset})
+        self.references = references or OrderedDict()
+
+    def add(self, chrom, start, end, start_offset, end_offset):
+        bins, intervals = self.references.setdefault(chrom, ({}, {}))
+        beg = start - 1
+        end = max(end, start)
+        chunks = bins.setdefault(_get_bin(beg, end), [])
+        if chunks and chunks[-1][1] == start_offset:
+            chunks[-1][1] = end_offset
+        else:
+            chunks.append([start_offset, end_offset])
+        for window in range(beg >> TBI_MIN_SHIFT,
+                            ((end - 1) >> TBI_MIN_SHIFT) + 1):
+            intervals.setdefault(window, start_offset)
+
+    def extend(self, other, compressed_offset):
+        """Add the index of lines that follow those of this index,
+        starting compressed_offset bytes into the file."""
+        shift = compressed_offset << 16
+        for chrom, (other_bins, other_intervals) in other.references.items():
+            bins, intervals = self.references.setdefault(chrom, ({}, {}))
+            for bin_number, chunks in other_bins.items():
+                bins.setdefault(bin_number, []).extend(
+                    [chunk_start + shift, chunk_end + shift]
+                    for chunk_start, chunk_end in chunks
+                )
+            for window, offset in other_intervals.items():
+                intervals.setdefault(window, offset + shift)
+
+    def to_json(self):
+        return [
+            [chrom, list(bins.items()), list(intervals.items())]
+            for chrom, (bins, intervals) in self.references.items()
+        ]
+
+    @classmethod
+    def from_json(cls, references):
+        return cls(OrderedDict(
+            (chrom, (dict(bins), dict(intervals)))
+            for chrom, bins, intervals in references
+        ))
+
+    def to_tbi(self):
+        """Return the BGZF compressed .tbi file."""
+        names = b''.join(
+            chrom.encode() + b'\0'
+            for chrom in self.references
+        )
+        data = [
+            TBI_MAGIC,
+            struct.pack('<i', len(self.references)),
+            # Generic format, 1-based coordinates
+            struct.pack('<6i', 0, *TABIX_COLUMNS, ord(TABIX_META_CHAR), 0),
+            struct.pack('<i', len(names)),
+            names,
+        ]
+        for bins, intervals in self.references.values():
+            data.append(struct.pack('<i', len(bins)))
+            for bin_number in sorted(bins):
+                chunks = bins[bin_number]
+                data.append(struct.pack('<Ii', bin_number, len(chunks)))
+                data.append(struct.pack(
+                    f'<{2 * len(chunks)}Q',
+                    *(offset for chunk in chunks for offset in chunk)))
+            # Windows that no line overlaps share the offset of the
+            # window before them, or of the first line.
+            offsets = []
+            offset = min(intervals.values(), default=0)
+            for window in range(max(intervals, default=-1) + 1):
+                offset = intervals.get(window, offset)
+                offsets.append(offset)
+            data.append(struct.pack(f'<i{len(offsets)}Q', len(offsets),
+                                    *offsets))
+        return compress(b''.join(data)) + EOF_BLOCK
@@ -1,6 +1,4 @@
-import subprocess
-
-from lambda_utils import clear_tmp
+from functools import lru_cache
 
 
 CHROMOSOME_ALIASES = {
@@ -38,45 +36,84 @@ CHROMOSOME_LENGTHS_MBP = {
 }
 
 CHROMOSOMES = CHROMOSOME_LENGTHS_MBP.keys()
-
-
-def get_vcf_chromosomes(vcf):
-    args = [
-        'tabix',
-        '--list-chroms',
-        vcf
-    ]
-    tabix_output = subprocess.check_output(args=args, cwd='/tmp',
-                                           encoding='utf-8')
-    clear_tmp()
-    return tabix_output.split('\n')[:-1]
+CHROMOSOME_INDEXES = {
+    chrom: i
+    for i, chrom in enumerate(CHROMOSOMES)
+}
 
 
 def get_matching_chromosome(vcf_chromosomes, target_chromosome):
     for vcf_chrom in vcf_chromosomes:
-        if _match_chromosome_name(vcf_chrom) == target_chromosome:
+        if normalise_chromosome(vcf_chrom) == target_chromosome:
             return vcf_chrom
     return None
 
 
+def get_balanced_regions(reference_index, records_per_region):
+    """Split a VCF contig into (start, end) regions holding roughly
+    records_per_region records each, based on its index.
+
+    Positions are 1-based and inclusive, and the last region has an end
+    of None to cover the rest of the contig. Returns None if the index
+    can't be used to estimate record counts.
+    """
+    window_records = reference_index.window_records()
+    if window_records is None:
+        return None
+    if not reference_index.n_mapped:
+        return []
+    regions = []
+    start = 1
+    records = 0
+    for window_start, estimated_records in window_records:
+        if records and records + estimated_records > records_per_region:
+            regions.append((start, window_start))
+            start = window_start + 1
+            records = 0
+        records += estimated_records
+    regions.append((start, None))
+    return regions
+
+
 def get_regions(slice_size_mbp):
+    slice_size = round(1000000 * slice_size_mbp)
     regions = {}
     for chrom, size in CHROMOSOME_LENGTHS_MBP.items():
         chrom_regions = []
-        start = 0
-        while start < size:
-            chrom_regions.append(start)
-            start += slice_size_mbp
+        start = 1
+        while start <= 1000000 * size:
+            chrom_regions.append((start, start + slice_size - 1))
+            start += slice_size
+        # Let the last region run to the end of the chromosome, whatever
+        # its length in the VCF's assembly.
+        chrom_regions[-1] = (chrom_regions[-1][0], None)
         regions[chrom] = chrom_regions
     return regions
 
 
-def _match_chromosome_name(chromosome_name):
+def _match_chromosome(chromosome_name):
     for i in range(len(chromosome_name)):
         chrom = chromosome_name[i:]  # progressively remove prefix
         if chrom in CHROMOSOMES:
             return chrom
         elif chrom in CHROMOSOME_ALIASES:
             return CHROMOSOME_ALIASES[chrom]
-    print(f'WARNING: Could not find chromosome to match "{chromosome_name}"')
     return None
+
+
+def normalise_chromosome(chromosome_name):
+    """Return the reference name of a VCF chromosome, e.g. MT for chrM,
+    or None if it doesn't match one."""
+    chrom = _match_chromosome(chromosome_name)
+    if chrom is None:
+        print(f'WARNING: Could not find chromosome to match'
+              f' "{chromosome_name}"')
+    return chrom
+
+
+@lru_cache(maxsize=None)
+def get_chromosome_index(chromosome_name):
+    """Return the position of a VCF chromosome in the reference order,
+    with chromosomes that don't match one after all that do."""
+    return CHROMOSOME_INDEXES.get(_match_chromosome(chromosome_name),
+                                  len(CHROMOSOME_INDEXES))
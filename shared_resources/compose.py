@@ -0,0 +1,216 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from botocore.config import Config
+
+from lambda_utils import S3_ENDPOINT_URL
+
+
+# Parts uploaded, and pieces of them downloaded, at once by each compose
+COMPOSE_THREADS = 32
+# Limits of S3 multipart uploads. Every part but the last must be at
+# least MIN_PART_SIZE, and copied parts can be at most MAX_PART_SIZE.
+MAX_PART_COUNT = 10000
+MAX_PART_SIZE = 5 * 1024 ** 3
+MIN_PART_SIZE = 5 * 1024 ** 2
+# Size of the parts of uploads streamed from memory
+UPLOAD_PART_SIZE = 8 * 1024 ** 2
+
+# AWS clients as lambda_utils.s3 is a resource
+s3_client = boto3.client('s3', endpoint_url=S3_ENDPOINT_URL,
+                         config=Config(
+                             max_pool_connections=2 * COMPOSE_THREADS))
+
+
+class ComposePlan:
+    """Parts of a multipart upload that concatenates objects.
+
+    Objects big enough to be parts themselves are copied within S3. The
+    rest, the separators between objects and, where needed, enough of
+    the start of the next big object to make up the minimum part size
+    are uploaded from memory.
+    """
+    def __init__(self, separator):
+        self.separator = separator
+        # ('copy', key, start, end) or ('upload', [(key, start, end) or
+        # bytes])
+        self.parts = []
+        self.pieces = []
+        self.pieces_size = 0
+
+    def _add_piece(self, piece, size):
+        self.pieces.append(piece)
+        self.pieces_size += size
+
+    def _flush_pieces(self):
+        if self.pieces:
+            self.parts.append(('upload', self.pieces))
+            self.pieces = []
+            self.pieces_size = 0
+
+    def add(self, key, size):
+        if self.separator and (self.parts or self.pieces):
+            self._add_piece(self.separator, len(self.separator))
+        needed = max(MIN_PART_SIZE - self.pieces_size, 0) if self.pieces else 0
+        if size - needed < MIN_PART_SIZE:
+            self._add_piece((key, 0, size), size)
+            if self.pieces_size >= MIN_PART_SIZE:
+                self._flush_pieces()
+            return
+        if needed:
+            self._add_piece((key, 0, needed), needed)
+        self._flush_pieces()
+        start = needed
+        while start < size:
+            end = min(start + MAX_PART_SIZE, size)
+            if size - end < MIN_PART_SIZE:
+                # Split what's left evenly rather than leave a remainder
+                # too small to be copied
+                end = start + (size - start) // 2 if end < size else end
+            self.parts.append(('copy', key, start, end))
+            start = end
+
+    def finish(self, trailer=b''):
+        if trailer:
+            self._add_piece(trailer, len(trailer))
+        self._flush_pieces()
+        if len(self.parts) > MAX_PART_COUNT:
+            raise ValueError(f"Composing would take {len(self.parts)} parts,"
+                             f" more than the limit of {MAX_PART_COUNT}")
+        return self.parts
+
+
+def _get_size(bucket, key):
+    return s3_client.head_object(Bucket=bucket, Key=key)['ContentLength']
+
+
+def _get_range(bucket, key, start, end):
+    if start == end:
+        return b''
+    response = s3_client.get_object(Bucket=bucket, Key=key,
+                                    Range=f'bytes={start}-{end - 1}')
+    return response['Body'].read()
+
+
+def _get_piece(bucket, piece):
+    return piece if isinstance(piece, bytes) else _get_range(bucket, *piece)
+
+
+def _get_pieces(bucket, pieces, executor):
+    return b''.join(executor.map(lambda piece: _get_piece(bucket, piece),
+                                 pieces))
+
+
+def _upload_bytes(target_bucket, target_key, upload_id, part_number, body):
+    response = s3_client.upload_part(
+        Bucket=target_bucket, Key=target_key, UploadId=upload_id,
+        PartNumber=part_number, Body=body)
+    return {
+        'ETag': response['ETag'],
+        'PartNumber': part_number,
+    }
+
+
+def _upload_part(bucket, target_bucket, target_key, upload_id, executor,
+                 part_number, part):
+    if part[0] == 'copy':
+        _, key, start, end = part
+        response = s3_client.upload_part_copy(
+            Bucket=target_bucket, Key=target_key, UploadId=upload_id,
+            PartNumber=part_number,
+            CopySource={
+                'Bucket': bucket,
+                'Key': key,
+            },
+            CopySourceRange=f'bytes={start}-{end - 1}',
+        )
+        return {
+            'ETag': response['CopyPartResult']['ETag'],
+            'PartNumber': part_number,
+        }
+    return _upload_bytes(target_bucket, target_key, upload_id, part_number,
+                         _get_pieces(bucket, part[1], executor))
+
+
+def compose(bucket, keys, target_bucket, target_key, separator=b'',
+            trailer=b''):
+    """Concatenate objects of a bucket into target_key, with separator
+    between each of them, trailer after them and empty objects skipped,
+    without downloading any more of them than the part size limits
+    need. Returns the size of each object."""
+    with ThreadPoolExecutor(COMPOSE_THREADS) as executor, \
+            ThreadPoolExecutor(COMPOSE_THREADS) as piece_executor:
+        sizes = list(executor.map(lambda key: _get_size(bucket, key), keys))
+        plan = ComposePlan(separator)
+        for key, size in zip(keys, sizes):
+            if size:
+                plan.add(key, size)
+        parts = plan.finish(trailer)
+        if len(parts) <= 1 and (not parts or parts[0][0] == 'upload'):
+            # Too small for a multipart upload to be worth it
+            body = (_get_pieces(bucket, parts[0][1], piece_executor)
+                    if parts else b'')
+            s3_client.put_object(Bucket=target_bucket, Key=target_key,
+                                 Body=body)
+            print(f"Composed {len(keys)} objects into {target_key} from"
+                  f" memory")
+            return sizes
+        upload_id = s3_client.create_multipart_upload(
+            Bucket=target_bucket, Key=target_key)['UploadId']
+        try:
+            completed_parts = list(executor.map(
+                lambda numbered_part: _upload_part(
+                    bucket, target_bucket, target_key, upload_id,
+                    piece_executor, *numbered_part),
+                enumerate(parts, start=1)))
+            s3_client.complete_multipart_upload(
+                Bucket=target_bucket, Key=target_key, UploadId=upload_id,
+                MultipartUpload={'Parts': completed_parts})
+        except Exception:
+            s3_client.abort_multipart_upload(
+                Bucket=target_bucket, Key=target_key, UploadId=upload_id)
+            raise
+    copied = sum(part[0] == 'copy' for part in parts)
+    print(f"Composed {len(keys)} objects into {target_key} in {len(parts)}"
+          f" parts, {copied} copied within S3")
+    return sizes
+
+
+def upload_chunks(target_bucket, target_key, chunks):
+    """Upload an iterable of bytes as one object, sending parts as soon
+    as enough has been produced for them."""
+    buffer = bytearray()
+    upload_id = None
+    futures = []
+    with ThreadPoolExecutor(COMPOSE_THREADS) as executor:
+        try:
+            for chunk in chunks:
+                buffer += chunk
+                if len(buffer) < UPLOAD_PART_SIZE:
+                    continue
+                if upload_id is None:
+                    upload_id = s3_client.create_multipart_upload(
+                        Bucket=target_bucket, Key=target_key)['UploadId']
+                futures.append(executor.submit(
+                    _upload_bytes, target_bucket, target_key, upload_id,
+                    len(futures) + 1, bytes(buffer)))
+                buffer = bytearray()
+            if upload_id is None:
+                s3_client.put_object(Bucket=target_bucket, Key=target_key,
+                                     Body=bytes(buffer))
+                return
+            if buffer:
+                futures.append(executor.submit(
+                    _upload_bytes, target_bucket, target_key, upload_id,
+                    len(futures) + 1, bytes(buffer)))
+            s3_client.complete_multipart_upload(
+                Bucket=target_bucket, Key=target_key, UploadId=upload_id,
+                MultipartUpload={
+                    'Parts': [future.result() for future in futures],
+                })
+        except Exception:
+            if upload_id is not None:
+                s3_client.abort_multipart_upload(
+                    Bucket=target_bucket, Key=target_key, UploadId=upload_id)
+            raise
+    print(f"Uploaded {target_key} in {len(futures)} parts")
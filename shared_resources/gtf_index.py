@@ -0,0 +1,203 @@
+import bisect
+from collections import OrderedDict
+import heapq
+import re
+import subprocess
+
+
+# Number of features summarised by each entry of the block maximum
+BLOCK_SIZE = 64
+# Whole-chromosome indexes kept in memory by a warm container
+MAX_CACHED_CHROMOSOMES = 2
+
+# A single `key "value";` or `key value;` attribute
+ATTRIBUTE_PATTERN = re.compile(r' *([^\s";]+) (?:"([^"]*)"|([^\s";]+));')
+# Attribute columns made up only of the above, which is all of Ensembl's
+ATTRIBUTES_PATTERN = re.compile(r'(?: *[^\s";]+ (?:"[^"]*"|[^\s";]+);)* *')
+TRANSCRIPT_ID_PATTERN = re.compile(r'transcript_id "([^"]+)";')
+
+
+class FeatureIntervals:
+    """Overlap index over GTF lines from a single chromosome."""
+    def __init__(self, lines):
+        features = _parse_features(lines)
+        self.starts = [feature[0] for feature in features]
+        self.ends = [feature[1] for feature in features]
+        self.lines = [feature[2] for feature in features]
+        # Largest end of any feature up to and including each index,
+        # used to know when no earlier feature can overlap a query.
+        self.max_ends = []
+        max_end = 0
+        for end in self.ends:
+            max_end = max(max_end, end)
+            self.max_ends.append(max_end)
+        # Largest end within each block, used to skip over blocks
+        # without overlapping features (e.g. inside long genes).
+        self.block_max_ends = [
+            max(self.ends[i:i + BLOCK_SIZE])
+            for i in range(0, len(self.ends), BLOCK_SIZE)
+        ]
+
+    def __len__(self):
+        return len(self.lines)
+
+    def overlaps(self, start, end):
+        """Return lines overlapping [start, end] (1-based, inclusive)
+        in file order."""
+        found = []
+        i = bisect.bisect_right(self.starts, end)
+        while i > 0 and self.max_ends[i - 1] >= start:
+            block_start = ((i - 1) // BLOCK_SIZE) * BLOCK_SIZE
+            if self.block_max_ends[block_start // BLOCK_SIZE] >= start:
+                for j in range(i - 1, block_start - 1, -1):
+                    if self.ends[j] >= start:
+                        found.append(self.lines[j])
+            i = block_start
+        found.reverse()
+        return found
+
+
+class GtfIndex:
+    """Per-chromosome in-memory overlap indexes over a tabixed GTF.
+
+    Each chromosome is loaded with a single tabix call the first time it
+    is queried and kept for subsequent queries in the same container.
+    """
+    def __init__(self, file_path, max_chromosomes=MAX_CACHED_CHROMOSOMES):
+        self.file_path = file_path
+        self.max_chromosomes = max_chromosomes
+        self.chromosomes = OrderedDict()
+
+    def is_loaded(self, chrom):
+        return chrom in self.chromosomes
+
+    def get_chromosome(self, chrom):
+        intervals = self.chromosomes.pop(chrom, None)
+        if intervals is None:
+            while len(self.chromosomes) >= self.max_chromosomes:
+                self.chromosomes.popitem(last=False)
+            print(f"Loading {chrom} from {self.file_path}")
+            intervals = FeatureIntervals(tabix_lines(self.file_path, chrom))
+            print(f"Loaded {len(intervals)} features")
+        self.chromosomes[chrom] = intervals
+        return intervals
+
+    def overlaps(self, chrom, start, end):
+        return self.get_chromosome(chrom).overlaps(start, end)
+
+
+def _parse_features(lines):
+    features = []
+    for line in lines:
+        fields = line.split('\t', 5)
+        features.append((int(fields[3]), int(fields[4]), line))
+    # tabix output is already sorted, so this is a linear pass
+    features.sort(key=lambda feature: feature[0])
+    return features
+
+
+def get_transcript_id(line):
+    match = TRANSCRIPT_ID_PATTERN.search(line)
+    if match is not None:
+        return match.group(1)
+    return parse_attributes(line.split('\t', 9)[8]).get('transcript_id')
+
+
+def parse_attributes(field):
+    """Parse the attribute column of a GTF line into a dict of unquoted
+    values. Columns the fast pattern can't fully account for (e.g. with
+    escaped quotes) are parsed character by character instead."""
+    if ATTRIBUTES_PATTERN.fullmatch(field):
+        return {
+            key: quoted or unquoted
+            for key, quoted, unquoted in ATTRIBUTE_PATTERN.findall(field)
+        }
+    return _parse_attributes_slow(field)
+
+
+def _parse_attributes_slow(field):
+    attributes = {}
+    tokens = []
+    token = None
+    quoted = False
+    escaped = False
+    for char in field + ';':
+        if escaped:
+            token.append(char)
+            escaped = False
+        elif quoted:
+            if char == '\\':
+                escaped = True
+            elif char == '"':
+                quoted = False
+            else:
+                token.append(char)
+        elif char == '"':
+            quoted = True
+            if token is None:
+                token = []
+        elif char == ';' or char.isspace():
+            if token is not None:
+                tokens.append(''.join(token))
+                token = None
+            if char == ';' and tokens:
+                if len(tokens) != 2:
+                    raise ValueError(f"Expected two values, got"
+                                     f" {len(tokens)} from {field}")
+                attributes[tokens[0]] = tokens[1]
+                tokens = []
+        else:
+            if token is None:
+                token = []
+            token.append(char)
+    if quoted:
+        raise ValueError(f"Unterminated quote in {field}")
+    return attributes
+
+
+def sweep_overlaps(intervals, lines):
+    """Join (start, end) query intervals against GTF lines in one pass.
+
+    lines should cover the span of the intervals, as returned by a tabix
+    query over that span. Returns the overlapping lines of each interval,
+    in the order the intervals were given. Features that have ended are
+    dropped from a heap on their end, so besides sorting and the
+    overlaps themselves, each feature is only handled once.
+    """
+    features = _parse_features(lines)
+    order = sorted(range(len(intervals)), key=lambda i: intervals[i][0])
+    results = [None] * len(intervals)
+    # Feature index: feature, in the order features were added
+    active = {}
+    ends = []
+    next_feature = 0
+    for i in order:
+        start, end = intervals[i]
+        while (next_feature < len(features)
+               and features[next_feature][0] <= end):
+            active[next_feature] = features[next_feature]
+            heapq.heappush(ends, (features[next_feature][1], next_feature))
+            next_feature += 1
+        # Query starts only increase, so features ending before this one
+        # can't overlap any later query either.
+        while ends and ends[0][0] < start:
+            del active[heapq.heappop(ends)[1]]
+        results[i] = [
+            feature[2]
+            for feature in active.values()
+            if feature[0] <= end
+        ]
+    return results
+
+
+def tabix_lines(file_path, region):
+    args = [
+        'tabix',
+        file_path,
+        region,
+    ]
+    query_process = subprocess.Popen(args, stdout=subprocess.PIPE,
+                                     stderr=subprocess.PIPE, cwd='/tmp',
+                                     encoding='ascii')
+    output, _ = query_process.communicate()
+    return output.splitlines()
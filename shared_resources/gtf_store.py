@@ -0,0 +1,235 @@
+from array import array
+from collections import OrderedDict
+import gzip
+import json
+import mmap
+import struct
+import sys
+
+from gtf_index import BLOCK_SIZE, FeatureIntervals, parse_attributes
+
+
+MAGIC = b'SVEPGTF1'
+# Column offsets are aligned to this many bytes
+ALIGNMENT = 8
+NO_ID = 0xFFFFFFFF
+STRANDS = {
+    '+': 1,
+    '-': -1,
+}
+# name: array typecode
+COLUMNS = {
+    'starts': 'I',
+    'ends': 'I',
+    'maxEnds': 'I',
+    'blockMaxEnds': 'I',
+    'strands': 'b',
+    'geneIds': 'I',
+    'transcriptIds': 'I',
+    'lineOffsets': 'Q',
+    'lines': 'B',
+    'geneOffsets': 'Q',
+    'genes': 'B',
+    'transcriptOffsets': 'Q',
+    'transcripts': 'B',
+}
+
+
+class StringTable:
+    """Read-only sequence of strings stored as one blob and the offsets
+    of each string within it."""
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]]).decode()
+
+
+class StoredIntervals(FeatureIntervals):
+    """FeatureIntervals of one chromosome backed by slices of a mapped
+    GtfStore instead of parsed lines."""
+    def __init__(self, columns, first, count, first_block, blocks,
+                 genes, transcripts):
+        # Not calling the parent's __init__, which parses lines
+        last = first + count
+        self.starts = columns['starts'][first:last]
+        self.ends = columns['ends'][first:last]
+        self.max_ends = columns['maxEnds'][first:last]
+        self.block_max_ends = columns['blockMaxEnds'][
+            first_block:first_block + blocks]
+        self.strands = columns['strands'][first:last]
+        self.lines = StringTable(columns['lineOffsets'][first:last + 1],
+                                 columns['lines'])
+        self.gene_ids = columns['geneIds'][first:last]
+        self.transcript_ids = columns['transcriptIds'][first:last]
+        self.genes = genes
+        self.transcripts = transcripts
+
+    def get_gene_id(self, i):
+        gene = self.gene_ids[i]
+        return None if gene == NO_ID else self.genes[gene]
+
+    def get_transcript_id(self, i):
+        transcript = self.transcript_ids[i]
+        return None if transcript == NO_ID else self.transcripts[transcript]
+
+
+class GtfStore:
+    """Memory-mapped, pre-parsed GTF written by build_store.
+
+    Features of each chromosome are sorted by start, with columns of
+    their coordinates, strand, interned gene and transcript ids and
+    original line, so lookups are binary searches over the mapped file
+    and nothing is parsed when a container starts. Has the same overlap
+    interface as GtfIndex.
+    """
+    def __init__(self, file_path):
+        self.file_path = file_path
+        with open(file_path, 'rb') as store_file:
+            self.map = mmap.mmap(store_file.fileno(), 0,
+                                 access=mmap.ACCESS_READ)
+        if self.map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{file_path} is not a GTF store")
+        header_length, = struct.unpack_from('<Q', self.map, len(MAGIC))
+        header_start = len(MAGIC) + 8
+        header = json.loads(self.map[header_start:
+                                     header_start + header_length])
+        if header['byteOrder'] != sys.byteorder:
+            raise ValueError(f"{file_path} was built with"
+                             f" {header['byteOrder']} endian byte order")
+        if header['blockSize'] != BLOCK_SIZE:
+            raise ValueError(f"{file_path} was built with blocks of"
+                             f" {header['blockSize']} features")
+        data_start = _align(header_start + header_length)
+        view = memoryview(self.map)
+        self.columns = {
+            name: view[data_start + column['offset']:
+                       data_start + column['offset'] + column['size']].cast(
+                           COLUMNS[name])
+            for name, column in header['columns'].items()
+        }
+        self.genes = StringTable(self.columns['geneOffsets'],
+                                 self.columns['genes'])
+        self.transcripts = StringTable(self.columns['transcriptOffsets'],
+                                       self.columns['transcripts'])
+        self.chromosomes = header['chromosomes']
+        self.intervals = {}
+
+    def is_loaded(self, _):
+        return True
+
+    def get_chromosome(self, chrom):
+        intervals = self.intervals.get(chrom)
+        if intervals is None:
+            chromosome = self.chromosomes.get(chrom, {
+                'first': 0,
+                'count': 0,
+                'firstBlock': 0,
+                'blocks': 0,
+            })
+            intervals = StoredIntervals(
+                self.columns, chromosome['first'], chromosome['count'],
+                chromosome['firstBlock'], chromosome['blocks'], self.genes,
+                self.transcripts)
+            self.intervals[chrom] = intervals
+        return intervals
+
+    def overlaps(self, chrom, start, end):
+        return self.get_chromosome(chrom).overlaps(start, end)
+
+
+def _align(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _intern(value, ids, offsets, blob):
+    if value is None:
+        return NO_ID
+    index = ids.get(value)
+    if index is None:
+        index = len(ids)
+        ids[value] = index
+        blob.frombytes(value.encode())
+        offsets.append(len(blob))
+    return index
+
+
+def build_store(gtf_path, store_path):
+    """Convert a (optionally gzipped) GTF into a GtfStore file."""
+    chromosomes = OrderedDict()
+    open_gtf = gzip.open if gtf_path.endswith('.gz') else open
+    with open_gtf(gtf_path, 'rt') as gtf_file:
+        for line in gtf_file:
+            if line.startswith('#'):
+                continue
+            line = line.rstrip('\n')
+            fields = line.split('\t', 9)
+            chromosomes.setdefault(fields[0], []).append(
+                (int(fields[3]), int(fields[4]), fields[6], line, fields[8]))
+    columns = {
+        name: array(typecode)
+        for name, typecode in COLUMNS.items()
+    }
+    for name in ('lineOffsets', 'geneOffsets', 'transcriptOffsets'):
+        columns[name].append(0)
+    gene_ids = {}
+    transcript_ids = {}
+    chromosome_index = {}
+    for chrom, features in chromosomes.items():
+        features.sort(key=lambda feature: feature[0])
+        chromosome_index[chrom] = {
+            'first': len(columns['starts']),
+            'count': len(features),
+            'firstBlock': len(columns['blockMaxEnds']),
+            'blocks': -(-len(features) // BLOCK_SIZE),
+        }
+        max_end = 0
+        for i, (start, end, strand, line, attributes) in enumerate(features):
+            info = parse_attributes(attributes)
+            columns['starts'].append(start)
+            columns['ends'].append(end)
+            max_end = max(max_end, end)
+            columns['maxEnds'].append(max_end)
+            if i % BLOCK_SIZE == 0:
+                columns['blockMaxEnds'].append(end)
+            else:
+                columns['blockMaxEnds'][-1] = max(
+                    columns['blockMaxEnds'][-1], end)
+            columns['strands'].append(STRANDS.get(strand, 0))
+            columns['geneIds'].append(
+                _intern(info.get('gene_id'), gene_ids,
+                        columns['geneOffsets'], columns['genes']))
+            columns['transcriptIds'].append(
+                _intern(info.get('transcript_id'), transcript_ids,
+                        columns['transcriptOffsets'], columns['transcripts']))
+            columns['lines'].frombytes(line.encode())
+            columns['lineOffsets'].append(len(columns['lines']))
+    column_index = {}
+    offset = 0
+    for name, column in columns.items():
+        size = len(column) * column.itemsize
+        column_index[name] = {
+            'offset': offset,
+            'size': size,
+        }
+        offset = _align(offset + size)
+    header = json.dumps({
+        'blockSize': BLOCK_SIZE,
+        'byteOrder': sys.byteorder,
+        'chromosomes': chromosome_index,
+        'columns': column_index,
+    }).encode()
+    with open(store_path, 'wb') as store_file:
+        store_file.write(MAGIC)
+        store_file.write(struct.pack('<Q', len(header)))
+        store_file.write(header)
+        for name, column in columns.items():
+            store_file.write(b'\0' * (_align(store_file.tell())
+                                      - store_file.tell()))
+            column.tofile(store_file)
+    print(f"Wrote {len(columns['starts'])} features on {len(chromosomes)}"
+          f" chromosomes to {store_path}")
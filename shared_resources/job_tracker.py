@@ -0,0 +1,243 @@
+import os
+import sqlite3
+import threading
+import time
+
+import boto3
+
+
+# Optional environment variables
+JOB_TRACKER_DB = os.environ.get('JOB_TRACKER_DB', ':memory:')
+JOB_TRACKER_TABLE = os.environ.get('JOB_TRACKER_TABLE')
+
+COUNTER_FIELD = 'outstanding'
+EXPIRY_FIELD = 'expiresAt'
+JOB_ID_FIELD = 'jobId'
+# How long a job's counters are kept after they were last started
+JOB_LIFETIME_SECONDS = 7 * 24 * 60 * 60
+# Markers written with each counter update, as DynamoDB transactions
+# hold at most 100 items
+TRANSACTION_MARKERS = 99
+
+
+class DynamoDbTracker:
+    """Outstanding task counts kept as atomic counters in DynamoDB.
+
+    add_once and add_each_once only count a name once for each job, by
+    writing a marker item for it in the same transaction, so that
+    redelivered tasks don't count twice. claim sets a named flag on the
+    job, returning True only for the first caller, so that work
+    triggered by a job finishing happens once.
+    """
+    def __init__(self, table_name):
+        self.table_name = table_name
+        self.dynamodb = boto3.client('dynamodb')
+
+    def add(self, job_id, delta):
+        kwargs = {
+            'TableName': self.table_name,
+            'Key': {
+                JOB_ID_FIELD: {'S': job_id},
+            },
+            'UpdateExpression': (f'ADD {COUNTER_FIELD} :delta'
+                                 f' SET {EXPIRY_FIELD} = :expires'),
+            'ExpressionAttributeValues': {
+                ':delta': {'N': str(delta)},
+                ':expires': {
+                    'N': str(int(time.time()) + JOB_LIFETIME_SECONDS),
+                },
+            },
+            'ReturnValues': 'UPDATED_NEW',
+        }
+        response = self.dynamodb.update_item(**kwargs)
+        return int(response['Attributes'][COUNTER_FIELD]['N'])
+
+    def _add_each_once(self, job_id, names, delta):
+        """Count names in one transaction. Returns False, without
+        counting any of them, if any was already counted."""
+        expires = {
+            'N': str(int(time.time()) + JOB_LIFETIME_SECONDS),
+        }
+        markers = [
+            {
+                'Put': {
+                    'TableName': self.table_name,
+                    'Item': {
+                        JOB_ID_FIELD: {'S': get_marker_id(job_id, name)},
+                        EXPIRY_FIELD: expires,
+                    },
+                    'ConditionExpression': (
+                        f'attribute_not_exists({JOB_ID_FIELD})'),
+                },
+            }
+            for name in names
+        ]
+        try:
+            self.dynamodb.transact_write_items(TransactItems=markers + [
+                {
+                    'Update': {
+                        'TableName': self.table_name,
+                        'Key': {
+                            JOB_ID_FIELD: {'S': job_id},
+                        },
+                        'UpdateExpression': (
+                            f'ADD {COUNTER_FIELD} :delta'
+                            f' SET {EXPIRY_FIELD} = :expires'),
+                        'ExpressionAttributeValues': {
+                            ':delta': {'N': str(delta * len(names))},
+                            ':expires': expires,
+                        },
+                    },
+                },
+            ])
+        except self.dynamodb.exceptions.TransactionCanceledException as e:
+            reasons = e.response.get('CancellationReasons', [])
+            if not any(reason.get('Code') == 'ConditionalCheckFailed'
+                       for reason in reasons):
+                raise
+            return False
+        return True
+
+    def add_each_once(self, job_id, names, delta):
+        for i in range(0, len(names), TRANSACTION_MARKERS):
+            batch = names[i:i + TRANSACTION_MARKERS]
+            if self._add_each_once(job_id, batch, delta):
+                continue
+            # Some were already counted, so count them one at a time
+            for name in batch:
+                if len(batch) == 1 or not self._add_each_once(
+                        job_id, [name], delta):
+                    print(f"{name} was already counted for {job_id}")
+        return self.get(job_id)
+
+    def add_once(self, job_id, name, delta):
+        return self.add_each_once(job_id, [name], delta)
+
+    def claim(self, job_id, name):
+        try:
+            self.dynamodb.update_item(
+                TableName=self.table_name,
+                Key={
+                    JOB_ID_FIELD: {'S': job_id},
+                },
+                UpdateExpression='SET #claim = :claimed',
+                ConditionExpression='attribute_not_exists(#claim)',
+                ExpressionAttributeNames={
+                    '#claim': name,
+                },
+                ExpressionAttributeValues={
+                    ':claimed': {'BOOL': True},
+                },
+            )
+        except self.dynamodb.exceptions.ConditionalCheckFailedException:
+            return False
+        return True
+
+    def get(self, job_id):
+        response = self.dynamodb.get_item(
+            TableName=self.table_name,
+            Key={
+                JOB_ID_FIELD: {'S': job_id},
+            },
+            ConsistentRead=True,
+        )
+        item = response.get('Item', {})
+        return int(item.get(COUNTER_FIELD, {'N': '0'})['N'])
+
+
+class SqliteTracker:
+    """Outstanding task counts in SQLite, for running locally and in
+    tests. The default in-memory database is only shared within a
+    process."""
+    def __init__(self, database=JOB_TRACKER_DB):
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(database, check_same_thread=False,
+                                          isolation_level=None)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS jobs'
+            ' (job_id TEXT PRIMARY KEY, outstanding INTEGER NOT NULL)')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS claims'
+            ' (job_id TEXT, name TEXT, PRIMARY KEY (job_id, name))')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS counted'
+            ' (job_id TEXT, name TEXT, PRIMARY KEY (job_id, name))')
+
+    def add(self, job_id, delta):
+        with self.lock:
+            cursor = self.connection.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            try:
+                cursor.execute('INSERT OR IGNORE INTO jobs VALUES (?, 0)',
+                               (job_id,))
+                cursor.execute('UPDATE jobs SET outstanding = outstanding + ?'
+                               ' WHERE job_id = ?', (delta, job_id))
+                cursor.execute('SELECT outstanding FROM jobs'
+                               ' WHERE job_id = ?', (job_id,))
+                outstanding, = cursor.fetchone()
+            except sqlite3.Error:
+                cursor.execute('ROLLBACK')
+                raise
+            cursor.execute('COMMIT')
+        return outstanding
+
+    def add_each_once(self, job_id, names, delta):
+        with self.lock:
+            cursor = self.connection.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            try:
+                cursor.execute('INSERT OR IGNORE INTO jobs VALUES (?, 0)',
+                               (job_id,))
+                for name in names:
+                    cursor.execute('INSERT OR IGNORE INTO counted'
+                                   ' VALUES (?, ?)', (job_id, name))
+                    if cursor.rowcount == 1:
+                        cursor.execute('UPDATE jobs'
+                                       ' SET outstanding = outstanding + ?'
+                                       ' WHERE job_id = ?', (delta, job_id))
+                    else:
+                        print(f"{name} was already counted for {job_id}")
+                cursor.execute('SELECT outstanding FROM jobs'
+                               ' WHERE job_id = ?', (job_id,))
+                outstanding, = cursor.fetchone()
+            except sqlite3.Error:
+                cursor.execute('ROLLBACK')
+                raise
+            cursor.execute('COMMIT')
+        return outstanding
+
+    def add_once(self, job_id, name, delta):
+        return self.add_each_once(job_id, [name], delta)
+
+    def claim(self, job_id, name):
+        with self.lock:
+            cursor = self.connection.execute(
+                'INSERT OR IGNORE INTO claims VALUES (?, ?)', (job_id, name))
+        return cursor.rowcount == 1
+
+    def get(self, job_id):
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT outstanding FROM jobs WHERE job_id = ?',
+                (job_id,)).fetchone()
+        return row[0] if row else 0
+
+
+def get_job_id(temp_file_name):
+    """Tasks are named after the request that started them, followed by
+    underscore separated parts."""
+    return temp_file_name.split('_', 1)[0]
+
+
+def get_marker_id(job_id, name):
+    """Key of the item recording that name was counted for a job."""
+    return f'{job_id}#{name}'
+
+
+def get_tracker():
+    if JOB_TRACKER_TABLE:
+        return DynamoDbTracker(JOB_TRACKER_TABLE)
+    return SqliteTracker()
+
+
+tracker = get_tracker()
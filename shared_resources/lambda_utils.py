@@ -1,21 +1,247 @@
+import hashlib
 import os
-import shutil
 import json
 import math
+import time
+import uuid
 
 import boto3
 
+from job_tracker import get_job_id, tracker
+import payload_codec
 
-# AWS clients and resources
-s3 = boto3.resource('s3')
-sns = boto3.client('sns')
 
 # Optional environment variables
+CONCAT_SNS_TOPIC_ARN = os.environ.get('CONCAT_SNS_TOPIC_ARN')
+# For pointing at a local S3 stand-in
+S3_ENDPOINT_URL = os.environ.get('S3_ENDPOINT_URL')
 SVEP_TEMP = os.environ.get('SVEP_TEMP')
 
+# AWS clients and resources
+s3 = boto3.resource('s3', endpoint_url=S3_ENDPOINT_URL)
+sns = boto3.client('sns')
+sqs = boto3.client('sqs')
+
+# Messages longer than this are stored in SVEP_TEMP under
+# CLAIM_CHECK_PREFIX, and only their location is sent.
+CLAIM_CHECK_FIELD = 'claimCheck'
+CLAIM_CHECK_PREFIX = 'messages/'
+CLAIM_CHECK_THRESHOLD = 100000
+# Claimed by whichever function triggers concat for a job
+CONCAT_CLAIM = 'concatTriggered'
 MAX_PRINT_LENGTH = 1024
 MAX_SNS_EVENT_PRINT_LENGTH = 2048
 TEMP_FILE_FIELD = 'tempFileName'
+# Limits of a single SNS PublishBatch call
+PUBLISH_BATCH_ENTRIES = 10
+PUBLISH_BATCH_BYTES = 262144
+PUBLISH_BATCH_RETRIES = 3
+REFERENCE_CACHE_DIR = '/tmp/reference_cache'
+REFERENCE_CACHE_BUDGET = int(
+    os.environ.get('REFERENCE_CACHE_MB', '400')) * 1024 * 1024
+# How long a cached reference is trusted before its ETag is checked again
+REFERENCE_REVALIDATE_SECONDS = 300
+
+
+class BatchPublisher:
+    """Buffers SNS messages per topic and sends them with PublishBatch.
+
+    Functions started through the publisher are counted in the job
+    tracker with one update per job, always before the messages that
+    start them are sent. Each is counted once, however many times the
+    function starting it runs. Use as a context manager so everything left in
+    the buffers is sent on exit.
+    """
+    def __init__(self, max_length=MAX_PRINT_LENGTH):
+        self.max_length = max_length
+        self.messages = {}
+        self.started = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+
+    def _start_tasks(self):
+        started = self.started
+        self.started = {}
+        for job_id, filenames in started.items():
+            print(f"Starting {len(filenames)} tasks for {job_id}")
+            tracker.add_each_once(job_id, [
+                get_start_marker(filename)
+                for filename in filenames
+            ], 1)
+
+    def _publish_batch(self, topic_arn, messages):
+        entries = {
+            str(i): message_entry
+            for i, message_entry in enumerate(messages)
+        }
+        for attempt in range(PUBLISH_BATCH_RETRIES + 1):
+            if attempt:
+                time.sleep(0.1 * 2**attempt)
+            response = sns.publish_batch(
+                TopicArn=topic_arn,
+                PublishBatchRequestEntries=[
+                    dict(Id=entry_id, **message_entry)
+                    for entry_id, message_entry in entries.items()
+                ],
+            )
+            failed = response.get('Failed', [])
+            if not failed:
+                return
+            print(f"Failed to publish {len(failed)} messages: {failed}")
+            if any(failure['SenderFault'] for failure in failed):
+                break
+            entries = {
+                failure['Id']: entries[failure['Id']]
+                for failure in failed
+            }
+        raise IOError(f"Could not publish {len(entries)} messages to"
+                      f" {topic_arn}")
+
+    def add_task(self, filename):
+        self.started.setdefault(get_job_id(filename), []).append(filename)
+
+    def flush(self, topic_arn=None):
+        self._start_tasks()
+        topic_arns = list(self.messages) if topic_arn is None else [topic_arn]
+        for topic_arn in topic_arns:
+            messages = self.messages.pop(topic_arn, [])
+            batch = []
+            batch_size = 0
+            for message_entry, message_size in messages:
+                if batch and (len(batch) == PUBLISH_BATCH_ENTRIES
+                              or batch_size + message_size
+                              > PUBLISH_BATCH_BYTES):
+                    self._publish_batch(topic_arn, batch)
+                    batch = []
+                    batch_size = 0
+                batch.append(message_entry)
+                batch_size += message_size
+            if batch:
+                self._publish_batch(topic_arn, batch)
+
+    def publish(self, topic_arn, message, attributes=None):
+        message_entry = _get_publish_kwargs(message, attributes)
+        truncated_print(f"Queueing for SNS: {topic_arn}"
+                        f" {json.dumps(message_entry)}", self.max_length)
+        messages = self.messages.setdefault(topic_arn, [])
+        messages.append((message_entry, _get_publish_size(message_entry)))
+        if len(messages) >= PUBLISH_BATCH_ENTRIES:
+            self.flush(topic_arn)
+
+
+class ReferenceCache:
+    """Keeps reference files in /tmp across warm invocations.
+
+    Files are stored under REFERENCE_CACHE_DIR by bucket and key, next to
+    a .meta file recording the object's ETag, size and last use. Entries
+    are revalidated against S3 by ETag, verified after download, and the
+    least recently used ones are evicted to keep the cache within its
+    budget. Files fetched during the current invocation, or kept for the
+    life of the process, are never evicted.
+    """
+    def __init__(self, directory=REFERENCE_CACHE_DIR,
+                 budget=REFERENCE_CACHE_BUDGET):
+        self.directory = directory
+        self.budget = budget
+        self.kept = set()
+        self.pinned = set()
+
+    def _download(self, bucket, key, local_path, head=None):
+        if head is None:
+            head = s3.meta.client.head_object(Bucket=bucket, Key=key)
+        etag = head['ETag']
+        size = head['ContentLength']
+        self._evict(size, local_path)
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        part_path = f'{local_path}.part'
+        print(f"Downloading s3://{bucket}/{key} ({size} bytes)")
+        s3.Bucket(bucket).download_file(key, part_path)
+        _verify_download(part_path, etag, size)
+        os.replace(part_path, local_path)
+        now = time.time()
+        self._write_meta(local_path, {
+            'etag': etag,
+            'size': size,
+            'validated': now,
+            'lastUsed': now,
+        })
+
+    def _evict(self, incoming_size, incoming_path):
+        entries = []
+        total_size = 0
+        for root, _, files in os.walk(self.directory):
+            for file_name in files:
+                if not file_name.endswith('.meta'):
+                    continue
+                local_path = os.path.join(root, file_name[:-len('.meta')])
+                meta = self._read_meta(local_path)
+                if (meta is None or local_path == incoming_path
+                        or not os.path.exists(local_path)):
+                    continue
+                total_size += meta['size']
+                if (local_path not in self.pinned
+                        and local_path not in self.kept):
+                    entries.append((meta['lastUsed'], meta['size'],
+                                    local_path))
+        entries.sort()
+        while entries and total_size + incoming_size > self.budget:
+            _, size, local_path = entries.pop(0)
+            print(f"Evicting {local_path} from the reference cache")
+            for path in (local_path, f'{local_path}.meta'):
+                if os.path.exists(path):
+                    os.remove(path)
+            total_size -= size
+        if total_size + incoming_size > self.budget:
+            print("WARNING: Reference cache is over budget with"
+                  f" {total_size + incoming_size} bytes")
+
+    @staticmethod
+    def _read_meta(local_path):
+        try:
+            with open(f'{local_path}.meta') as meta_file:
+                return json.load(meta_file)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_meta(local_path, meta):
+        with open(f'{local_path}.meta', 'w') as meta_file:
+            json.dump(meta, meta_file)
+
+    def fetch(self, bucket, key, keep=False):
+        """Return the local path of s3://bucket/key, downloading it if
+        it isn't cached or has changed. Files opened once for the life
+        of the process, rather than by an invocation, should be kept."""
+        local_path = os.path.join(self.directory, bucket, key)
+        (self.kept if keep else self.pinned).add(local_path)
+        meta = self._read_meta(local_path)
+        now = time.time()
+        head = None
+        cached = (
+            meta is not None
+            and os.path.exists(local_path)
+            and os.path.getsize(local_path) == meta['size']
+        )
+        if cached and now - meta['validated'] > REFERENCE_REVALIDATE_SECONDS:
+            head = s3.meta.client.head_object(Bucket=bucket, Key=key)
+            cached = head['ETag'] == meta['etag']
+            meta['validated'] = now
+        if cached:
+            meta['lastUsed'] = now
+            self._write_meta(local_path, meta)
+        else:
+            self._download(bucket, key, local_path, head)
+        return local_path
+
+
+    def unpin(self):
+        """Let files fetched by earlier invocations be evicted."""
+        self.pinned.clear()
 
 
 class Timer:
@@ -29,18 +255,27 @@ class Timer:
 
 class Orchestrator:
     def __init__(self, event):
+        reference_cache.unpin()
         self.message = get_sns_event(event)
         self.temp_file_name = self.message[TEMP_FILE_FIELD]
-        # A flag to ensure that the temp file is deleted at the end of
-        # the function.
+        self.job_id = get_job_id(self.temp_file_name)
+        # A flag to ensure that the task is marked as complete at the end
+        # of the function.
         self.completed = False
 
     def __del__(self):
         assert self.completed, "Must call mark_completed at end of function."
 
     def mark_completed(self):
-        print(f"Deleting file: {self.temp_file_name}")
-        s3.Object(SVEP_TEMP, self.temp_file_name).delete()
+        print(f"Completing task: {self.temp_file_name}")
+        # Tasks can be delivered more than once, so each is only counted
+        # the first time. Later runs still trigger concat if it was
+        # missed, which trigger_concat only does once.
+        remaining = tracker.add_once(self.job_id, self.temp_file_name, -1)
+        print(f"{remaining} tasks remaining for {self.job_id}")
+        if remaining == 0:
+            # This was the last task of the job
+            trigger_concat(self.job_id)
         self.completed = True
 
 
@@ -48,6 +283,31 @@ def _get_function_name_from_arn(arn):
     return arn.split(':')[-1]
 
 
+def _get_publish_kwargs(message, attributes=None):
+    kwargs = {
+        'Message': encode_message(message),
+    }
+    if attributes:
+        kwargs['MessageAttributes'] = {
+            name: {
+                'DataType': 'String',
+                'StringValue': value,
+            }
+            for name, value in attributes.items()
+        }
+    return kwargs
+
+
+def _get_publish_size(kwargs):
+    """Size counted against SNS's limits, which includes the names,
+    types and values of message attributes."""
+    return len(kwargs['Message'].encode()) + sum(
+        len(name.encode()) + len(attribute['DataType'].encode())
+        + len(attribute['StringValue'].encode())
+        for name, attribute in kwargs.get('MessageAttributes', {}).items()
+    )
+
+
 def _truncate_string(string, max_length=MAX_PRINT_LENGTH):
     length = len(string)
 
@@ -94,50 +354,114 @@ def generate_presigned_get_url(bucket, key, expires=3600):
     return response
 
 
-def download_vcf(bucket, vcf):
+def decode_message(body):
+    """Decode a message body, fetching it first if it was checked in."""
+    message = payload_codec.decode(body)
+    if CLAIM_CHECK_FIELD in message:
+        claim_check = message[CLAIM_CHECK_FIELD]
+        print(f"Fetching message from s3://{claim_check['bucket']}/"
+              f"{claim_check['key']}")
+        obj = s3.Object(claim_check['bucket'], claim_check['key'])
+        message = payload_codec.decode(obj.get()['Body'].read().decode())
+    return message
+
+
+def encode_message(message):
+    """Encode a message body, checking it in to SVEP_TEMP if it's too
+    long to send directly."""
+    body = payload_codec.encode(message)
+    if len(body) <= CLAIM_CHECK_THRESHOLD:
+        return body
+    key = f'{CLAIM_CHECK_PREFIX}{uuid.uuid4().hex}'
+    print(f"Storing {len(body)} byte message at s3://{SVEP_TEMP}/{key}")
+    s3.Object(SVEP_TEMP, key).put(Body=body.encode())
+    return payload_codec.encode({
+        CLAIM_CHECK_FIELD: {
+            'bucket': SVEP_TEMP,
+            'key': key,
+        },
+    })
+
+
+def download_vcf(bucket, vcf, keep=False):
+    """Fetch a tabixed file and its index into the reference cache and
+    return the local path of the file."""
     keys = [
         vcf,
         f'{vcf}.tbi',
     ]
-    for key in keys:
-        local_file_name = f'/tmp/{key}'
-        s3.Bucket(bucket).download_file(key, local_file_name)
+    local_paths = [
+        reference_cache.fetch(bucket, key, keep)
+        for key in keys
+    ]
+    return local_paths[0]
+
+
+def _verify_download(local_path, etag, size):
+    actual_size = os.path.getsize(local_path)
+    if actual_size != size:
+        os.remove(local_path)
+        raise IOError(f"Downloaded {actual_size} bytes of {local_path},"
+                      f" expected {size}")
+    etag = etag.strip('"')
+    if '-' in etag:
+        # Multipart ETags aren't a plain MD5 of the content
+        return
+    md5 = hashlib.md5()
+    with open(local_path, 'rb') as local_file:
+        for block in iter(lambda: local_file.read(2**20), b''):
+            md5.update(block)
+    if md5.hexdigest() != etag:
+        os.remove(local_path)
+        raise IOError(f"Checksum of {local_path} does not match its ETag")
 
 
-def _create_temp_file(filename):
-    print(f"Creating file: {filename}")
-    s3.Object(SVEP_TEMP, filename).put(Body=b'')
+def print_event(event, max_length=MAX_PRINT_LENGTH):
+    truncated_print(f"Event Received: {json.dumps(event)}", max_length)
 
 
-def clear_tmp():
-    for file_name in os.listdir('/tmp'):
-        file_path = f'/tmp/{file_name}'
-        if os.path.isfile(file_path):
-            os.unlink(file_path)
-        elif os.path.isdir(file_path):
-            shutil.rmtree(file_path)
+def get_start_marker(filename):
+    """Name under which the start of a task is counted, apart from its
+    completion."""
+    return f'start#{filename}'
 
 
-def print_event(event, max_length=MAX_PRINT_LENGTH):
-    truncated_print(f"Event Received: {json.dumps(event)}", max_length)
+def get_sns_event(event, max_length=MAX_SNS_EVENT_PRINT_LENGTH):
+    print_event(event, max_length)
+    return decode_message(event['Records'][0]['Sns']['Message'])
 
 
-def get_sns_event(event, max_length=MAX_SNS_EVENT_PRINT_LENGTH):
+def get_sqs_event(event, max_length=MAX_SNS_EVENT_PRINT_LENGTH):
     print_event(event, max_length)
-    return json.loads(event['Records'][0]['Sns']['Message'])
+    return json.loads(event['Records'][0]['body'])
 
 
-def sns_publish(topic_arn, message, max_length=MAX_PRINT_LENGTH):
+def sns_publish(topic_arn, message, max_length=MAX_PRINT_LENGTH,
+                attributes=None):
     kwargs = {
         'TopicArn': topic_arn,
-        'Message': json.dumps(message, separators=(',', ':')),
+        **_get_publish_kwargs(message, attributes),
     }
     truncated_print(f"Publishing to SNS: {json.dumps(kwargs)}", max_length)
     sns.publish(**kwargs)
 
 
+def sqs_send(queue_url, message, delay_seconds=0,
+             max_length=MAX_PRINT_LENGTH):
+    kwargs = {
+        'QueueUrl': queue_url,
+        'MessageBody': json.dumps(message, separators=(',', ':')),
+        'DelaySeconds': delay_seconds,
+    }
+    truncated_print(f"Sending to SQS: {json.dumps(kwargs)}", max_length)
+    sqs.send_message(**kwargs)
+
+
 def start_function(topic_arn, base_filename, message, resend=False,
-                   max_length=MAX_PRINT_LENGTH):
+                   max_length=MAX_PRINT_LENGTH, publisher=None,
+                   attributes=None):
+    """Start a function through its SNS topic. attributes are sent as
+    string message attributes, e.g. for subscription filter policies."""
     assert TEMP_FILE_FIELD not in message
     function_name = _get_function_name_from_arn(topic_arn)
     if resend:
@@ -147,8 +471,25 @@ def start_function(topic_arn, base_filename, message, resend=False,
     else:
         filename = f'{base_filename}_{function_name}'
     message[TEMP_FILE_FIELD] = filename
-    _create_temp_file(filename)
-    sns_publish(topic_arn, message, max_length)
+    if publisher is not None:
+        publisher.add_task(filename)
+        publisher.publish(topic_arn, message, attributes)
+    else:
+        print(f"Starting task: {filename}")
+        tracker.add_once(get_job_id(filename), get_start_marker(filename), 1)
+        sns_publish(topic_arn, message, max_length, attributes)
+
+
+def trigger_concat(job_id):
+    """Start concatenating the results of a job, unless something else
+    already has. Returns whether this call started it."""
+    if not tracker.claim(job_id, CONCAT_CLAIM):
+        print(f"Concat was already triggered for {job_id}")
+        return False
+    sns_publish(CONCAT_SNS_TOPIC_ARN, {
+        'APIid': job_id,
+    })
+    return True
 
 
 def truncated_print(string, max_length=MAX_PRINT_LENGTH):
@@ -156,3 +497,6 @@ def truncated_print(string, max_length=MAX_PRINT_LENGTH):
         string = _truncate_string(string, max_length)
         assert len(string) <= max_length
     print(string)
+
+
+reference_cache = ReferenceCache()
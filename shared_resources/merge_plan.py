@@ -0,0 +1,83 @@
+from job_tracker import tracker
+
+
+# Claimed by whichever merge starts its parent
+PARENT_CLAIM = 'parentStarted'
+
+
+class MergePlan:
+    """Fan-in tree over the result parts of a job, fixed before merging
+    starts so that every merge can work out its inputs and when its
+    parent is ready.
+
+    Level 0 is the parts themselves, and level 1 merges groups of them
+    chosen by concat. Node i of each following level merges nodes
+    i * fan_in up to (i + 1) * fan_in - 1 of the level below, until a
+    level has at most fan_in nodes, which are merged into the result.
+    Jobs with a single group of parts have no other levels.
+    """
+    def __init__(self, api_id, level_sizes, fan_in):
+        self.api_id = api_id
+        self.level_sizes = level_sizes
+        self.fan_in = fan_in
+
+    @classmethod
+    def from_message(cls, message):
+        return cls(message['APIid'], message['levels'], message['fanIn'])
+
+    @classmethod
+    def from_group_count(cls, api_id, part_count, group_count, fan_in):
+        level_sizes = [part_count]
+        if group_count > 1:
+            level_sizes.append(group_count)
+            while level_sizes[-1] > fan_in:
+                level_sizes.append(-(-level_sizes[-1] // fan_in))
+        return cls(api_id, level_sizes, fan_in)
+
+    @property
+    def top_level(self):
+        return len(self.level_sizes) - 1
+
+    def get_children(self, level, index):
+        """Return the indexes of the nodes of the level below that a
+        node merges."""
+        return range(index * self.fan_in,
+                     min((index + 1) * self.fan_in,
+                         self.level_sizes[level - 1]))
+
+    def get_top_keys(self):
+        """Return the keys of the nodes merged into the result, for
+        plans with more than the parts."""
+        return [
+            self.get_key(self.top_level, i)
+            for i in range(self.level_sizes[self.top_level])
+        ]
+
+    def get_key(self, level, index):
+        return f'{self.get_prefix(level)}{index:06d}.tsv'
+
+    def get_prefix(self, level):
+        return f'{self.api_id}-merge/{level}/'
+
+    def mark_merged(self, level, index):
+        """Record that a node has been merged. Returns True for exactly
+        one of the nodes sharing a parent, once all of them have been,
+        with the top level sharing the result as its parent. Nodes
+        merged more than once, as redelivered messages can be, are only
+        counted once."""
+        if level == self.top_level:
+            siblings = self.level_sizes[level]
+            parent_id = f'{self.api_id}-merge-result'
+        else:
+            parent = index // self.fan_in
+            siblings = len(self.get_children(level + 1, parent))
+            parent_id = f'{self.api_id}-merge-{level + 1}-{parent}'
+        merged = tracker.add_once(parent_id, self.get_key(level, index), 1)
+        return merged == siblings and tracker.claim(parent_id, PARENT_CLAIM)
+
+    def to_message(self):
+        return {
+            'APIid': self.api_id,
+            'levels': self.level_sizes,
+            'fanIn': self.fan_in,
+        }
@@ -0,0 +1,77 @@
+import io
+
+# Not in the Lambda runtime, functions that write Parquet have the AWS
+# SDK for pandas layer.
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+COMPRESSION = 'zstd'
+# Rows of a chromosome written to a row group at a time
+MAX_ROW_GROUP_ROWS = 1000000
+DICTIONARY_STRING = pa.dictionary(pa.int32(), pa.string())
+# Columns of result rows, with the chrom:start-end column split in three
+SCHEMA = pa.schema([
+    ('chrom', DICTIONARY_STRING),
+    ('start', pa.int64()),
+    ('end', pa.int64()),
+    ('rank', pa.int32()),
+    ('id', DICTIONARY_STRING),
+    ('alt', pa.string()),
+    ('consequence', DICTIONARY_STRING),
+    ('gene_name', DICTIONARY_STRING),
+    ('gene_id', DICTIONARY_STRING),
+    ('feature', DICTIONARY_STRING),
+    ('transcript', DICTIONARY_STRING),
+    ('biotype', DICTIONARY_STRING),
+    ('exon_number', DICTIONARY_STRING),
+    ('amino_acids', pa.string()),
+    ('codons', pa.string()),
+    ('strand', DICTIONARY_STRING),
+    ('support_level', DICTIONARY_STRING),
+    ('warning', pa.string()),
+])
+# Fields of a row, after rank
+TEXT_FIELD_COUNT = len(SCHEMA) - 4
+
+
+def _get_table(rows):
+    columns = [[] for _ in SCHEMA]
+    for chrom, start, end, line in rows:
+        fields = line.split('\t')
+        del fields[2]
+        fields += [None] * (TEXT_FIELD_COUNT + 1 - len(fields))
+        values = [chrom, start, end, int(fields[0])] + fields[1:]
+        for column, value in zip(columns, values):
+            column.append(value)
+    arrays = [
+        (pa.array(column, type=pa.string()).dictionary_encode()
+         if field.type == DICTIONARY_STRING
+         else pa.array(column, type=field.type))
+        for column, field in zip(columns, SCHEMA)
+    ]
+    return pa.Table.from_arrays(arrays, schema=SCHEMA)
+
+
+def write_parquet(rows):
+    """Return a Parquet file of (chrom, start, end, line) result rows,
+    with a row group for each chromosome, split further if it has more
+    than MAX_ROW_GROUP_ROWS."""
+    sink = io.BytesIO()
+    row_count = 0
+    with pq.ParquetWriter(sink, SCHEMA, compression=COMPRESSION,
+                          use_dictionary=True) as writer:
+        row_group = []
+        for row in rows:
+            if row_group and (row[0] != row_group[-1][0]
+                              or len(row_group) == MAX_ROW_GROUP_ROWS):
+                writer.write_table(_get_table(row_group),
+                                   row_group_size=len(row_group))
+                row_group = []
+            row_group.append(row)
+            row_count += 1
+        if row_group:
+            writer.write_table(_get_table(row_group),
+                               row_group_size=len(row_group))
+    print(f"Wrote {row_count} rows to Parquet")
+    return sink.getvalue()
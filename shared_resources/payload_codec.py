@@ -0,0 +1,99 @@
+import base64
+import json
+import zlib
+
+
+# Encoded messages start with this, followed by the format version
+PREFIX = 'svep:'
+VERSION = 1
+# Messages shorter than this as JSON are left as JSON
+MIN_ENCODED_LENGTH = 1024
+# Lists of variant records that are sent as columns, if every record
+# has exactly RECORD_FIELDS. Other lists are sent as they are, so that no
+# field is lost.
+COLUMNAR_FIELDS = (
+    'snsData',
+)
+RECORD_FIELDS = ('chrom', 'pos', 'ref', 'alt', 'data')
+
+
+def _to_columns(records):
+    """Pack records into one list per field, with chromosomes and the
+    overlapping GTF lines (largely shared between neighbouring variants)
+    replaced by indexes into lists of unique values."""
+    chroms = {}
+    lines = {}
+    columns = {
+        'chroms': [],
+        'lines': [],
+    }
+    columns.update((field, []) for field in RECORD_FIELDS)
+    for record in records:
+        chrom = record['chrom']
+        if chrom not in chroms:
+            chroms[chrom] = len(chroms)
+            columns['chroms'].append(chrom)
+        columns['chrom'].append(chroms[chrom])
+        columns['pos'].append(int(record['pos']))
+        columns['ref'].append(record['ref'])
+        columns['alt'].append(record['alt'])
+        line_indexes = []
+        for line in record['data']:
+            if line not in lines:
+                lines[line] = len(lines)
+                columns['lines'].append(line)
+            line_indexes.append(lines[line])
+        columns['data'].append(line_indexes)
+    return columns
+
+
+def _is_columnar(records):
+    return all(
+        isinstance(record, dict) and record.keys() == set(RECORD_FIELDS)
+        for record in records
+    )
+
+
+def _from_columns(columns):
+    chroms = columns['chroms']
+    lines = columns['lines']
+    return [
+        {
+            'chrom': chroms[chrom],
+            'pos': str(pos),
+            'ref': ref,
+            'alt': alt,
+            'data': [lines[i] for i in line_indexes],
+        }
+        for chrom, pos, ref, alt, line_indexes in zip(
+            *(columns[field] for field in RECORD_FIELDS))
+    ]
+
+
+def decode(body):
+    """Decode a message body, which may also be plain JSON."""
+    if not body.startswith(PREFIX):
+        return json.loads(body)
+    version, data = body[len(PREFIX):].split(':', 1)
+    if int(version) != VERSION:
+        raise ValueError(f"Unsupported message version {version}")
+    message = json.loads(zlib.decompress(base64.b64decode(data)))
+    for field in COLUMNAR_FIELDS:
+        # Packed columns are an object rather than a list of records
+        if isinstance(message.get(field), dict):
+            message[field] = _from_columns(message[field])
+    return message
+
+
+def encode(message):
+    body = json.dumps(message, separators=(',', ':'))
+    if len(body) < MIN_ENCODED_LENGTH:
+        return body
+    packed = dict(message)
+    for field in COLUMNAR_FIELDS:
+        if field in packed and _is_columnar(packed[field]):
+            packed[field] = _to_columns(packed[field])
+    data = zlib.compress(json.dumps(packed, separators=(',', ':')).encode(),
+                         9)
+    encoded = f'{PREFIX}{VERSION}:{base64.b64encode(data).decode()}'
+    return encoded if len(encoded) < len(body) else body
@@ -0,0 +1,186 @@
+import bisect
+import gzip
+import mmap
+import re
+import struct
+
+
+# UCSC .2bit format, https://genome.ucsc.edu/FAQ/FAQformat.html#format7
+SIGNATURE = 0x1A412743
+BASES = 'TCAG'
+# Packed bases of every possible byte, four to a byte, most significant
+# bits first.
+BYTE_BASES = [
+    ''.join(BASES[(byte >> shift) & 3] for shift in (6, 4, 2, 0))
+    for byte in range(256)
+]
+BASE_DIGITS = str.maketrans('TCAGtcag', '01230123')
+MASK_PATTERN = re.compile('[a-z]+')
+N_PATTERN = re.compile('[^ACGTacgt]+')
+# Bases packed at a time when building
+PACK_CHUNK_SIZE = 1 << 20
+
+
+class ReferenceSequence:
+    """Memory-mapped reader of a .2bit file, e.g. one chromosome of the
+    reference converted by build_2bit.
+
+    Coordinates are 1-based and inclusive, as with samtools faidx.
+    """
+    def __init__(self, file_path):
+        self.file_path = file_path
+        with open(file_path, 'rb') as sequence_file:
+            self.map = mmap.mmap(sequence_file.fileno(), 0,
+                                 access=mmap.ACCESS_READ)
+        for byte_order in '<>':
+            signature, version, count, _ = struct.unpack_from(
+                f'{byte_order}4I', self.map, 0)
+            if signature == SIGNATURE:
+                break
+        else:
+            raise ValueError(f"{file_path} is not a .2bit file")
+        if version != 0:
+            raise ValueError(f"Unsupported .2bit version {version}")
+        self.byte_order = byte_order
+        self.offsets = {}
+        position = 16
+        for _ in range(count):
+            name_size = self.map[position]
+            name = self.map[position + 1:position + 1 + name_size].decode()
+            offset, = struct.unpack_from(f'{byte_order}I', self.map,
+                                         position + 1 + name_size)
+            self.offsets[name] = offset
+            position += 1 + name_size + 4
+        self.records = {}
+
+    def _unpack_array(self, position, count):
+        values = struct.unpack_from(f'{self.byte_order}{count}I', self.map,
+                                    position)
+        return list(values), position + 4 * count
+
+    def _get_record(self, chrom):
+        record = self.records.get(chrom)
+        if record is None:
+            position = self.offsets[chrom]
+            dna_size, n_count = struct.unpack_from(f'{self.byte_order}2I',
+                                                   self.map, position)
+            n_starts, position = self._unpack_array(position + 8, n_count)
+            n_sizes, position = self._unpack_array(position, n_count)
+            mask_count, = struct.unpack_from(f'{self.byte_order}I', self.map,
+                                             position)
+            mask_starts, position = self._unpack_array(position + 4,
+                                                       mask_count)
+            mask_sizes, position = self._unpack_array(position, mask_count)
+            # Skip the reserved word
+            record = (dna_size, n_starts, n_sizes, mask_starts, mask_sizes,
+                      position + 4)
+            self.records[chrom] = record
+        return record
+
+    def get_length(self, chrom):
+        return self._get_record(chrom)[0]
+
+    def fetch(self, chrom, start, end):
+        (dna_size, n_starts, n_sizes, mask_starts, mask_sizes,
+         dna_offset) = self._get_record(chrom)
+        start = max(start - 1, 0)
+        end = min(end, dna_size)
+        if start >= end:
+            return ''
+        first_byte = start // 4
+        packed = self.map[dna_offset + first_byte:
+                          dna_offset + (end + 3) // 4]
+        offset = first_byte * 4
+        sequence = list(''.join(BYTE_BASES[byte] for byte in packed)[
+            start - offset:end - offset])
+        for block_starts, block_sizes, replace in (
+                (n_starts, n_sizes, lambda bases: 'N' * len(bases)),
+                (mask_starts, mask_sizes, str.lower),
+        ):
+            i = max(bisect.bisect_right(block_starts, start) - 1, 0)
+            while i < len(block_starts) and block_starts[i] < end:
+                block_start = max(block_starts[i], start)
+                block_end = min(block_starts[i] + block_sizes[i], end)
+                if block_start < block_end:
+                    sequence[block_start - start:block_end - start] = replace(
+                        ''.join(sequence[block_start - start:
+                                         block_end - start]))
+                i += 1
+        return ''.join(sequence)
+
+    def fetch_many(self, intervals):
+        """Return the sequence of each (chrom, start, end) interval."""
+        return [
+            self.fetch(chrom, start, end)
+            for chrom, start, end in intervals
+        ]
+
+
+def _get_blocks(pattern, sequence):
+    starts = []
+    sizes = []
+    for match in pattern.finditer(sequence):
+        starts.append(match.start())
+        sizes.append(match.end() - match.start())
+    return starts, sizes
+
+
+def _pack(sequence):
+    # Anything that isn't ACGT is recorded as an N block and packed as T
+    digits = N_PATTERN.sub(lambda match: '0' * len(match.group()),
+                           sequence).translate(BASE_DIGITS)
+    packed = bytearray()
+    for i in range(0, len(digits), PACK_CHUNK_SIZE):
+        chunk = digits[i:i + PACK_CHUNK_SIZE]
+        chunk += '0' * (-len(chunk) % 4)
+        # Conversion from a power of two base is linear in CPython
+        packed += int(chunk, 4).to_bytes(len(chunk) // 4, 'big')
+    return bytes(packed)
+
+
+def _read_fasta(fasta_path):
+    open_fasta = gzip.open if fasta_path.endswith('.gz') else open
+    name = None
+    lines = []
+    with open_fasta(fasta_path, 'rt') as fasta_file:
+        for line in fasta_file:
+            if line.startswith('>'):
+                if name is not None:
+                    yield name, ''.join(lines)
+                name = line[1:].split(maxsplit=1)[0]
+                lines = []
+            else:
+                lines.append(line.rstrip())
+    if name is not None:
+        yield name, ''.join(lines)
+
+
+def build_2bit(fasta_path, output_path):
+    """Convert a (optionally gzipped) FASTA into a .2bit file, keeping
+    N runs and lowercase soft-masking. IUPAC codes other than N are
+    stored as N, as the format has no way to represent them."""
+    records = []
+    for name, sequence in _read_fasta(fasta_path):
+        n_starts, n_sizes = _get_blocks(N_PATTERN, sequence)
+        mask_starts, mask_sizes = _get_blocks(MASK_PATTERN, sequence)
+        record = b''.join((
+            struct.pack('<2I', len(sequence), len(n_starts)),
+            struct.pack(f'<{len(n_starts)}I', *n_starts),
+            struct.pack(f'<{len(n_sizes)}I', *n_sizes),
+            struct.pack('<I', len(mask_starts)),
+            struct.pack(f'<{len(mask_starts)}I', *mask_starts),
+            struct.pack(f'<{len(mask_sizes)}I', *mask_sizes),
+            struct.pack('<I', 0),
+            _pack(sequence),
+        ))
+        records.append((name.encode(), record))
+        print(f"Packed {name} ({len(sequence)} bases)")
+    offset = 16 + sum(1 + len(name) + 4 for name, _ in records)
+    with open(output_path, 'wb') as output_file:
+        output_file.write(struct.pack('<4I', SIGNATURE, 0, len(records), 0))
+        for name, record in records:
+            output_file.write(struct.pack('<B', len(name)) + name
+                              + struct.pack('<I', offset))
+            offset += len(record)
+        for _, record in records:
+            output_file.write(record)
@@ -0,0 +1,219 @@
+from concurrent.futures import ThreadPoolExecutor
+import heapq
+from itertools import chain
+import json
+import os
+
+from bgzf import compress_lines, EOF_BLOCK, IndexBuilder
+from chrom_matching import get_chromosome_index
+from compose import compose, COMPOSE_THREADS, s3_client, upload_chunks
+from job_tracker import get_job_id
+try:
+    from parquet_results import write_parquet
+except ImportError:
+    # Only the functions that merge results have pyarrow
+    write_parquet = None
+
+
+# Optional environment variables
+# 'tsv', 'bgzip' for BGZF compressed results with a tabix index, or
+# 'parquet' for a directory of Parquet files
+RESULT_FORMAT = os.environ.get('RESULT_FORMAT', 'tsv')
+
+# Lines of merged results encoded and uploaded together
+CHUNK_LINES = 10000
+# Indexes of merged groups of bgzip results are kept next to them
+GROUP_INDEX_SUFFIX = '.index.json'
+INDEX_SUFFIX = '.tbi'
+
+
+def get_row_position(row):
+    """Return the (chromosome index, start) of a result row, from its
+    chrom:start-end column."""
+    chrom, start, _ = get_row_region(row)
+    return get_chromosome_index(chrom), start
+
+
+def get_row_region(row):
+    """Return the chrom, start and end of a result row."""
+    region = row.split('\t', 3)[2]
+    chrom, _, span = region.rpartition(':')
+    start, _, end = span.partition('-')
+    return chrom, int(start), int(end or start)
+
+
+def format_position(position):
+    """Zero-padded so that formatted positions sort as the positions
+    do."""
+    return f'{position[0]:02d}_{position[1]:010d}'
+
+
+def sort_rows(rows):
+    """Return the non-empty lines of result rows, some of which hold
+    several lines, in genomic order."""
+    lines = [
+        line
+        for row in rows
+        for line in row.split('\n')
+        if line
+    ]
+    lines.sort(key=get_row_position)
+    return lines
+
+
+def get_shard_key(temp_file_name, lines):
+    """Key of the shard holding the sorted lines of a task. Shards are
+    listed under their job in order of their first line, and the range
+    they cover can be read from the key."""
+    first = format_position(get_row_position(lines[0]))
+    last = format_position(get_row_position(lines[-1]))
+    return f'{get_job_id(temp_file_name)}/{first}-{last}/{temp_file_name}.tsv'
+
+
+def get_shard_range(key):
+    """Return the formatted first and last positions of a shard key."""
+    first, last = key.split('/')[1].split('-')
+    return first, last
+
+
+def group_shards(shards, max_count, max_bytes):
+    """Split (key, size) shards, in key order, into consecutive groups
+    of at most max_count shards or max_bytes, except where overlapping
+    shards need a group to be bigger. Groups don't overlap each other,
+    so their merged results only need to be joined in order."""
+    groups = []
+    group = []
+    group_size = 0
+    group_last = ''
+    for key, size in shards:
+        first, last = get_shard_range(key)
+        if (group and first >= group_last
+                and (len(group) >= max_count
+                     or group_size + size > max_bytes)):
+            groups.append(group)
+            group = []
+            group_size = 0
+        group.append(key)
+        group_size += size
+        group_last = max(group_last, last)
+    if group:
+        groups.append(group)
+    return groups
+
+
+def _get_lines(bucket, key):
+    body = s3_client.get_object(Bucket=bucket, Key=key)['Body'].read()
+    return [
+        line
+        for line in body.decode().split('\n')
+        if line
+    ]
+
+
+def _get_chunks(lines):
+    chunk = []
+    separator = ''
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) == CHUNK_LINES:
+            yield (separator + '\n'.join(chunk)).encode()
+            chunk = []
+            separator = '\n'
+    if chunk:
+        yield (separator + '\n'.join(chunk)).encode()
+
+
+def _get_located_lines(lines):
+    for line in lines:
+        chrom, start, end = get_row_region(line)
+        yield chrom, start, end, line
+
+
+def _get_tabix_lines(lines):
+    """bgzip results start with the region's chromosome, start and end
+    in columns of their own, for tabix."""
+    for chrom, start, end, line in _get_located_lines(lines):
+        end = max(start, end)
+        yield chrom, start, end, f'{chrom}\t{start}\t{end}\t{line}\n'
+
+
+def get_parquet_part_key(result_key, index):
+    return f'{result_key}/part-{index:05d}.parquet'
+
+
+def _write_index(index, bucket, key, final):
+    if final:
+        s3_client.put_object(Bucket=bucket, Key=f'{key}{INDEX_SUFFIX}',
+                             Body=index.to_tbi())
+    else:
+        s3_client.put_object(Bucket=bucket, Key=f'{key}{GROUP_INDEX_SUFFIX}',
+                             Body=json.dumps(index.to_json()).encode())
+
+
+def _read_index(bucket, key):
+    response = s3_client.get_object(Bucket=bucket,
+                                    Key=f'{key}{GROUP_INDEX_SUFFIX}')
+    return IndexBuilder.from_json(json.loads(response['Body'].read()))
+
+
+def merge_shards(bucket, keys, target_bucket, target_key, final=False):
+    """Write the lines of sorted shards, which may overlap, into
+    target_key in genomic order with a k-way merge. final is set when
+    target_key is the result rather than a group to be joined to
+    others."""
+    with ThreadPoolExecutor(COMPOSE_THREADS) as executor:
+        line_lists = list(executor.map(lambda key: _get_lines(bucket, key),
+                                       keys))
+    print(f"Merging {sum(len(lines) for lines in line_lists)} lines from"
+          f" {len(keys)} shards")
+    merged = heapq.merge(*line_lists, key=get_row_position)
+    if RESULT_FORMAT == 'parquet':
+        if final:
+            target_key = get_parquet_part_key(target_key, 0)
+        s3_client.put_object(Bucket=target_bucket, Key=target_key,
+                             Body=write_parquet(_get_located_lines(merged)))
+        return
+    if RESULT_FORMAT != 'bgzip':
+        upload_chunks(target_bucket, target_key, _get_chunks(merged))
+        return
+    index = IndexBuilder()
+    blocks = compress_lines(_get_tabix_lines(merged), index)
+    if final:
+        blocks = chain(blocks, [EOF_BLOCK])
+    upload_chunks(target_bucket, target_key, blocks)
+    _write_index(index, target_bucket, target_key, final)
+
+
+def join_groups(bucket, keys, target_bucket, target_key, final=False):
+    """Join merged groups, which are already in order, into target_key
+    within S3, joining their indexes too for bgzip results. Parquet
+    groups are copied into the result directory as they are."""
+    if RESULT_FORMAT == 'parquet':
+        if not final:
+            raise ValueError("Parquet groups can only be joined into the"
+                             " result")
+        with ThreadPoolExecutor(COMPOSE_THREADS) as executor:
+            list(executor.map(lambda numbered_key: s3_client.copy_object(
+                Bucket=target_bucket,
+                Key=get_parquet_part_key(target_key, numbered_key[0]),
+                CopySource={
+                    'Bucket': bucket,
+                    'Key': numbered_key[1],
+                },
+            ), enumerate(keys)))
+        print(f"Copied {len(keys)} Parquet files into {target_key}")
+        return
+    if RESULT_FORMAT != 'bgzip':
+        compose(bucket, keys, target_bucket, target_key, separator=b'\n')
+        return
+    sizes = compose(bucket, keys, target_bucket, target_key,
+                    trailer=EOF_BLOCK if final else b'')
+    with ThreadPoolExecutor(COMPOSE_THREADS) as executor:
+        indexes = list(executor.map(lambda key: _read_index(bucket, key),
+                                    keys))
+    index = IndexBuilder()
+    offset = 0
+    for group_index, size in zip(indexes, sizes):
+        index.extend(group_index, offset)
+        offset += size
+    _write_index(index, target_bucket, target_key, final)
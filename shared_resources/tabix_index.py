@@ -0,0 +1,301 @@
+import struct
+from urllib.error import HTTPError
+from urllib.parse import urlparse
+from urllib.request import Request, urlopen
+import zlib
+
+from botocore.exceptions import ClientError
+
+from lambda_utils import s3
+
+
+INDEX_SUFFIXES = ('.tbi', '.csi')
+TBI_MAGIC = b'TBI\x01'
+CSI_MAGIC = b'CSI\x01'
+TBI_MIN_SHIFT = 14
+TBI_DEPTH = 5
+BGZF_HEADER_SIZE = 18
+# Bytes requested per ranged read of an index
+RANGE_SIZE = 256 * 1024
+# Rough ratio of uncompressed to compressed bytes in a BGZF block, used
+# to place virtual file offsets on a single approximate byte scale.
+COMPRESSION_RATIO = 4
+
+
+class ReferenceIndex:
+    """Index of a single contig.
+
+    beg_offset and end_offset are the virtual offsets of the contig's
+    first and last records.
+    """
+    def __init__(self, name, bins, loffsets, intervals, min_shift, depth):
+        self.name = name
+        self.min_shift = min_shift
+        self.depth = depth
+        pseudo_bin = _get_pseudo_bin(depth)
+        pseudo_chunks = bins.pop(pseudo_bin, None)
+        loffsets.pop(pseudo_bin, None)
+        self.bins = bins
+        self.loffsets = loffsets
+        self.intervals = intervals
+        if pseudo_chunks:
+            (self.beg_offset, self.end_offset), (
+                self.n_mapped, self.n_unmapped) = pseudo_chunks
+        else:
+            all_chunks = [
+                chunk
+                for chunks in bins.values()
+                for chunk in chunks
+            ]
+            self.beg_offset = min((c[0] for c in all_chunks), default=0)
+            self.end_offset = max((c[1] for c in all_chunks), default=0)
+            self.n_mapped = None
+            self.n_unmapped = None
+
+    def window_offsets(self):
+        """Return (0-based window start, virtual offset) pairs giving the
+        first record of each window, with offsets never decreasing."""
+        if self.intervals:
+            windows = [
+                (i << self.min_shift, offset)
+                for i, offset in enumerate(self.intervals)
+            ]
+        else:
+            first_leaf = _get_level_offset(self.depth)
+            windows = sorted(
+                ((bin_num - first_leaf) << self.min_shift, offset)
+                for bin_num, offset in self.loffsets.items()
+                if bin_num >= first_leaf
+            )
+        monotonic = []
+        max_offset = self.beg_offset
+        for window_start, offset in windows:
+            max_offset = max(max_offset, offset)
+            monotonic.append((window_start, max_offset))
+        return monotonic
+
+    def window_records(self):
+        """Estimate the number of records starting in each window.
+
+        Returns a list of (0-based window start, estimated records), or
+        None if the index doesn't record how many records the reference
+        holds.
+        """
+        if self.n_mapped is None:
+            return None
+        windows = self.window_offsets()
+        positions = [
+            _approx_position(offset)
+            for _, offset in windows
+        ] + [_approx_position(self.end_offset)]
+        total = positions[-1] - positions[0]
+        if not total:
+            return [
+                (window_start, self.n_mapped if i == 0 else 0)
+                for i, (window_start, _) in enumerate(windows)
+            ]
+        return [
+            (window_start,
+             self.n_mapped * (positions[i + 1] - positions[i]) / total)
+            for i, (window_start, _) in enumerate(windows)
+        ]
+
+
+class TabixIndex:
+    def __init__(self, references):
+        self.references = {
+            reference.name: reference
+            for reference in references
+        }
+        self.names = [reference.name for reference in references]
+
+    def get(self, name):
+        return self.references.get(name)
+
+
+class _BgzfReader:
+    """Decompresses BGZF blocks from ranged reads of a file, S3 object or
+    URL, fetching RANGE_SIZE bytes at a time."""
+    def __init__(self, location):
+        self.location = location
+        self.url = urlparse(location)
+        self.buffer = b''
+        self.buffer_start = 0
+        self.offset = 0
+
+    def _fetch(self, start, length):
+        end = start + length - 1
+        try:
+            if self.url.scheme == 's3':
+                obj = s3.Object(self.url.netloc, self.url.path.lstrip('/'))
+                return obj.get(Range=f'bytes={start}-{end}')['Body'].read()
+            elif self.url.scheme in ('http', 'https'):
+                request = Request(self.location,
+                                  headers={'Range': f'bytes={start}-{end}'})
+                with urlopen(request) as response:
+                    data = response.read()
+                if response.status != 206:
+                    # The server ignored the range and sent everything
+                    data = data[start:end + 1]
+                return data
+            else:
+                with open(self.location, 'rb') as local_file:
+                    local_file.seek(start)
+                    return local_file.read(length)
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'InvalidRange':
+                return b''
+            raise FileNotFoundError(f"Could not read {self.location}: {e}")
+        except HTTPError as e:
+            if e.code == 416:
+                return b''
+            raise
+
+    def _read_raw(self, start, length):
+        buffer_end = self.buffer_start + len(self.buffer)
+        if start + length > buffer_end:
+            # Blocks are read in order, so drop what is already consumed
+            self.buffer = self.buffer[start - self.buffer_start:]
+            self.buffer_start = start
+            self.buffer += self._fetch(
+                start + len(self.buffer),
+                max(RANGE_SIZE, start + length - buffer_end))
+        offset = start - self.buffer_start
+        return self.buffer[offset:offset + length]
+
+    def read_block(self):
+        """Return the next decompressed block, or None at end of file."""
+        header = self._read_raw(self.offset, BGZF_HEADER_SIZE)
+        if len(header) < BGZF_HEADER_SIZE:
+            return None
+        if header[:4] != b'\x1f\x8b\x08\x04':
+            raise ValueError(f"{self.location} is not BGZF compressed")
+        extra_length, = struct.unpack_from('<H', header, 10)
+        extra = self._read_raw(self.offset + 12, extra_length)
+        block_size = None
+        i = 0
+        while i + 4 <= len(extra):
+            subfield_length, = struct.unpack_from('<H', extra, i + 2)
+            if extra[i:i + 2] == b'BC':
+                block_size, = struct.unpack_from('<H', extra, i + 4)
+                block_size += 1
+            i += 4 + subfield_length
+        if block_size is None:
+            raise ValueError(f"{self.location} is missing BGZF block sizes")
+        block = self._read_raw(self.offset, block_size)
+        if len(block) < block_size:
+            raise ValueError(f"{self.location} ended mid-block")
+        self.offset += block_size
+        return zlib.decompress(block[12 + extra_length:-8], -15)
+
+
+class _Cursor:
+    def __init__(self, data=b'', bgzf_reader=None):
+        self.bgzf_reader = bgzf_reader
+        self.data = data
+        self.offset = 0
+
+    def _ensure(self, length):
+        while len(self.data) - self.offset < length:
+            block = self.bgzf_reader and self.bgzf_reader.read_block()
+            if block is None:
+                raise ValueError("Index ended unexpectedly")
+            self.data = self.data[self.offset:] + block
+            self.offset = 0
+
+    def read(self, fmt):
+        size = struct.calcsize(f'<{fmt}')
+        self._ensure(size)
+        values = struct.unpack_from(f'<{fmt}', self.data, self.offset)
+        self.offset += size
+        return values
+
+    def read_bytes(self, length):
+        self._ensure(length)
+        value = self.data[self.offset:self.offset + length]
+        self.offset += length
+        return value
+
+
+def _approx_position(offset):
+    return (offset >> 16) + (offset & 0xFFFF) / COMPRESSION_RATIO
+
+
+def _get_level_offset(level):
+    return ((1 << (3 * level)) - 1) // 7
+
+
+def _get_pseudo_bin(depth):
+    return _get_level_offset(depth + 1) + 1
+
+
+def _open_index(location):
+    for suffix in INDEX_SUFFIXES:
+        cursor = _Cursor(bgzf_reader=_BgzfReader(f'{location}{suffix}'))
+        try:
+            magic = cursor.read_bytes(4)
+        except OSError as e:
+            print(f"Could not read {location}{suffix}: {e}")
+            continue
+        return cursor, magic
+    raise FileNotFoundError(f"No index found for {location}")
+
+
+def _parse_index(location):
+    cursor, magic = _open_index(location)
+    try:
+        if magic == TBI_MAGIC:
+            n_ref, = cursor.read('i')
+            names = _parse_names(cursor)
+            min_shift = TBI_MIN_SHIFT
+            depth = TBI_DEPTH
+        elif magic == CSI_MAGIC:
+            min_shift, depth, l_aux = cursor.read('3i')
+            aux = _Cursor(cursor.read_bytes(l_aux))
+            names = _parse_names(aux) if l_aux else []
+            n_ref, = cursor.read('i')
+        else:
+            raise ValueError("Not a tabix or CSI index")
+        references = _parse_references(cursor, n_ref, names, min_shift,
+                                       depth, csi=(magic == CSI_MAGIC))
+    except struct.error as e:
+        raise ValueError(f"Malformed index: {e}")
+    return TabixIndex(references)
+
+
+def _parse_names(cursor):
+    # format, col_seq, col_beg, col_end, meta, skip
+    cursor.read('6i')
+    l_nm, = cursor.read('i')
+    names = cursor.read_bytes(l_nm).split(b'\0')
+    return [name.decode() for name in names if name]
+
+
+def _parse_references(cursor, n_ref, names, min_shift, depth, csi):
+    if n_ref != len(names):
+        raise ValueError(f"Index has {n_ref} references but {len(names)}"
+                         " names")
+    references = []
+    for name in names:
+        bins = {}
+        loffsets = {}
+        n_bin, = cursor.read('i')
+        for _ in range(n_bin):
+            bin_num, = cursor.read('I')
+            if csi:
+                loffsets[bin_num], = cursor.read('Q')
+            n_chunk, = cursor.read('i')
+            chunks = cursor.read(f'{2 * n_chunk}Q')
+            bins[bin_num] = list(zip(chunks[::2], chunks[1::2]))
+        intervals = []
+        if not csi:
+            n_intv, = cursor.read('i')
+            intervals = list(cursor.read(f'{n_intv}Q'))
+        references.append(ReferenceIndex(name, bins, loffsets, intervals,
+                                         min_shift, depth))
+    return references
+
+
+def read_index(location):
+    """Read the .tbi, or failing that the .csi, index of a VCF."""
+    return _parse_index(location)
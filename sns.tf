@@ -7,16 +7,6 @@ resource "aws_sns_topic_subscription" "queryVCF" {
   protocol = "lambda"
   endpoint = module.lambda-queryVCF.function_arn
 }
-resource "aws_sns_topic" "queryVCFsubmit" {
-  name = "queryVCFsubmit"
-}
-
-resource "aws_sns_topic_subscription" "queryVCFsubmit" {
-  topic_arn = aws_sns_topic.queryVCFsubmit.arn
-  protocol = "lambda"
-  endpoint = module.lambda-queryVCFsubmit.function_arn
-}
-
 resource "aws_sns_topic" "queryGTF" {
   name = "queryGTF"
 }
@@ -32,10 +22,26 @@ resource "aws_sns_topic" "pluginConsequence" {
 }
 
 resource "aws_sns_topic_subscription" "pluginConsequence" {
+  for_each = local.consequence_chromosome_groups
   topic_arn = aws_sns_topic.pluginConsequence.arn
   protocol = "lambda"
   # TODO: Reference function_arn once the module source is updated
-  endpoint = module.lambda-pluginConsequence.lambda_function_arn
+  endpoint = module.lambda-pluginConsequence[each.key].lambda_function_arn
+  # Routed on the chrom attribute set by queryGTF
+  filter_policy = (
+    each.key == local.consequence_default_group
+    ? jsonencode({
+      chrom = [{
+        "anything-but" = flatten([
+          for group, chroms in local.consequence_chromosome_groups : chroms
+          if group != each.key
+        ])
+      }]
+    })
+    : jsonencode({
+      chrom = each.value
+    })
+  )
 }
 
 resource "aws_sns_topic" "pluginUpdownstream" {
@@ -58,16 +64,6 @@ resource "aws_sns_topic_subscription" "concat" {
   endpoint = module.lambda-concat.function_arn
 }
 
-resource "aws_sns_topic" "concatStarter" {
-  name = "concatStarter"
-}
-
-resource "aws_sns_topic_subscription" "concatStarter" {
-  topic_arn = aws_sns_topic.concatStarter.arn
-  protocol = "lambda"
-  endpoint = module.lambda-concatStarter.function_arn
-}
-
 resource "aws_sns_topic" "createPages" {
   name = "createPages"
 }
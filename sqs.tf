@@ -0,0 +1,5 @@
+resource "aws_sqs_queue" "concatStarter" {
+  name = "concatStarter"
+  # At least the timeout of the concatStarter function
+  visibility_timeout_seconds = 30
+}
@@ -0,0 +1,12 @@
+import os
+import sys
+
+# Functions import the shared modules from their own directories, so
+# they're imported from shared_resources here.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'shared_resources'))
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+# Nothing in the tests should reach AWS
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+os.environ.pop('JOB_TRACKER_TABLE', None)
@@ -0,0 +1,73 @@
+import pytest
+
+import annotation_cache
+from annotation_cache import (AnnotationCache, COMPACT_FRAGMENTS,
+                              LocalStore, MERGED_PREFIX)
+
+
+PLUGIN = 'pluginConsequence'
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(annotation_cache, 'PLUGINS', (PLUGIN,))
+    return LocalStore(str(tmp_path))
+
+
+def store_variant(cache, task, pos, rows='row'):
+    cache.store_rows(PLUGIN, task, [(('1', pos, 'A', 'T'), rows)])
+
+
+def lookup(cache, pos):
+    return cache.lookup([('1', str(pos), 'A', 'T')])[0]
+
+
+def get_shard_keys(cache):
+    prefix = cache._get_shard_prefix(PLUGIN, '1', 1)
+    return sorted(cache.store.list_keys(prefix))
+
+
+def test_compaction(store):
+    cache = AnnotationCache(store, 'ref')
+    for i in range(COMPACT_FRAGMENTS):
+        store_variant(cache, f'task{i}', i)
+    assert lookup(cache, 0) == 'row'
+    keys = get_shard_keys(cache)
+    assert len(keys) == 1
+    assert MERGED_PREFIX in keys[0]
+    fresh_cache = AnnotationCache(store, 'ref')
+    assert all(lookup(fresh_cache, i) == 'row'
+               for i in range(COMPACT_FRAGMENTS))
+
+
+def test_racing_compaction_backs_off(store, tmp_path):
+    first = AnnotationCache(store, 'ref')
+
+    class RacingStore(LocalStore):
+        def create(self, key, body):
+            # Another lookup compacts the shard, with a fragment this one
+            # hasn't read, first
+            store_variant(first, 'extra', COMPACT_FRAGMENTS)
+            lookup(first, 0)
+            return super().create(key, body)
+
+    second = AnnotationCache(RacingStore(str(tmp_path)), 'ref')
+    for i in range(COMPACT_FRAGMENTS):
+        store_variant(first, f'task{i}', i)
+    lookup(second, 0)
+    fresh_cache = AnnotationCache(store, 'ref')
+    assert all(lookup(fresh_cache, i) == 'row'
+               for i in range(COMPACT_FRAGMENTS + 1))
+    assert len(get_shard_keys(fresh_cache)) == 1
+
+
+def test_rerun_fragment_is_read(store):
+    cache = AnnotationCache(store, 'ref')
+    for i in range(COMPACT_FRAGMENTS):
+        store_variant(cache, f'task{i}', i)
+    lookup(cache, 0)
+    # A redelivered task writes its fragment again, with other rows
+    store_variant(cache, 'task0', 0, 'rerun')
+    assert lookup(cache, 0) == 'rerun'
+    assert lookup(AnnotationCache(store, 'ref'), 0) == 'rerun'
+    assert len(get_shard_keys(cache)) == 2
@@ -0,0 +1,47 @@
+import os
+import re
+
+from chrom_matching import CHROMOSOME_LENGTHS_MBP, CHROMOSOMES
+
+
+MAIN_TF = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'main.tf')
+# Most a group's length can differ from the mean
+MAX_IMBALANCE = 0.15
+
+
+def read_groups():
+    with open(MAIN_TF) as main_tf:
+        text = main_tf.read()
+    block = re.search(r'consequence_chromosome_groups = \{(.*?)\n  \}',
+                      text, re.DOTALL).group(1)
+    groups = {
+        name: re.findall(r'"([^"]+)"', chroms)
+        for name, chroms in re.findall(r'"([^"]+)" = \[([^\]]*)\]', block)
+    }
+    default_group = re.search(r'consequence_default_group = "([^"]+)"',
+                              text).group(1)
+    return groups, default_group
+
+
+def test_groups_cover_chromosomes_in_order():
+    groups, default_group = read_groups()
+    assert default_group in groups
+    assert [
+        chrom
+        for chroms in groups.values()
+        for chrom in chroms
+    ] == list(CHROMOSOMES)
+    for name, chroms in groups.items():
+        assert name == f'{chroms[0]}-{chroms[-1]}'
+
+
+def test_groups_are_balanced():
+    groups, _ = read_groups()
+    lengths = [
+        sum(CHROMOSOME_LENGTHS_MBP[chrom] for chrom in chroms)
+        for chroms in groups.values()
+    ]
+    mean_length = sum(lengths) / len(lengths)
+    assert all(abs(length - mean_length) <= MAX_IMBALANCE * mean_length
+               for length in lengths)
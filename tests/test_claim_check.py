@@ -0,0 +1,76 @@
+import io
+import json
+
+import pytest
+
+import lambda_utils
+
+
+class FakeObject:
+    def __init__(self, objects, bucket, key):
+        self.objects = objects
+        self.location = (bucket, key)
+
+    def get(self):
+        return {
+            'Body': io.BytesIO(self.objects[self.location]),
+        }
+
+    def put(self, Body):
+        self.objects[self.location] = Body
+
+
+class FakeS3:
+    def __init__(self):
+        self.objects = {}
+
+    def Object(self, bucket, key):
+        return FakeObject(self.objects, bucket, key)
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    fake_s3 = FakeS3()
+    monkeypatch.setattr(lambda_utils, 's3', fake_s3)
+    monkeypatch.setattr(lambda_utils, 'SVEP_TEMP', 'temp-bucket')
+    return fake_s3
+
+
+def test_small_message_is_sent(s3):
+    message = {
+        'coords': ['1\t100\tA\tT'],
+    }
+    body = lambda_utils.encode_message(message)
+    assert not s3.objects
+    assert lambda_utils.decode_message(body) == message
+
+
+def test_large_message_is_checked_in(s3, monkeypatch):
+    monkeypatch.setattr(lambda_utils, 'CLAIM_CHECK_THRESHOLD', 1000)
+    # Random enough not to compress below the threshold
+    message = {
+        'coords': [f'1\t{i * 7919 % 100003}\tA\tT' for i in range(1000)],
+    }
+    body = lambda_utils.encode_message(message)
+    assert len(body) <= 1000
+    (bucket, key), = s3.objects
+    assert bucket == 'temp-bucket'
+    assert key.startswith(lambda_utils.CLAIM_CHECK_PREFIX)
+    assert json.loads(body)[lambda_utils.CLAIM_CHECK_FIELD] == {
+        'bucket': bucket,
+        'key': key,
+    }
+    assert lambda_utils.decode_message(body) == message
+
+
+def test_threshold_is_inclusive(s3, monkeypatch):
+    message = {
+        'APIid': 'job',
+    }
+    body = lambda_utils.encode_message(message)
+    monkeypatch.setattr(lambda_utils, 'CLAIM_CHECK_THRESHOLD', len(body))
+    assert lambda_utils.encode_message(message) == body
+    monkeypatch.setattr(lambda_utils, 'CLAIM_CHECK_THRESHOLD', len(body) - 1)
+    assert lambda_utils.encode_message(message) != body
+    assert lambda_utils.decode_message(
+        lambda_utils.encode_message(message)) == message
@@ -0,0 +1,37 @@
+from compose import ComposePlan, MIN_PART_SIZE
+
+
+MIB = 1024 ** 2
+
+
+def plan_parts(separator, sizes, trailer=b''):
+    plan = ComposePlan(separator)
+    for i, size in enumerate(sizes):
+        plan.add(f'key{i}', size)
+    return plan.finish(trailer)
+
+
+def test_big_objects_without_separator_are_copied():
+    assert plan_parts(b'', [20 * MIB, 20 * MIB, 20 * MIB]) == [
+        ('copy', 'key0', 0, 20 * MIB),
+        ('copy', 'key1', 0, 20 * MIB),
+        ('copy', 'key2', 0, 20 * MIB),
+    ]
+
+
+def test_big_objects_with_separator():
+    needed = MIN_PART_SIZE - 1
+    assert plan_parts(b'\n', [20 * MIB, 20 * MIB]) == [
+        ('copy', 'key0', 0, 20 * MIB),
+        ('upload', [b'\n', ('key1', 0, needed)]),
+        ('copy', 'key1', needed, 20 * MIB),
+    ]
+
+
+def test_small_objects_are_uploaded_together():
+    assert plan_parts(b'', [MIB, MIB], b'end') == [
+        ('upload', [('key0', 0, MIB), ('key1', 0, MIB), b'end']),
+    ]
+    assert plan_parts(b'\n', [MIB, MIB]) == [
+        ('upload', [('key0', 0, MIB), b'\n', ('key1', 0, MIB)]),
+    ]
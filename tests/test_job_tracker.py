@@ -0,0 +1,115 @@
+import uuid
+
+import pytest
+
+from job_tracker import SqliteTracker
+import lambda_utils
+
+
+@pytest.fixture
+def tracker(monkeypatch):
+    sqlite_tracker = SqliteTracker()
+    monkeypatch.setattr(lambda_utils, 'tracker', sqlite_tracker)
+    return sqlite_tracker
+
+
+@pytest.fixture
+def published(monkeypatch):
+    """Messages sent through SNS, by topic."""
+    messages = {}
+
+    def publish_batch(TopicArn, PublishBatchRequestEntries):
+        messages.setdefault(TopicArn, []).extend(
+            lambda_utils.decode_message(entry['Message'])
+            for entry in PublishBatchRequestEntries
+        )
+        return {}
+
+    def sns_publish(topic_arn, message, *args, **kwargs):
+        messages.setdefault(topic_arn, []).append(message)
+
+    monkeypatch.setattr(lambda_utils.sns, 'publish_batch', publish_batch)
+    monkeypatch.setattr(lambda_utils, 'sns_publish', sns_publish)
+    monkeypatch.setattr(lambda_utils, 'CONCAT_SNS_TOPIC_ARN', 'concat')
+    return messages
+
+
+def get_event(message):
+    return {
+        'Records': [
+            {
+                'Sns': {
+                    'Message': lambda_utils.encode_message(message),
+                },
+            },
+        ],
+    }
+
+
+def run_parent(job_id, children):
+    with lambda_utils.BatchPublisher() as publisher:
+        for i in range(children):
+            lambda_utils.start_function('arn:aws:sns:::child',
+                                        f'{job_id}_{i}', {'index': i},
+                                        publisher=publisher)
+
+
+def complete(message):
+    orchestrator = lambda_utils.Orchestrator(get_event(message))
+    orchestrator.mark_completed()
+
+
+def test_add(tracker):
+    assert tracker.add('job', 3) == 3
+    assert tracker.add('job', -1) == 2
+    assert tracker.get('job') == 2
+    assert tracker.get('other') == 0
+
+
+def test_add_once(tracker):
+    tracker.add('job', 2)
+    assert tracker.add_once('job', 'a', -1) == 1
+    assert tracker.add_once('job', 'a', -1) == 1
+    assert tracker.add_once('job', 'b', -1) == 0
+    # Names are counted separately for each job
+    assert tracker.add_once('other', 'a', 1) == 1
+
+
+def test_add_each_once(tracker):
+    assert tracker.add_each_once('job', ['a', 'b'], 1) == 2
+    assert tracker.add_each_once('job', ['b', 'c'], 1) == 3
+
+
+def test_claim(tracker):
+    assert tracker.claim('job', 'concat')
+    assert not tracker.claim('job', 'concat')
+    assert tracker.claim('job', 'other')
+    assert tracker.claim('other', 'concat')
+
+
+def test_completion_triggers_concat_once(tracker, published):
+    job_id = uuid.uuid4().hex
+    run_parent(job_id, 3)
+    children = published['arn:aws:sns:::child']
+    for message in children + children:
+        complete(message)
+    assert tracker.get(job_id) == 0
+    assert published['concat'] == [{'APIid': job_id}]
+
+
+def test_redelivered_parent(tracker, published):
+    job_id = uuid.uuid4().hex
+    # The parent is a task itself, counted when it was started
+    lambda_utils.start_function('arn:aws:sns:::parent', job_id, {},
+                                publisher=None)
+    parent, = published.pop('arn:aws:sns:::parent')
+    for _ in range(2):
+        run_parent(job_id, 15)
+        complete(parent)
+    children = published['arn:aws:sns:::child']
+    assert len(children) == 30
+    assert tracker.get(job_id) == 15
+    for message in children:
+        complete(message)
+    assert tracker.get(job_id) == 0
+    assert published['concat'] == [{'APIid': job_id}]
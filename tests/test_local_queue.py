@@ -0,0 +1,78 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+
+PLUGIN_DIR = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'lambda', 'pluginConsequence')
+PERL_ARGS = [
+    'perl',
+    '-I', PLUGIN_DIR,
+    '-I', os.path.join(PLUGIN_DIR, 'docker'),
+    '-MVEP',
+]
+# Stands in for VEP::handle, recording each payload it's given
+RECORDING_HANDLE = '''
+no warnings 'redefine';
+*VEP::handle = sub {
+    open(my $fh, '>>', $ENV{'HANDLED_LOG'}) or die;
+    print $fh $_[0];
+    close $fh;
+    die "Bad event\\n" if $_[0] =~ /bad/;
+};
+'''
+
+
+@pytest.fixture
+def queue_dir(tmp_path):
+    if shutil.which('perl') is None:
+        pytest.skip("perl is not installed")
+    check = subprocess.run(PERL_ARGS + ['-e', '1'], capture_output=True,
+                           text=True)
+    if check.returncode:
+        pytest.skip(f"VEP.pm can't be loaded: {check.stderr.splitlines()[0]}")
+    return tmp_path / 'events'
+
+
+def run_worker(queue_dir, code=''):
+    env = dict(os.environ, LOCAL_QUEUE_DIR=str(queue_dir),
+               HANDLED_LOG=str(queue_dir.parent / 'handled.log'))
+    return subprocess.run(PERL_ARGS + ['-e', f'{code} VEP::run_worker()'],
+                          env=env, capture_output=True, text=True,
+                          timeout=60)
+
+
+def add_events(queue_dir, events):
+    queue_dir.mkdir()
+    for name, payload in events.items():
+        (queue_dir / name).write_text(payload)
+
+
+def list_events(queue_dir, outcome=''):
+    return sorted(path.name for path in (queue_dir / outcome).glob('*.json'))
+
+
+def test_events_are_handled_in_order(queue_dir):
+    add_events(queue_dir, {
+        'c.json': 'third',
+        'a.json': 'first',
+        'b.json': 'bad',
+    })
+    result = run_worker(queue_dir, RECORDING_HANDLE)
+    assert result.returncode == 0, result.stderr
+    assert (queue_dir.parent / 'handled.log').read_text() == 'firstbadthird'
+    assert list_events(queue_dir) == []
+    assert list_events(queue_dir, 'done') == ['a.json', 'c.json']
+    assert list_events(queue_dir, 'failed') == ['b.json']
+
+
+def test_malformed_event_fails(queue_dir):
+    add_events(queue_dir, {
+        'event.json': '{"Records": []}',
+    })
+    result = run_worker(queue_dir)
+    assert result.returncode == 0, result.stderr
+    assert 'Error handling' in result.stdout
+    assert list_events(queue_dir, 'failed') == ['event.json']
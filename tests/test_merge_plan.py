@@ -0,0 +1,41 @@
+import pytest
+
+from job_tracker import SqliteTracker
+import merge_plan
+from merge_plan import MergePlan
+
+
+@pytest.fixture(autouse=True)
+def tracker(monkeypatch):
+    sqlite_tracker = SqliteTracker()
+    monkeypatch.setattr(merge_plan, 'tracker', sqlite_tracker)
+    return sqlite_tracker
+
+
+def test_single_group_has_no_merge_levels():
+    # More parts than the fan-in, which only applies above the groups
+    plan = MergePlan.from_group_count('api', 100, 1, 4)
+    assert plan.level_sizes == [100]
+    assert plan.top_level == 0
+
+
+def test_levels_fan_in():
+    plan = MergePlan.from_group_count('api', 100, 20, 4)
+    assert plan.level_sizes == [100, 20, 5, 2]
+    assert list(plan.get_children(3, 1)) == [4]
+    assert plan.get_top_keys() == [
+        'api-merge/3/000000.tsv',
+        'api-merge/3/000001.tsv',
+    ]
+
+
+def test_parent_starts_once():
+    plan = MergePlan.from_group_count('api', 100, 6, 4)
+    assert plan.level_sizes == [100, 6, 2]
+    ready = [plan.mark_merged(1, index) for index in range(6)]
+    assert ready == [False, False, False, True, False, True]
+    # Redelivered merges don't start their parent again
+    assert not plan.mark_merged(1, 3)
+    assert not plan.mark_merged(1, 5)
+    assert [plan.mark_merged(2, index) for index in range(2)] == [False,
+                                                                   True]
@@ -0,0 +1,51 @@
+import payload_codec
+
+
+def get_records(count, **extra):
+    return [
+        {
+            'chrom': '1',
+            'pos': str(1000 + i),
+            'ref': 'A',
+            'alt': 'T',
+            'data': [f'1\tensembl\tgene\t{900 + i // 10}\t2000'],
+            **extra,
+        }
+        for i in range(count)
+    ]
+
+
+def test_short_messages_stay_json():
+    message = {
+        'APIid': 'job',
+    }
+    body = payload_codec.encode(message)
+    assert body == '{"APIid":"job"}'
+    assert payload_codec.decode(body) == message
+
+
+def test_records_round_trip():
+    message = {
+        'snsData': get_records(500),
+        'tempFileName': 'job_1',
+    }
+    body = payload_codec.encode(message)
+    assert body.startswith(f'{payload_codec.PREFIX}{payload_codec.VERSION}:')
+    assert payload_codec.decode(body) == message
+
+
+def test_extra_record_fields_are_kept():
+    message = {
+        'snsData': get_records(500, qual='50'),
+    }
+    body = payload_codec.encode(message)
+    assert payload_codec.decode(body) == message
+
+
+def test_missing_record_fields_are_kept():
+    records = get_records(500)
+    del records[3]['data']
+    message = {
+        'snsData': records,
+    }
+    assert payload_codec.decode(payload_codec.encode(message)) == message